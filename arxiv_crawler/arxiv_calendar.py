@@ -0,0 +1,148 @@
+"""
+arXiv公布日历
+
+arXiv在周日到周四的美东20:00(即周一到周五的UTC 00:00)公布新文章, 美东假期当晚不公布, 顺延到下一个公布日,
+见 https://info.arxiv.org/help/availability.html
+
+ArxivCalendar为一段年份范围预先算好每一天的下一个/上一个公布日, 每次查询只是一次数组下标访问;
+假期表从holidays/目录下的<年份>.txt读取(每行一个美东日期, #之后为注释), 新的一年只需要添加数据文件。
+范围之外的日期退回逐日推算, 结果相同。
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from env_utils import env_int
+
+HOLIDAYS_DIR = Path(__file__).with_name("holidays")
+
+# 在范围末尾多算一段, 保证范围内最后几天的"下一个公布日"也能直接查表
+_PADDING_DAYS = 31
+
+
+def load_holidays(directory: str | Path = HOLIDAYS_DIR) -> set[date]:
+    """读取目录下所有*.txt假期文件"""
+    holidays = set()
+    for path in sorted(Path(directory).glob("*.txt")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                holidays.add(date.fromisoformat(line))
+    return holidays
+
+
+class ArxivCalendar:
+    """
+    预先计算的公布日索引, 所有返回的公布日都是当天00:00(UTC)的datetime
+    """
+
+    def __init__(self, first_year: int = 1991, last_year: int | None = None, holidays: set[date] | None = None):
+        """
+        Args:
+            first_year (int, optional): 预计算范围的第一年. Defaults to 1991.
+            last_year (int | None, optional): 预计算范围的最后一年, None表示今年之后5年. Defaults to None.
+            holidays (set[date] | None, optional): 美东假期, None表示从HOLIDAYS_DIR读取. Defaults to None.
+        """
+        self.first_day = date(first_year, 1, 1)
+        self.last_day = date(last_year or date.today().year + 5, 12, 31)
+        self.holidays = frozenset(load_holidays() if holidays is None else holidays)
+        self.days = (self.last_day - self.first_day).days + 1
+
+        span = self.days + _PADDING_DAYS
+        announced = [self._is_announcement_day(self.first_day + timedelta(days=i)) for i in range(span)]
+        # _next[i]/_prev[i]: 第i天当天或之后/之前最近的公布日的下标, 没有时为-1
+        self._next = [-1] * span
+        self._prev = [-1] * span
+        following = -1
+        for i in reversed(range(span)):
+            if announced[i]:
+                following = i
+            self._next[i] = following
+        preceding = -1
+        for i in range(span):
+            if announced[i]:
+                preceding = i
+            self._prev[i] = preceding
+        self._next_array = np.array(self._next[: self.days], dtype=np.int64)
+
+    @classmethod
+    def from_env(cls) -> "ArxivCalendar":
+        """使用ARXIV_CALENDAR_FIRST_YEAR、ARXIV_CALENDAR_LAST_YEAR、ARXIV_HOLIDAYS_DIR构造"""
+        holidays_dir = os.environ.get("ARXIV_HOLIDAYS_DIR", "").strip()
+        return cls(
+            first_year=env_int("ARXIV_CALENDAR_FIRST_YEAR", 1991),
+            last_year=env_int("ARXIV_CALENDAR_LAST_YEAR", 0) or None,
+            holidays=load_holidays(holidays_dir) if holidays_dir else None,
+        )
+
+    def _is_announcement_day(self, day: date) -> bool:
+        # 假期均为美国东部时间, 例如9.2放假会导致9.3 UTC+0的更新推迟
+        return day.weekday() < 5 and day - timedelta(days=1) not in self.holidays
+
+    def _index(self, day: date) -> int | None:
+        index = (day - self.first_day).days
+        return index if 0 <= index < self.days else None
+
+    def _walk(self, day: date, step: int) -> date:
+        while not self._is_announcement_day(day):
+            day += timedelta(days=step)
+        return day
+
+    def next_day(self, day: date) -> date:
+        """day当天或之后最近的公布日"""
+        index = self._index(day)
+        if index is None or self._next[index] < 0:
+            return self._walk(day, 1)
+        return self.first_day + timedelta(days=self._next[index])
+
+    def previous_day(self, day: date) -> date:
+        """day当天或之前最近的公布日"""
+        index = self._index(day)
+        if index is None or self._prev[index] < 0:
+            return self._walk(day, -1)
+        return self.first_day + timedelta(days=self._prev[index])
+
+    def next_announcement_day(self, time: datetime) -> datetime:
+        """
+        time(UTC)之后最早的一次公布, 公布时间为当天00:00, 因此恰好是00:00的公布日会返回它自己
+        """
+        midnight = time.replace(hour=0, minute=0, second=0, microsecond=0)
+        day = midnight.date() if time == midnight else midnight.date() + timedelta(days=1)
+        return datetime.combine(self.next_day(day), datetime.min.time(), tzinfo=time.tzinfo)
+
+    def previous_announcement_day(self, time: datetime) -> datetime:
+        """time(UTC)当时或之前最近的一次公布"""
+        return datetime.combine(self.previous_day(time.date()), datetime.min.time(), tzinfo=time.tzinfo)
+
+    def announcement_day_for_submission(self, submitted: datetime) -> datetime:
+        """
+        美东submitted这一天提交的文章最早的公布日。
+        美东T日14:00前提交的文章在T日20:00(UTC T+1日00:00)公布, 晚于14:00则顺延一个公布日, 这里只看日期, 取最早的可能
+        """
+        return datetime.combine(self.next_day(submitted.date() + timedelta(days=1)), datetime.min.time())
+
+    def announcement_days_for_submissions(self, submitted) -> np.ndarray:
+        """
+        announcement_day_for_submission的批量版本
+
+        Args:
+            submitted: datetime/date序列或numpy datetime64数组
+
+        Returns:
+            np.ndarray: datetime64[D]数组, 与输入一一对应
+        """
+        days = np.asarray(submitted, dtype="datetime64[D]") + np.timedelta64(1, "D")
+        index = (days - np.datetime64(self.first_day, "D")).astype(np.int64)
+        in_range = (index >= 0) & (index < self.days)
+        result = np.empty_like(days)
+        result[in_range] = np.datetime64(self.first_day, "D") + self._next_array[index[in_range]]
+        for i in np.flatnonzero(~in_range | (result < days)):
+            # 超出预计算范围, 或范围末尾的下一个公布日落在余量之外
+            result[i] = np.datetime64(self.next_day(days[i].item()), "D")
+        return result
+
+
+ARXIV_CALENDAR = ArxivCalendar.from_env()
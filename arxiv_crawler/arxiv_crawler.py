@@ -1,16 +1,19 @@
 import asyncio
-import re
-from datetime import datetime, timedelta, UTC
+import csv
+import time
+from collections import deque
+from contextlib import aclosing
 from itertools import chain
+from datetime import datetime, timedelta, UTC
+from urllib.parse import urlparse
 
-import aiohttp
-from bs4 import BeautifulSoup, NavigableString, Tag
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
 import sys
 import os
 from dotenv import load_dotenv
-from arxiv_time import next_arxiv_update_day
+import numpy as np
+from arxiv_calendar import ARXIV_CALENDAR
 # 加载环境变量
 if os.path.exists('.env'):
     load_dotenv(override=False)
@@ -19,6 +22,18 @@ if os.path.exists('.env'):
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from paper import Paper, PaperDatabase, PaperExporter
+from async_translator import TRANSLATE_RETRY_POLICY, BatchTranslator
+from checkpoint import CrawlCheckpoint, IncompleteCrawlError
+from crawl_metrics import CrawlMetrics
+from env_utils import env_bool, env_int
+from http_pool import ConnectionStats, PoolConfig, create_session
+from oai_source import OaiHarvester, match_keywords
+from page_cache import PageCache, PageCacheMiss
+from page_scheduler import PageScheduler
+from parse_pool import ParsePool
+from query_planner import QueryPlanner, QueryShard, merge_shard_results
+from retry_policy import RetryPolicy, describe_error
+from search_parser import bs4_search_text, parse_search_page, resolve_backend, scan_result_urls
 
 
 class ArxivScraper(object):
@@ -31,6 +46,7 @@ class ArxivScraper(object):
         optional_keywords=None,
         trans_to=None,
         proxy=None,
+        db_path="papers.db",
     ):
         """
         一个抓取指定日期范围内的arxiv文章的类,
@@ -47,6 +63,7 @@ class ArxivScraper(object):
             optional_keywords (list, optional): 关键词, 各词之间关系为OR, 在标题/摘要中至少要出现一个关键词才会被爬取. Defaults to 环境变量OPTIONAL_KEYWORDS或["cs.CV", "cs.AI", "cs.DS", "cs.ET", "cs.HC", "cs.NE", "cs.RO", "cs.SD", "eess.AS", "eess.IV"].
             trans_to: 翻译的目标语言, 若设为可转换为False的值则不会翻译. Defaults to 环境变量TRANS_TO或"zh-CN".
             proxy (str | None, optional): 用于翻译和爬取arxiv时要使用的代理, 通常是http://127.0.0.1:7890. Defaults to 环境变量PROXY或None.
+            db_path (str, optional): 数据库路径. Defaults to "papers.db".
         """
         # 从环境变量读取配置，优先级：函数参数 > 环境变量 > 默认值
         
@@ -63,6 +80,7 @@ class ArxivScraper(object):
         default_keywords = [kw.strip() for kw in env_keywords.split(",") if kw.strip()]
 
         self.target_date = datetime.strptime(date_from, "%Y-%m-%d")
+        self.target_until_date = datetime.strptime(date_until, "%Y-%m-%d")  # fetch_range
         
         # announced_date_first 日期处理为年月，从from到until的所有月份都会被爬取
         # 如果from和until是同一个月，则until设置为下个月(from+31)
@@ -72,7 +90,9 @@ class ArxivScraper(object):
         if self.search_from_date.month == self.search_until_date.month:
             self.search_until_date = (self.search_from_date + timedelta(days=31)).replace(day=1)
         # 由于arxiv的奇怪机制，每个月的第一天公布的文章总会被视作上个月的文章, 所以需要将月初文章的首次公布日期往后推一天
-        self.first_announced_date = next_arxiv_update_day(next_arxiv_update_day(self.search_from_date) + timedelta(days=1))
+        self.first_announced_date = ARXIV_CALENDAR.next_announcement_day(
+            ARXIV_CALENDAR.next_announcement_day(self.search_from_date) + timedelta(days=1)
+        )
 
         
         # 使用函数参数或环境变量或默认值
@@ -81,22 +101,91 @@ class ArxivScraper(object):
         self.optional_keywords = [kw.replace(" ", "+") for kw in (optional_keywords if optional_keywords is not None else default_keywords)]  # url转义
 
         self.trans_to = trans_to if trans_to is not None else os.environ.get("TRANS_TO", "zh-CN")  # translate
+        # 为False时爬取只负责入库, 翻译由translate_only单独完成, 慢速的翻译服务不会阻塞入库
+        self.translate_on_crawl = bool(self.trans_to) and env_bool("TRANSLATE_ON_CRAWL", True)
         self.proxy = proxy if proxy is not None else os.environ.get("PROXY", "")
         if self.proxy == "":
             self.proxy = None
 
+        # 搜索页的站点地址, 可以指向本地的替身服务器(见bench_crawl)
+        self.base_url = os.environ.get("ARXIV_BASE_URL", "https://arxiv.org").rstrip("/")  # url
         self.filt_date_by = "announced_date_first"  # url
         self.order = "-announced_date_first"  # url(结果默认按首次公布日期的降序排列，这样最新公布的会在前面)
         self.total = None  # fetch_all
+        self.search_window: QueryShard | None = None  # 非None时所有请求都只搜索这个窗口(精确到天), 见fetch_range
         step_value = os.environ.get("STEP", "50")
         self.step = int(step_value) if step_value else 50  # url, fetch_all
         self.papers: list[Paper] = []  # fetch_all
+        self.html_parser = resolve_backend()  # 搜索结果页解析后端, 见search_parser
+        # 增量更新时先只取出每个结果的url查库, 只完整解析数据库里还没有的文章, 见_update_lazily
+        self.lazy_parse = env_bool("LAZY_PARSE", True)
+        # fetch_all的数据来源: search(高级搜索结果页) 或 oai(OAI-PMH批量获取, 适合历史回填)
+        self.source = os.environ.get("CRAWL_SOURCE", "search").strip().lower() or "search"
+        if self.source not in ("search", "oai"):
+            raise ValueError(f"Unknown crawl source: {self.source}, available: ('search', 'oai')")
 
-        self.paper_db = PaperDatabase()
+        self.paper_db = PaperDatabase(db_path)
         # 使用用户提供的原始日期初始化PaperExporter，只生成指定日期的文件
-        self.paper_exporter = PaperExporter(date_from, date_until, self.category_blacklist, self.category_whitelist)
+        self.paper_exporter = PaperExporter(
+            date_from, date_until, self.category_blacklist, self.category_whitelist, database_path=db_path
+        )
         self.console = Console()
         self.pinned_announced_date = None
+        # 把已入库的url读入内存, 增量更新时每页的存在性检查不再查库, 见PaperDatabase.warm_url_index
+        if env_bool("KNOWN_URL_INDEX", False):
+            indexed = self.paper_db.warm_url_index()
+            self.console.log(f"[bold green]Loaded {indexed} known urls into memory")
+
+        # 整个爬取过程共用一个长连接会话, 重试和翻页都复用连接池里的连接
+        self.http_config = PoolConfig.from_env()
+        self.http_stats = ConnectionStats()
+        self._session = None
+        # 原始页面的磁盘缓存, 支持条件请求、TTL和离线回放, 见page_cache
+        self.page_cache = PageCache.from_env()
+        # 请求失败时的重试、熔断和按host统计, 见retry_policy
+        self.retry_policy = RetryPolicy.from_env(console=self.console)
+        # 每次fetch_all/fetch_update开始时重置, 记录每个页面的耗时、大小、重试和状态, 见crawl_metrics
+        self.metrics = CrawlMetrics()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        """
+        获取共享的aiohttp会话, 首次调用时创建。会话与事件循环绑定, 因此每个入口(fetch_all/fetch_update)结束时都会close
+        """
+        if self._session is None or self._session.closed:
+            self._session = create_session(self.http_config, self.http_stats)
+        return self._session
+
+    async def close(self):
+        """
+        关闭共享会话并打印连接复用统计和本次爬取的指标摘要
+        """
+        if self.metrics.pages or self.metrics.phases:
+            self.metrics.finish()
+            self.metrics.extra["http"] = {
+                "requests": self.http_stats.requests,
+                "connections_created": self.http_stats.connections_created,
+                "connections_reused": self.http_stats.connections_reused,
+            }
+            self.console.log(f"[bold cyan]Crawl metrics: {self.metrics.format_summary()}")
+        if self.page_cache.hits or self.page_cache.misses:
+            self.console.log(
+                f"[bold cyan]Page cache ({self.page_cache.mode}): {self.page_cache.hits} hits, {self.page_cache.misses} misses"
+            )
+            self.page_cache.hits = self.page_cache.misses = 0
+        if self._session is None:
+            return
+        if not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self.console.log(f"[bold cyan]HTTP connections: {self.http_stats.summary()}")
+        if self.retry_policy.stats:
+            self.console.log(f"[bold cyan]Request stats: {self.retry_policy.summary()}")
 
     @property
     def meta_data(self):
@@ -105,60 +194,297 @@ class ArxivScraper(object):
         """
         return dict(repo_url="https://github.com/huiyeruzhou/arxiv_crawler", **self.__dict__)
 
-    def get_url(self, start):
+    def get_url(self, start, shard: QueryShard | None = None):
         """
         获取用于搜索的url
 
         Args:
             start (int): 返回结果的起始序号, 每个页面只会包含序号为[start, start+50)的文章
-            filter_date_by (str, optional): 日期筛选方式. Defaults to "submitted_date_first".
+            shard (QueryShard, optional): 查询分片, 指定时只搜索分片内的关键词和日期窗口(精确到天). Defaults to self.search_window.
         """
         # https://arxiv.org/search/advanced?terms-0-operator=AND&terms-0-term=LLM&terms-0-field=all&terms-1-operator=OR&terms-1-term=language+model&terms-1-field=all&terms-2-operator=OR&terms-2-term=multimodal&terms-2-field=all&terms-3-operator=OR&terms-3-term=finetuning&terms-3-field=all&terms-4-operator=AND&terms-4-term=GPT&terms-4-field=all&classification-computer_science=y&classification-physics_archives=all&classification-include_cross_list=include&date-year=&date-filter_by=date_range&date-from_date=2024-08-08&date-to_date=2024-08-15&date-date_type=submitted_date_first&abstracts=show&size=50&order=submitted_date
+        shard = shard if shard is not None else self.search_window
+        keywords = self.optional_keywords if shard is None else shard.keywords
+        date_type = self.filt_date_by if shard is None else (shard.date_type or self.filt_date_by)
         kwargs = "".join(
             f"&terms-{i}-operator=OR&terms-{i}-term={kw}&terms-{i}-field=all"
-            for i, kw in enumerate(self.optional_keywords)
+            for i, kw in enumerate(keywords)
         )
-        date_from = self.search_from_date.strftime("%Y-%m")
-        date_until = self.search_until_date.strftime("%Y-%m")
+        if shard is None:
+            date_from = self.search_from_date.strftime("%Y-%m")
+            date_until = self.search_until_date.strftime("%Y-%m")
+        else:
+            # 分片的窗口是左闭右开的, 搜索的to_date包含当天
+            date_from = shard.date_from.strftime("%Y-%m-%d")
+            date_until = (shard.date_until - timedelta(days=1)).strftime("%Y-%m-%d")
         return (
-            f"https://arxiv.org/search/advanced?advanced={kwargs}"
+            f"{self.base_url}/search/advanced?advanced={kwargs}"
             f"&classification-computer_science=y&classification-physics_archives=all&"
             f"classification-include_cross_list=include&"
             f"date-year=&date-filter_by=date_range&date-from_date={date_from}&date-to_date={date_until}&"
-            f"date-date_type={self.filt_date_by}&abstracts=show&size={self.step}&order={self.order}&start={start}"
+            f"date-date_type={date_type}&abstracts=show&size={self.step}&order={self.order}&start={start}"
         )
+    @staticmethod
+    def _page_key(start, shard: QueryShard | None = None) -> str:
+        """页面在指标中的标识"""
+        return str(start) if shard is None else f"{shard.label} start={start}"
+
+    async def _fetch_page(self, start, shard: QueryShard | None = None):
+        """
+        请求一次网页, 不重试。HTTP错误会抛出带`status`属性的aiohttp.ClientResponseError。
+        根据self.page_cache的模式, 可能直接返回缓存内容或发送条件请求, 每个从网络获取的页面都会写入缓存
+        """
+        url = self.get_url(start, shard)
+        metric = self.metrics.page(self._page_key(start, shard))
+        metric.attempts += 1
+        cache = self.page_cache
+        entry = cache.lookup(url) if cache.mode in ("revalidate", "ttl", "replay") else None
+        if cache.mode == "replay":
+            if entry is None:
+                cache.misses += 1
+                metric.status = "cache_miss"
+                raise PageCacheMiss(f"Page not in cache: {url}")
+            cache.hits += 1
+            metric.status = metric.source = "cache"
+            return cache.read(entry)
+        if cache.mode == "ttl" and entry is not None and entry.age < cache.ttl:
+            cache.hits += 1
+            metric.status = metric.source = "cache"
+            return cache.read(entry)
+
+        headers = cache.conditional_headers(entry) if cache.mode == "revalidate" else {}
+        session = self._get_session()
+        begin = time.monotonic()
+        try:
+            async with session.get(url, proxy=self.proxy, headers=headers) as response:
+                metric.ttfb = time.monotonic() - begin
+                if response.status == 304 and entry is not None:
+                    cache.hits += 1
+                    cache.touch(entry)
+                    metric.status = metric.source = "cache"
+                    return cache.read(entry)
+                response.raise_for_status()
+                body = await response.read()
+                content = await response.text()
+                metric.download = time.monotonic() - begin - metric.ttfb
+                metric.bytes = len(body)
+                metric.status, metric.source = "ok", "network"
+                if cache.enabled:
+                    cache.misses += 1
+                    cache.store(url, content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return content
+        except Exception as e:
+            status = getattr(e, "status", None)
+            metric.status = f"http_{status}" if status is not None else type(e).__name__
+            raise
+
+    def _record_queue_wait(self, key, wait: float):
+        metric = self.metrics.page(key)
+        metric.queue_wait = (metric.queue_wait or 0.0) + wait
+
+    async def _parse_page(self, parse_pool: ParsePool, key, content) -> tuple[int | None, list[Paper]]:
+        """用parse_pool解析页面, 并记录解析耗时和文章数"""
+        begin = time.monotonic()
+        total, papers = await parse_pool.parse(content)
+        metric = self.metrics.page(key)
+        metric.parse = time.monotonic() - begin
+        metric.papers = len(papers)
+        return total, papers
+
+    @property
+    def _host(self) -> str:
+        return urlparse(self.get_url(0)).netloc
+
+    async def _guarded_fetch(self, start, shard: QueryShard | None = None):
+        """
+        请求一次网页, 经过按host的熔断器并记录失败统计, 供自带重试的PageScheduler使用
+        """
+        return await self.retry_policy.attempt(self._host, self._fetch_page, start, shard)
+
     async def request(self, start):
         """
-        异步请求网页，重试至多3次
+        异步请求网页, 按self.retry_policy重试(指数退避+抖动, 遵守Retry-After, 熔断, 全局重试预算)
         """
-        error = 0
-        max_retries = 3
         url = self.get_url(start)
-        while error < max_retries:
-            try:
-                # 使用timeout代替read_timeout，这是aiohttp 3.8+的推荐用法
-                timeout = aiohttp.ClientTimeout(total=10)
-                async with aiohttp.ClientSession(trust_env=True, timeout=timeout) as session:
-                    async with session.get(url, proxy=self.proxy) as response:
-                        response.raise_for_status()
-                        content = await response.text()
-                        return content
-            except Exception as e:
-                error += 1
-                self.console.log(f"[bold red]Request {start} cause error: {e}")
-                self.console.print_exception()
-                self.console.log(f"[bold red]Retrying {start}... {error}/{max_retries}")
-                # 等待一段时间后重试，避免过于频繁的请求
-                await asyncio.sleep(1)
-        
-        # 重试次数达到上限，返回None
-        self.console.log(f"[bold red]Failed to fetch {url} after {max_retries} retries")
+        try:
+            return await self.retry_policy.call(self._host, self._fetch_page, start)
+        except PageCacheMiss as e:
+            self.console.log(f"[bold red]{e}")
+        except Exception as e:
+            self.console.log(f"[bold red]Failed to fetch {url}: {describe_error(e)}")
         return None
 
-    async def fetch_all(self):
+    async def fetch_all(self, streaming: bool | None = None):
         """
         (aio)获取所有文章
+
+        Args:
+            streaming (bool, optional): 是否使用流式模式(边爬边写库, 内存有界). Defaults to 环境变量STREAMING_CRAWL或False.
+        """
+        if streaming is None:
+            streaming = env_bool("STREAMING_CRAWL", False)
+        self.metrics = CrawlMetrics("fetch_all")
+        try:
+            if self.source == "oai":
+                await self._fetch_all_oai()
+            elif env_bool("QUERY_SHARDING", False):
+                await self._fetch_all_sharded()
+            else:
+                await self._fetch_all(streaming)
+        finally:
+            await self.close()
+
+    async def _fetch_all_sharded(self):
+        """
+        分片全量爬取: 把查询拆成关键词分组 × 日期窗口的分片(见query_planner), 所有分片的页面由同一个调度器并发请求。
+
+        先请求每个分片的第一页拿到结果数, 超过SEARCH_RESULT_CAP的分片会被继续拆分后重新探测,
+        保证每个分片都能完整翻页; 最后按id去重合并, 顺序与单个大查询一致。
+        搜索的公布日期只精确到月, 与fetch_range一样, 分片按这几个月的公布日对应的首次提交日期窗口划分
+        """
+        self.pinned_announced_date = None
+        planner = QueryPlanner.from_env()
+        # 月初第一个公布日的文章算作上个月(见__init__), 因此区间截止于search_until_date当天或之后的第一个公布日
+        window = self.submission_window(
+            self.first_announced_date, ARXIV_CALENDAR.next_announcement_day(self.search_until_date)
+        )
+        if window is None:
+            self.console.log("[bold yellow]No announcements in the search range.")
+            return
+        submitted_from, submitted_until = window
+        shards = planner.plan(
+            self.optional_keywords, submitted_from, submitted_until + timedelta(days=1), "submitted_date_first"
+        )
+        self.console.log(f"[bold green]Planned {len(shards)} query shards, result cap {planner.result_cap}")
+
+        async def fetch(key):
+            index, start = key
+            return await self._guarded_fetch(start, shards[index])
+
+        scheduler = PageScheduler.from_env(
+            fetch,
+            console=self.console,
+            on_dispatch=lambda key, wait: self._record_queue_wait(self._page_key(key[1], shards[key[0]]), wait),
+        )
+        totals: dict[int, int] = {}
+        pages: dict[int, dict[int, list[Paper]]] = {}
+        failed_keys = []
+
+        with ParsePool.from_env(self.html_parser) as parse_pool:
+            # 探测阶段: 超过上限的分片拆分后再探测, 直到所有分片都在上限以内
+            pending = list(range(len(shards)))
+            while pending:
+                probes: dict[int, tuple[int | None, list[Paper]]] = {}
+
+                async def on_probe(key, content):
+                    probes[key[0]] = await self._parse_page(parse_pool, self._page_key(0, shards[key[0]]), content)
+
+                failed_keys += await scheduler.run([(index, 0) for index in pending], on_probe)
+                pending = []
+                for index, (total, papers) in sorted(probes.items()):
+                    if total is None:
+                        self.console.log(f"[bold red]Cannot find the number of results for shard {shards[index].label}")
+                        failed_keys.append((index, 0))
+                        continue
+                    if total > planner.result_cap:
+                        children = shards[index].split()
+                        if children:
+                            self.console.log(
+                                f"[bold yellow]Shard {shards[index].label} has {total} results, "
+                                f"splitting into {len(children)}"
+                            )
+                            pending += range(len(shards), len(shards) + len(children))
+                            shards.extend(children)
+                            continue
+                        self.console.log(
+                            f"[bold red]Shard {shards[index].label} has {total} results and cannot be split, "
+                            f"only the first {planner.result_cap} will be fetched"
+                        )
+                    totals[index] = min(total, planner.result_cap)
+                    pages[index] = {0: papers}
+
+            self.total = sum(totals.values())
+            self.console.log(f"[bold green]{len(totals)} shards, {self.total} results in total")
+            with Progress(
+                SpinnerColumn(),
+                *Progress.get_default_columns(),
+                TimeElapsedColumn(),
+                console=self.console,
+                transient=False,
+            ) as p:
+                task = p.add_task(description=f"[bold green]Fetching {self.total} results", total=self.total)
+                p.update(task, advance=self.step * len(pages))
+
+                async def on_page(key, content):
+                    index, start = key
+                    _, pages[index][start] = await self._parse_page(parse_pool, self._page_key(start, shards[index]), content)
+                    p.update(task, advance=self.step)
+
+                keys = [(index, start) for index, total in totals.items() for start in range(self.step, total, self.step)]
+                failed_keys += await scheduler.run(keys, on_page)
+
+        if failed_keys:
+            failed = [f"{shards[index].label} start={start}" for index, start in sorted(failed_keys)]
+            self.console.log(f"[bold red]{len(failed)} pages could not be fetched: {failed}")
+        results = [
+            (shards[index], list(chain.from_iterable(shard_pages[start] for start in sorted(shard_pages))))
+            for index, shard_pages in pages.items()
+        ]
+        self.papers = merge_shard_results(results)
+        self.console.log(
+            f"[bold green]Fetching completed. {sum(len(papers) for _, papers in results)} results, "
+            f"{len(self.papers)} papers after dedup."
+        )
+        if not self.papers:
+            return
+        self.process_papers()
+        if self.translate_on_crawl:
+            await self.translate()
+
+    async def _fetch_all_oai(self):
+        """
+        通过OAI-PMH获取搜索区间内的所有文章, 在本地按关键词和公布日期过滤, 结果与搜索页的fetch_all一致。
+
+        OAI按datestamp(最后修改日期)筛选, datestamp不早于首次提交日期, 因此从区间开始前7天取起(覆盖上月末提交、本月公布的文章),
+        截止到区间结束后OAI_UNTIL_DAYS天: 在那之后才被修改过的文章datestamp已经改变, 会被漏掉(见OaiHarvester.harvest_until)。
+        整个区间只收割一次, 再用首次提交日期估计公布日期, 只保留落在[search_from_date, search_until_date)内的文章。
         """
+        self.pinned_announced_date = None
+        harvester = OaiHarvester.from_env(retry_policy=self.retry_policy)
+        harvest_from = self.search_from_date - timedelta(days=7)
+        harvest_until = harvester.harvest_until(self.search_until_date)
+        self.console.log(
+            f"[bold green]Harvesting {harvester.base_url} set={harvester.set_spec} "
+            f"from {harvest_from.strftime('%Y-%m-%d')} until {harvest_until.strftime('%Y-%m-%d') if harvest_until else 'now'}, "
+            f"keeping papers announced before {self.search_until_date.strftime('%Y-%m-%d')}"
+        )
+        harvested = 0
+        papers: dict[str, Paper] = {}
+        async with aclosing(harvester.harvest(self._get_session(), harvest_from, harvest_until, self.proxy)) as pages:
+            async for page in pages:
+                harvested += len(page)
+                for paper in page:
+                    announced_date = ARXIV_CALENDAR.announcement_day_for_submission(paper.first_submitted_date)
+                    if not self.search_from_date <= announced_date < self.search_until_date:
+                        continue
+                    if match_keywords(paper, self.optional_keywords):
+                        papers[paper.url] = paper
+                self.console.log(f"[bold green]Harvested {harvested} records, {len(papers)} matched")
+
+        # 与搜索结果一样按公布日期降序排列, 同一天内按编号降序
+        self.papers = sorted(papers.values(), key=lambda paper: (paper.first_submitted_date, paper.id), reverse=True)
+        self.total = len(self.papers)
+        self.console.log(
+            f"[bold green]Harvesting completed. {harvester.requests} requests, "
+            f"{harvested} records ({harvester.deleted} deleted), {self.total} papers kept."
+        )
+        if not self.papers:
+            return
+        self.process_papers()
+        if self.translate_on_crawl:
+            await self.translate()
+
+    async def _fetch_all(self, streaming: bool = False):
         self.pinned_announced_date = None
         # 获取前50篇文章并记录总数
         self.console.log(f"[bold green]Fetching the first {self.step} papers...")
@@ -170,13 +496,25 @@ class ArxivScraper(object):
             self.console.log(f"[bold red]Failed to fetch the first page, skipping fetch_all...")
             return
         
-        self.papers.extend(self.parse_search_html(content))
+        first_papers = self.parse_search_html(content, key=0)
 
         # 如果self.total为None，说明没有获取到文章总数，直接返回
         if self.total is None or self.total == 0:
             self.console.log(f"[bold yellow]No papers to fetch, skipping fetch_all...")
             return
 
+        # 上次未完成的爬取留下的检查点, 只有查询和结果总数都一致时才会恢复
+        checkpoint = CrawlCheckpoint.from_env(self.get_url(0))
+        if checkpoint is not None and checkpoint.open(self.total):
+            self.console.log(
+                f"[bold yellow]Resuming from checkpoint {checkpoint.path}: "
+                f"{len(checkpoint.pages)} pages parsed, {len(checkpoint.committed)} pages saved"
+            )
+
+        if streaming:
+            await self._fetch_all_streaming(first_papers, checkpoint)
+            return
+
         # 获取剩余的内容
         with Progress(
             SpinnerColumn(),
@@ -189,32 +527,113 @@ class ArxivScraper(object):
                 description=f"[bold green]Fetching {self.total} results",
                 total=self.total,
             )
-            p.update(task, advance=self.step)
+            pages: dict[int, list[Paper]] = {0: first_papers}
+            if checkpoint is not None:
+                pages.update(checkpoint.pages)
+            p.update(task, advance=self.step * len(pages))
+            parse_pool = ParsePool.from_env(self.html_parser)
 
-            async def wrapper(start):  # wrapper用于显示进度
-                # 异步请求网页，并解析其中的内容
-                content = await self.request(start)
-                papers = self.parse_search_html(content)
+            async def on_page(start, content):
+                # 解析在进程池中进行, 期间事件循环继续读取其他页面; 页面完成顺序不定, 最后按start排序拼接
+                _, pages[start] = await self._parse_page(parse_pool, start, content)
+                if checkpoint is not None:
+                    checkpoint.add_page(start, pages[start])
                 p.update(task, advance=self.step)
-                return papers
-
-            # 创建异步任务
-            fetch_tasks = []
-            for start in range(self.step, self.total, self.step):
-                fetch_tasks.append(wrapper(start))
-            
-            # 如果没有任务，直接返回
-            if not fetch_tasks:
-                self.console.log(f"[bold yellow]No more papers to fetch...")
-                return
-            
-            papers_list = await asyncio.gather(*fetch_tasks)
-            self.papers.extend(chain(*papers_list))
+
+            starts = [start for start in range(self.step, self.total, self.step) if start not in pages]
+            failed_starts = []
+            if starts:
+                scheduler = PageScheduler.from_env(self._guarded_fetch, console=self.console, on_dispatch=self._record_queue_wait)
+                with parse_pool:
+                    failed_starts = await scheduler.run(starts, on_page)
+            for start in sorted(pages):
+                self.papers.extend(pages[start])
+
+        if failed_starts:
+            self.console.log(f"[bold red]{len(failed_starts)} pages could not be fetched: {failed_starts}")
+            if checkpoint is not None:
+                # 缺页会让公布日期的推断出现断档, 先不写库, 重新运行时只请求缺失的页面
+                raise IncompleteCrawlError(
+                    f"{len(failed_starts)} pages missing, progress saved to {checkpoint.path}"
+                )
 
         self.console.log(f"[bold green]Fetching completed. ")
-        if self.trans_to:
-            await self.translate()
         self.process_papers()
+        if self.translate_on_crawl:
+            await self.translate()
+        if checkpoint is not None:
+            checkpoint.remove()
+
+    async def _fetch_all_streaming(self, first_papers: list[Paper], checkpoint: CrawlCheckpoint | None = None):
+        """
+        流式全量爬取: 每个窗口(STREAM_WINDOW页)解析后立即推断公布日期、翻译并写库, 内存中只保留一个窗口的文章。
+
+        公布日期的推断需要从最旧的文章向最新的文章累积(见process_papers), 而结果按公布日期降序排列,
+        因此窗口从最后一页向第一页推进, 并在窗口之间传递累积的公布日期, 结果与一次性处理完全相同。
+        有检查点时, 已写库的窗口和累积的公布日期会被记录下来; 某个窗口缺页时停止推进, 重新运行时从该窗口继续。
+        """
+        window_size = max(1, env_int("STREAM_WINDOW", 8))
+        starts = list(range(0, self.total, self.step))[::-1]
+        announced_date = ARXIV_CALENDAR.next_announcement_day(self.first_announced_date)
+        if checkpoint is not None and checkpoint.announced_date is not None:
+            announced_date = checkpoint.announced_date
+        self.console.log(
+            f"[bold green]Streaming {self.total} results in windows of {window_size} pages, "
+            f"first announced date: {announced_date.strftime('%Y-%m-%d')}"
+        )
+        scheduler = PageScheduler.from_env(self._guarded_fetch, console=self.console, on_dispatch=self._record_queue_wait)
+        saved = 0
+        failed_starts = []
+
+        with Progress(
+            SpinnerColumn(),
+            *Progress.get_default_columns(),
+            TimeElapsedColumn(),
+            console=self.console,
+            transient=False,
+        ) as p, ParsePool.from_env(self.html_parser) as parse_pool:
+            task = p.add_task(description=f"[bold green]Streaming {self.total} results", total=self.total)
+            for i in range(0, len(starts), window_size):
+                window = starts[i : i + window_size]
+                if checkpoint is not None and checkpoint.committed.issuperset(window):
+                    p.update(task, advance=self.step * len(window))
+                    continue
+                # 第0页在探测总数时已经解析过
+                pages: dict[int, list[Paper]] = {0: first_papers} if 0 in window else {}
+                if checkpoint is not None:
+                    pages.update((start, checkpoint.pages[start]) for start in window if start in checkpoint.pages)
+                p.update(task, advance=self.step * len(pages))
+
+                async def on_page(start, content):
+                    _, pages[start] = await self._parse_page(parse_pool, start, content)
+                    if checkpoint is not None:
+                        checkpoint.add_page(start, pages[start])
+                    p.update(task, advance=self.step)
+
+                window_failed = await scheduler.run([start for start in window if start not in pages], on_page)
+                failed_starts += window_failed
+                if window_failed and checkpoint is not None:
+                    break
+                window_papers = list(chain.from_iterable(pages[start] for start in sorted(pages)))
+                announced_date = self._infer_announced_dates(window_papers, announced_date)
+                with self.metrics.phase("db"):
+                    self.paper_db.add_papers(window_papers)
+                if self.translate_on_crawl:
+                    await self.translate(window_papers)
+                if checkpoint is not None:
+                    checkpoint.commit_window(window, announced_date)
+                saved += len(window_papers)
+                p.update(task, description=f"[bold green]Streaming {self.total} results, {saved} saved")
+
+        if failed_starts:
+            self.console.log(f"[bold red]{len(failed_starts)} pages could not be fetched: {sorted(failed_starts)}")
+            if checkpoint is not None:
+                raise IncompleteCrawlError(
+                    f"{len(failed_starts)} pages missing, {saved} papers saved, progress saved to {checkpoint.path}"
+                )
+        self.console.log(f"[bold green]Streaming completed. {saved} papers saved.")
+        if checkpoint is not None:
+            checkpoint.remove()
 
     def fetch_update(self, force_target_date: bool = False):
         """
@@ -224,13 +643,24 @@ class ArxivScraper(object):
         Args:
             force_target_date: 为 True 时，强制从 target_date 开始补抓，忽略数据库已最新的短路逻辑。
         """
+        asyncio.run(self._fetch_update(force_target_date))
+
+    async def _fetch_update(self, force_target_date: bool = False):
+        # 探测、翻页和翻译都在同一个事件循环里完成，从而复用同一个连接池
+        self.metrics = CrawlMetrics("fetch_update")
+        try:
+            await self._fetch_update_pages(force_target_date)
+        finally:
+            await self.close()
+
+    async def _fetch_update_pages(self, force_target_date: bool = False):
         self.pinned_announced_date = None
         # 当前时间
         utc_now = datetime.now(UTC).replace(tzinfo=None)
         # 上一次更新最新文章的UTC时间. 除了更新新文章外也可能重新爬取了老文章, 数据库只看最新文章的时间戳。
         last_update = self.paper_db.newest_update_time()
         # 检查一下上次之后的最近一个arxiv更新日期
-        self.search_from_date = next_arxiv_update_day(last_update)
+        self.search_from_date = ARXIV_CALENDAR.next_announcement_day(last_update)
         self.console.log(f"[bold yellow]last update: {last_update.strftime('%Y-%m-%d %H:%M:%S')}, "
                          f"next arxiv update: {self.search_from_date.strftime('%Y-%m-%d')}" 
                          )
@@ -268,7 +698,7 @@ class ArxivScraper(object):
         # 如果这一次的更新时间恰好是这个月的第一个更新日，那么当日更新的文章都会出现在上个月的搜索结果中
         # 为了正确获得这天的文章，我们上推一个月的搜索时间
         self.first_announced_date = self.search_from_date
-        if self.search_from_date == next_arxiv_update_day(self.search_from_date.replace(day=1)):
+        if self.search_from_date == ARXIV_CALENDAR.next_announcement_day(self.search_from_date.replace(day=1)):
             self.search_from_date = self.search_from_date - timedelta(days=31)
             self.console.log(f"[bold yellow]The update in {self.first_announced_date.strftime('%Y-%m-%d')} can only be found in the previous month.")
         else:
@@ -276,33 +706,132 @@ class ArxivScraper(object):
                 f"[bold green]Searching from {self.search_from_date.strftime('%Y-%m-%d')} "
                 f"to {self.search_until_date.strftime('%Y-%m-%d')}, fetch the first {self.step} papers..."
             )
+        prefetched = {}
         if self.total is None:
             # 先探测第一页拿到 total。此前这里只在 resume 模式下执行，
             # 导致普通强制补抓时 self.total 仍为 None，后续 start_points 为空。
             self.console.log(f"[bold yellow]Initial probe: {self.get_url(0)}")
-            probe_content = asyncio.run(self.request(0))
+            probe_content = await self.request(0)
             if probe_content is None:
                 self.console.log("[bold red]Initial probe failed, cannot determine total results.")
                 return
-            self.parse_search_html(probe_content)
+            self.parse_search_html(probe_content, key=0)
+            # 探测页就是第0页，直接复用，不再重复请求
+            prefetched[0] = probe_content
 
         self.console.print(f"[grey] {self.get_url(0)}")
 
         start_points = list(range(0, self.total, self.step)) if self.total is not None else []
-        continue_update = True
-        for start in start_points:
-            continue_update = self.update(
-                start,
-                stop_on_existing=not force_target_date,
-                target_date_filter=self.target_date if force_target_date else None,
-            )
-            if not continue_update:
-                break
+        # 边处理边预取后面的页，一旦判断无需继续就取消尚未完成的预取
+        async with aclosing(self._prefetch_pages(start_points, prefetched)) as pages:
+            async for start, content in pages:
+                continue_update = self._update_with_content(
+                    start,
+                    content,
+                    stop_on_existing=not force_target_date,
+                    target_date_filter=self.target_date if force_target_date else None,
+                )
+                if not continue_update:
+                    break
 
         self.console.log(f"[bold green]Fetching completed. {len(self.papers)} new papers.")
-        if self.trans_to:
-            asyncio.run(self.translate())
         self.process_papers()
+        if self.translate_on_crawl:
+            await self.translate()
+
+    def fetch_range(self) -> dict[str, list[Paper]]:
+        """
+        一次爬取[date_from, date_until]内每一天公布的文章(按公布日期, 含两端), 适合停机几天后补齐,
+        而不是对每一天各爬一次同一个月的窗口。已有的文章会被覆盖写入
+
+        Returns:
+            dict[str, list[Paper]]: 按公布日期("%Y-%m-%d")分组的文章, 区间内没有文章的日期不出现
+
+        Raises:
+            RuntimeError: 探测请求或任何一页在重试后仍失败; 此时不写库, 调用方可以重试整个区间
+        """
+        return asyncio.run(self.fetch_range_async())
+
+    async def fetch_range_async(self) -> dict[str, list[Paper]]:
+        """
+        (aio)fetch_range, 多个爬虫可以在同一个事件循环里并发爬取不同的区间(见data_all)
+        """
+        self.metrics = CrawlMetrics("fetch_range")
+        try:
+            return await self._fetch_range_pages()
+        finally:
+            self.search_window = None
+            await self.close()
+
+    def submission_window(self, first_day: datetime, last_day: datetime) -> tuple[datetime, datetime] | None:
+        """
+        公布日期在[first_day, last_day]内的文章对应的首次提交日期区间(含两端, 精确到天), 区间内没有公布日时返回None。
+        提交日s的文章最早在s+1日之后的第一个公布日公布, 见ArxivCalendar.announcement_day_for_submission
+        """
+        last_announcement = ARXIV_CALENDAR.previous_day(last_day.date())
+        if last_announcement < first_day.date():
+            return None
+        submitted_from = ARXIV_CALENDAR.previous_day(first_day.date() - timedelta(days=1))
+        submitted_until = last_announcement - timedelta(days=1)
+        return datetime.combine(submitted_from, datetime.min.time()), datetime.combine(submitted_until, datetime.min.time())
+
+    async def _fetch_range_pages(self) -> dict[str, list[Paper]]:
+        first_day, last_day = self.target_date, self.target_until_date
+        if first_day > last_day:
+            raise ValueError(f"date_from must not be later than date_until: {first_day.date()} > {last_day.date()}")
+        self.pinned_announced_date = None
+        self.papers = []
+        self.total = None
+        window = self.submission_window(first_day, last_day)
+        if window is None:
+            self.console.log(
+                f"[bold yellow]No announcements between {first_day.strftime('%Y-%m-%d')} and {last_day.strftime('%Y-%m-%d')}."
+            )
+            return {}
+        # 搜索的公布日期只精确到月, 提交日期可以精确到天: 用区间对应的提交日期窗口搜索, 请求数只与区间内的文章数有关
+        submitted_from, submitted_until = window
+        self.search_window = QueryShard(
+            tuple(self.optional_keywords), submitted_from, submitted_until + timedelta(days=1), "submitted_date_first"
+        )
+        self.console.log(
+            f"[bold green]Fetching papers announced {first_day.strftime('%Y-%m-%d')} ~ {last_day.strftime('%Y-%m-%d')}, "
+            f"submitted {submitted_from.strftime('%Y-%m-%d')} ~ {submitted_until.strftime('%Y-%m-%d')}"
+        )
+        self.console.print(f"[grey] {self.get_url(0)}")
+        probe_content = await self.request(0)
+        if probe_content is None:
+            raise RuntimeError("Initial probe failed, cannot determine total results.")
+        self.parse_search_html(probe_content, key=0)
+
+        start_points = list(range(0, self.total, self.step))
+        async with aclosing(self._prefetch_pages(start_points, {0: probe_content})) as pages:
+            async for start, content in pages:
+                # 缺页会让区间内的部分日期没有数据, 整个区间都不写库, 由调用方重试
+                if content is None:
+                    raise RuntimeError(f"Failed to fetch page start={start}, nothing written for this range.")
+                if not self._update_with_content(
+                    start, content, stop_on_existing=False, target_date_filter=(first_day, last_day)
+                ):
+                    break
+
+        self.console.log(f"[bold green]Fetching completed. {len(self.papers)} papers in range.")
+        if not self.papers:
+            return {}
+        # 提交日期窗口之外的文章不会出现, 从first_day开始累积推断, 所有文章的公布日期都落在区间内
+        self._infer_announced_dates(self.papers, first_day)
+        with self.metrics.phase("db"):
+            self.paper_db.add_papers(self.papers)
+        if self.translate_on_crawl:
+            await self.translate()
+
+        papers_by_date: dict[str, list[Paper]] = {}
+        for paper in self.papers:
+            papers_by_date.setdefault(paper.first_announced_date.strftime("%Y-%m-%d"), []).append(paper)
+        self.console.log(
+            "[bold green]Papers by announced date: "
+            + ", ".join(f"{day} {len(papers)}" for day, papers in sorted(papers_by_date.items()))
+        )
+        return papers_by_date
 
     def process_papers(self):
         """
@@ -315,41 +844,202 @@ class ArxivScraper(object):
             )
             for paper in self.papers:
                 paper.first_announced_date = announced_date
-            self.paper_db.add_papers(self.papers)
+            with self.metrics.phase("db"):
+                self.paper_db.add_papers(self.papers)
             return
 
         # 从下一个可能的公布日期开始
-        announced_date = next_arxiv_update_day(self.first_announced_date)   
+        announced_date = ARXIV_CALENDAR.next_announcement_day(self.first_announced_date)   
         self.console.log(f"fisrt announced date: {announced_date.strftime('%Y-%m-%d')}")
-        # 按照从前到后的时间顺序梳理文章
-        for paper in reversed(self.papers):
-            # 文章于T日美东时间14:00(T UTC+0 18:00)前提交，将于T日美东时间20:00(T+1 UTC+0 00:00)公布，T始终为工作日。
-            # 因此可知美东 T日的文章至少在UTC+0 T+1日公布，如果超过14:00甚至会在UTC+0 T+2日公布
-            next_possible_annouced_date = next_arxiv_update_day(paper.first_submitted_date + timedelta(days=1))
-            if announced_date < next_possible_annouced_date:
-                announced_date = next_possible_annouced_date
-            paper.first_announced_date = announced_date
-        self.paper_db.add_papers(self.papers)
+        self._infer_announced_dates(self.papers, announced_date)
+        with self.metrics.phase("db"):
+            self.paper_db.add_papers(self.papers)
+
+    @staticmethod
+    def _infer_announced_dates(papers: list[Paper], announced_date: datetime) -> datetime:
+        """
+        按照从前到后的时间顺序梳理文章(papers按公布日期降序排列), 推断首次公布日期
+
+        Args:
+            papers (list[Paper]): 按公布日期降序排列的文章
+            announced_date (datetime): 比papers中所有文章都早的文章的公布日期, 作为累积起点
+
+        Returns:
+            datetime: 最新一篇文章的公布日期, 可作为下一批(更新的)文章的起点
+        """
+        if not papers:
+            return announced_date
+        # 文章于T日美东时间14:00(T UTC+0 18:00)前提交，将于T日美东时间20:00(T+1 UTC+0 00:00)公布，T始终为工作日。
+        # 因此可知美东 T日的文章至少在UTC+0 T+1日公布，如果超过14:00甚至会在UTC+0 T+2日公布
+        ordered = papers[::-1]
+        possible = ARXIV_CALENDAR.announcement_days_for_submissions([paper.first_submitted_date for paper in ordered])
+        # 公布日期不会早于之前(更早公布)的文章, 即从起点开始的累积最大值
+        announced = np.maximum.accumulate(np.maximum(possible, np.datetime64(announced_date, "D")))
+        for paper, day in zip(ordered, announced.tolist()):
+            paper.first_announced_date = datetime.combine(day, datetime.min.time())
+        return ordered[-1].first_announced_date
     
-    def reprocess_papers(self):
+    def reprocess_papers(
+        self, dry_run: bool = False, batch_size: int | None = None, report_path: str | None = "announced_date.csv"
+    ) -> tuple[int, int]:
         """
-        这会从数据库中获取所有文章, 并重新推断文章的首次公布日期，并打印调试信息
+        流式地为数据库中的所有文章重新推断首次公布日期: 从旧到新分批读取(见PaperDatabase.iter_announcement_batches),
+        推断规则与process_papers相同, 只对日期确实变化的行批量执行UPDATE, 不重写其他列和update_time
+
+        Args:
+            dry_run (bool, optional): 只生成差异报告, 不修改数据库. Defaults to False.
+            batch_size (int | None, optional): 每批读取的行数, None时读取REPROCESS_BATCH_SIZE(默认5000). Defaults to None.
+            report_path (str | None, optional): 差异报告CSV路径(只包含变化的行), None表示不生成. Defaults to "announced_date.csv".
+
+        Returns:
+            tuple[int, int]: (扫描的文章数, 公布日期变化的文章数)
         """
-        self.papers = self.paper_db.fetch_all()
-        self.process_papers()
-        with open("announced_date.csv", "w") as f:
-            f.write("url,title,announced_date,submitted_date\n")
-            for paper in self.papers:
-                f.write(
-                    f"{paper.url},{paper.title},{paper.first_announced_date.strftime('%Y-%m-%d')},{paper.first_submitted_date.strftime('%Y-%m-%d')}\n"
-                )
+        batch_size = batch_size or env_int("REPROCESS_BATCH_SIZE", 5000)
+        if self.pinned_announced_date is not None:
+            pinned = np.datetime64(self.pinned_announced_date, "D")
+            announced = None
+        else:
+            pinned = None
+            # 从下一个可能的公布日期开始, 与process_papers相同
+            announced = np.datetime64(ARXIV_CALENDAR.next_announcement_day(self.first_announced_date), "D")
+        total = self.paper_db.conn.execute("SELECT COUNT(*) AS count FROM papers").fetchone()["count"]
+        scanned = changed = 0
+        report = open(report_path, "w", newline="", encoding="utf-8") if report_path else None
+        try:
+            writer = csv.writer(report) if report else None
+            if writer:
+                writer.writerow(["url", "title", "old_announced_date", "new_announced_date", "submitted_date"])
+            with Progress(
+                SpinnerColumn(),
+                *Progress.get_default_columns(),
+                TimeElapsedColumn(),
+                console=self.console,
+                transient=False,
+            ) as p:
+                task = p.add_task("Reprocessing", total=total)
+                for rows in self.paper_db.iter_announcement_batches(batch_size):
+                    submitted = [row["first_submitted_date"][:10] for row in rows]
+                    if pinned is not None:
+                        new_dates = np.full(len(rows), pinned)
+                    else:
+                        # 累积最大值, 上一批的最后一个公布日期作为这一批的起点
+                        possible = ARXIV_CALENDAR.announcement_days_for_submissions(submitted)
+                        new_dates = np.maximum.accumulate(np.maximum(possible, announced))
+                        announced = new_dates[-1]
+                    changes = []
+                    for row, submitted_date, new_date in zip(rows, submitted, np.datetime_as_string(new_dates)):
+                        old_date = (row["first_announced_date"] or "")[:10]
+                        if old_date != new_date:
+                            changes.append((row["url"], str(new_date)))
+                            if writer:
+                                writer.writerow([row["url"], row["paper_title"], old_date, new_date, submitted_date])
+                    if changes and not dry_run:
+                        self.paper_db.update_announced_dates(changes)
+                    scanned += len(rows)
+                    changed += len(changes)
+                    p.update(task, advance=len(rows), description=f"Reprocessing ({changed} changed)")
+        finally:
+            if report:
+                report.close()
+        self.console.log(
+            f"[bold green]Reprocessed {scanned} papers, {changed} announced dates "
+            + ("would change (dry run)" if dry_run else "updated")
+            + (f", diff written to {report_path}" if report_path else "")
+        )
+        return scanned, changed
+
+    async def _prefetch_pages(self, start_points, prefetched=None):
+        """
+        按顺序产出(start, content), 同时保持至多UPDATE_PREFETCH个后续页面在途。
+        生成器被关闭时(调用方提前停止)会取消所有未完成的预取
+
+        Args:
+            start_points (list[int]): 按顺序请求的start列表
+            prefetched (dict[int, str], optional): 已经请求过的页面内容, 不会再次请求
+        """
+        depth = max(1, env_int("UPDATE_PREFETCH", 3))
+        prefetched = prefetched or {}
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        remaining = iter(start_points)
+
+        def fill():
+            while len(pending) < depth:
+                start = next(remaining, None)
+                if start is None:
+                    return
+                if start in prefetched:
+                    future = loop.create_future()
+                    future.set_result(prefetched.pop(start))
+                else:
+                    future = asyncio.ensure_future(self.request(start))
+                pending.append((start, future))
 
-    def update(self, start, stop_on_existing: bool = True, target_date_filter: datetime | None = None) -> bool:
-        content = asyncio.run(self.request(start))
+        try:
+            fill()
+            while pending:
+                start, future = pending.popleft()
+                fill()
+                content = await future
+                yield start, content
+        finally:
+            for _, future in pending:
+                future.cancel()
+            await asyncio.gather(*(future for _, future in pending), return_exceptions=True)
+            if pending:
+                self.console.log(f"[bold yellow]Cancelled {len(pending)} outstanding prefetches.")
+
+    def update(
+        self,
+        start,
+        stop_on_existing: bool = True,
+        target_date_filter: datetime | tuple[datetime, datetime] | None = None,
+    ) -> bool:
+        """
+        请求并处理增量更新的一页, 返回是否继续翻页。同步接口, 已经在事件循环中时请使用update_async
+        """
+
+        async def run():
+            try:
+                return await self.update_async(start, stop_on_existing, target_date_filter)
+            finally:
+                # 会话与事件循环绑定, asyncio.run结束前关闭
+                await self.close()
+
+        return asyncio.run(run())
+
+    async def update_async(
+        self,
+        start,
+        stop_on_existing: bool = True,
+        target_date_filter: datetime | tuple[datetime, datetime] | None = None,
+    ) -> bool:
+        """(aio)update"""
+        content = await self.request(start)
+        return self._update_with_content(start, content, stop_on_existing, target_date_filter)
+
+    def _update_with_content(
+        self,
+        start,
+        content,
+        stop_on_existing: bool = True,
+        target_date_filter: datetime | tuple[datetime, datetime] | None = None,
+    ) -> bool:
+        """
+        处理增量更新的一个页面, 返回是否继续翻页
+
+        Args:
+            target_date_filter (datetime | tuple[datetime, datetime] | None, optional): 只保留推断公布日期等于该日期
+                (或落在[开始, 结束]日期区间内)的文章, 遇到更早的文章时停止翻页. Defaults to None.
+        """
         if content is None:
             self.console.log(f"[bold red]Failed to fetch content for start={start}, skipping...")
             return False
-        raw_page_papers = self.parse_search_html(content)
+        if self.lazy_parse and stop_on_existing and target_date_filter is None and self.total:
+            continue_update = self._update_lazily(start, content)
+            if continue_update is not None:
+                return continue_update
+        raw_page_papers = self.parse_search_html(content, key=start)
         if not raw_page_papers:
             self.console.log(f"[bold yellow]No papers parsed for start={start}, stopping...")
             return False
@@ -357,15 +1047,18 @@ class ArxivScraper(object):
         page_papers = raw_page_papers
         reached_older_target_date = False
         if target_date_filter is not None:
-            target_day = target_date_filter.replace(hour=0, minute=0, second=0, microsecond=0)
+            if isinstance(target_date_filter, tuple):
+                first_day, last_day = target_date_filter
+            else:
+                first_day = last_day = target_date_filter
+            first_day = first_day.replace(hour=0, minute=0, second=0, microsecond=0)
+            last_day = last_day.replace(hour=0, minute=0, second=0, microsecond=0)
             filtered_page_papers = []
             for paper in raw_page_papers:
-                inferred_announced_date = next_arxiv_update_day(
-                    paper.first_submitted_date + timedelta(days=1)
-                )
-                if inferred_announced_date > target_day:
+                inferred_announced_date = ARXIV_CALENDAR.announcement_day_for_submission(paper.first_submitted_date)
+                if inferred_announced_date > last_day:
                     continue
-                if inferred_announced_date < target_day:
+                if inferred_announced_date < first_day:
                     reached_older_target_date = True
                     break
                 filtered_page_papers.append(paper)
@@ -382,7 +1075,7 @@ class ArxivScraper(object):
             if reached_older_target_date:
                 self.console.log(
                     f"[bold green]Reached papers older than target date "
-                    f"{target_date_filter.strftime('%Y-%m-%d')}, stopping pagination."
+                    f"{first_day.strftime('%Y-%m-%d')}, stopping pagination."
                 )
                 return False
             return len(raw_page_papers) == self.step
@@ -395,188 +1088,109 @@ class ArxivScraper(object):
         else:
             return True
 
-    def parse_search_html(self, content) -> list[Paper]:
+    def _update_lazily(self, start, content) -> bool | None:
         """
-        解析搜索结果页面, 并将结果保存到self.paper_result中
+        两阶段解析一个增量更新的页面: 先用正则取出所有结果的url并一次性查库,
+        再只完整解析第一篇已有文章之前的结果(之后的结果反正会被丢弃)。
+        整页都是已有文章时完全不需要构建DOM
+
+        Returns:
+            bool | None: 是否继续翻页; 无法用url预扫描处理这个页面时返回None, 调用方退回完整解析
+        """
+        begin = time.monotonic()
+        urls = scan_result_urls(content)
+        if not urls:
+            return None
+        known = self.paper_db.known_urls(urls)
+        cnt_new = next((i for i, url in enumerate(urls) if url in known), len(urls))
+        papers = parse_search_page(content, self.html_parser, limit=cnt_new)[1] if cnt_new else []
+        if [paper.url for paper in papers] != urls[:cnt_new]:
+            self.console.log(f"[bold yellow]Page start={start}: url prescan does not match the parser, parsing fully")
+            return None
+        metric = self.metrics.page(start)
+        metric.parse = time.monotonic() - begin
+        metric.papers = len(papers)
+
+        self.papers.extend(papers)
+        self.console.log(
+            f"[bold yellow]Page start={start}: results={len(urls)}, new={cnt_new}, "
+            f"parsed={len(papers)}, skipped={len(urls) - cnt_new}"
+        )
+        return cnt_new == len(urls)
+
+    def parse_search_html(self, content, key=None) -> list[Paper]:
+        """
+        解析搜索结果页面, 返回本页的文章, 具体解析逻辑见search_parser
         初次调用时, 会解析self.total
 
         Args:
             content (str): 网页内容
+            key (optional): 页面在指标中的标识(通常是start), 指定时记录解析耗时和文章数. Defaults to None.
         """
         if content is None:
             self.console.log(f"[bold red]Content is None, skipping parsing...")
             return []
 
-        """下面是一个搜索结果的例子
-        <li class="arxiv-result">
-            <div class="is-marginless">
-                <p class="list-title is-inline-block">
-                    <a href="https://arxiv.org/abs/physics/9403001">arXiv:physics/9403001</a>
-                    <span>&nbsp;[<a href="https://arxiv.org/pdf/physics/9403001">pdf</a>, <a
-                            href="https://arxiv.org/ps/physics/9403001">ps</a>, <a
-                            href="https://arxiv.org/format/physics/9403001">other</a>]&nbsp;</span>
-                </p>
-                <div class="tags is-inline-block">
-                    <span class="tag is-small is-link tooltip is-tooltip-top" data-tooltip="Popular Physics">
-                        physics.pop-ph</span>
-                    <span class="tag is-small is-grey tooltip is-tooltip-top"
-                        data-tooltip="High Energy Physics - Theory">hep-th</span>
-                </div>
-                <div class="is-inline-block" style="margin-left: 0.5rem">
-                    <div class="tags has-addons">
-                        <span class="tag is-dark is-size-7">doi</span>
-                        <span class="tag is-light is-size-7">
-                            <a class="" href="https://doi.org/10.1063/1.2814991">10.1063/1.2814991 <i
-                                    class="fa fa-external-link" aria-hidden="true"></i></a>
-                        </span>
-                    </div>
-                </div> 
-            </div>
-            <p class="title is-5 mathjax">
-                Desperately Seeking Superstrings
-            </p>
-            <p class="authors">
-                <span class="has-text-black-bis has-text-weight-semibold">Authors:</span>
-                    <a href="/search/?searchtype=author&amp;query=Ginsparg%2C+P">Paul Ginsparg</a>, <a href="/search/?searchtype=author&amp;query=Glashow%2C+S">Sheldon Glashow</a> 
-            </p> 
-            <p class="abstract mathjax">
-                <span class="has-text-black-bis has-text-weight-semibold">Abstract</span>: 
-                
-                <span class="abstract-short has-text-grey-dark mathjax" id="physics/9403001v1-abstract-short"
-                    style="display: inline;"> We provide a detailed analysis of the problems and prospects of superstring theory c.
-                1986, anticipating much of the progress of the decades to follow. </span>
-
-                <span class="abstract-full has-text-grey-dark mathjax" id="physics/9403001v1-abstract-full"
-                    style="display: none;"> We provide a detailed analysis of the problems and prospects of
-                superstring theory c. 1986, anticipating much of the progress of the decades to follow. 
-                <a class="is-size-7" style="white-space: nowrap;"
-                        onclick="document.getElementById('physics/9403001v1-abstract-full').style.display = 'none'; document.getElementById('physics/9403001v1-abstract-short').style.display = 'inline';">△ Less</a>
-                </span>
-            </p> 
-            <p class="is-size-7"><span class="has-text-black-bis has-text-weight-semibold">Submitted</span>
-                25 April, 1986; <span class="has-text-black-bis has-text-weight-semibold">originally
-                announced</span> March 1994. </p> 
-            <p class="comments is-size-7">
-                <span class="has-text-black-bis has-text-weight-semibold">Comments:</span>
-                <span class="has-text-grey-dark mathjax">originally appeared as a Reference Frame in Physics
-                    Today, May 1986</span>
-            </p> 
-            <p class="comments is-size-7">
-                <span class="has-text-black-bis has-text-weight-semibold">Journal ref:</span> Phys.Today
-                86N5 (1986) 7-9 </p> 
-        </li>
-        """
-
-        soup = BeautifulSoup(content, "html.parser")
+        begin = time.monotonic()
+        total, papers = parse_search_page(content, self.html_parser)
+        if key is not None:
+            metric = self.metrics.page(key)
+            metric.parse = time.monotonic() - begin
+            metric.papers = len(papers)
         if not self.total:
-            total = soup.select("#main-container > div.level.is-marginless > div.level-left > h1")[0].text
-            # "Showing 1–50 of 2,542,002 results" or "Sorry, your query returned no results"
-            if "Sorry" in total:
-                self.total = 0
-                return []
-            total = int(total[total.find("of") + 3 : total.find("results")].replace(",", ""))
+            if total is None:
+                raise ValueError("Cannot find the number of results in the search page")
             self.total = total
-
-        results = soup.find_all("li", {"class": "arxiv-result"})
-        papers = []
-        for result in results:
-
-            url_tag = result.find("a")
-            url = url_tag["href"] if url_tag else "No link"
-
-            title_tag = result.find("p", class_="title")
-            title = self.parse_search_text(title_tag) if title_tag else "No title"
-            title = title.strip()
-
-            date_tag = result.find("p", class_="is-size-7")
-            date = date_tag.get_text(strip=True) if date_tag else "No date"
-            if "v1" in date:
-                # Submitted9 August, 2024; v1submitted 8 August, 2024; originally announced August 2024.
-                # 注意空格会被吞掉，这里我们要找最早的提交日期
-                v1 = date.find("v1submitted")
-                date = date[v1 + 12 : date.find(";", v1)]
-            else:
-                # Submitted8 August, 2024; originally announced August 2024.
-                # 注意空格会被吞掉
-                submit_date = date.find("Submitted")
-                date = date[submit_date + 9 : date.find(";", submit_date)]
-
-            category_tag = result.find_all("span", class_="tag")
-            categories = [
-                category.get_text(strip=True) for category in category_tag if "tooltip" in category.get("class")
-            ]
-
-            authors_tag = result.find("p", class_="authors")
-            authors = authors_tag.get_text(strip=True)[len("Authors:") :] if authors_tag else "No authors"
-
-            summary_tag = result.find("span", class_="abstract-full")
-            abstract = self.parse_search_text(summary_tag) if summary_tag else "No summary"
-            abstract = abstract.strip()
-
-            comments_tag = result.find("p", class_="comments")
-            comments = comments_tag.get_text(strip=True)[len("Comments:") :] if comments_tag else "No comments"
-
-            papers.append(
-                Paper(
-                    url=url,
-                    title=title,
-                    first_submitted_date=datetime.strptime(date, "%d %B, %Y"),
-                    categories=categories,
-                    authors=authors,
-                    abstract=abstract,
-                    comments=comments,
-                )
-            )
         return papers
 
     def parse_search_text(self, tag):
         """
-        解析搜索结果中的文本内容，处理不同类型的标签
-        
-        Args:
-            tag (BeautifulSoup Tag): 要解析的HTML标签
-            
-        Returns:
-            str: 解析后的文本内容
-        """
-        string = ""
-        for child in tag.children:
-            if isinstance(child, NavigableString):
-                # 处理文本节点，移除多余空格
-                string += re.sub(r"\s+", " ", child)
-            elif isinstance(child, Tag):
-                # 处理搜索高亮标签
-                if child.name == "span" and "search-hit" in child.get("class", []):
-                    string += re.sub(r"\s+", " ", child.get_text(strip=False))
-                # 处理摘要展开/折叠链接
-                elif child.name == "a" and child.get("onclick") and ".style.display" in child.get("onclick"):
-                    pass
-                # 处理其他标签，递归获取文本
-                else:
-                    string += re.sub(r"\s+", " ", child.get_text(strip=False))
-        return string.strip()
+        解析搜索结果中的文本内容(bs4标签)，处理不同类型的标签
+        """
+        return bs4_search_text(tag)
 
-    async def translate(self):
+    async def translate(self, papers: list[Paper] | None = None):
+        """
+        翻译已入库的文章中通过分类过滤(白名单/黑名单, 与导出时相同)且缺少译文的标题和摘要,
+        被过滤掉的文章不会出现在导出结果中, 因此不翻译
+
+        Args:
+            papers (list[Paper], optional): 要翻译的文章, 必须已经写入数据库. Defaults to self.papers.
+        """
+        papers = self.papers if papers is None else papers
         if not self.trans_to:
             raise ValueError("No target language specified.")
-        self.console.log("[bold green]Translating...")
-
-        # 从环境变量获取翻译并发限制
-        trans_sem_value = os.environ.get("TRANSLATION_SEMAPHORE", "80")
-        translation_semaphore = int(trans_sem_value) if trans_sem_value else 80
-        # 限制并发数
-        semaphore = asyncio.Semaphore(translation_semaphore)
-
-        async def worker(paper):
-            async with semaphore:
-                try:
-                    await paper.translate(langto=self.trans_to)
-                except Exception as e:
-                    self.console.log(f"[bold red]Translation failed for {paper.url}: {e}")
-                finally:
-                    p.update(task, advance=1)
-                    await asyncio.sleep(0.5)  # 给服务器和代理喘息时间
+        with self.metrics.phase("translate"):
+            await self._translate(papers)
 
+    def translate_only(self):
+        """
+        不爬取, 只翻译数据库中[date_from, date_until]内公布的、通过分类过滤且缺少译文的文章
+        """
+        papers_by_date = self.paper_db.fetch_papers_in_range(self.target_date, self.target_until_date)
+        papers = list(chain.from_iterable(papers_by_date.values()))
+
+        async def run():
+            try:
+                await self.translate(papers)
+            finally:
+                await self.close()
+
+        asyncio.run(run())
+
+    async def _translate(self, papers: list[Paper]):
+        chosen_records, _ = self.paper_exporter.filter_papers(papers)
+        missing = self.paper_db.missing_translations(record.paper.url for record in chosen_records)
+        self.console.log(
+            f"[bold green]Translating {len(missing)} papers "
+            f"({len(chosen_records)} of {len(papers)} pass the category filter, the rest already translated)..."
+        )
+        if not missing:
+            return
+
+        # 所有文章的标题和摘要交给同一个翻译器: 先查翻译缓存, 未命中的按字符数打包成批量请求, 复用爬虫的连接池
+        translator = BatchTranslator(langto=self.trans_to, session=self._get_session())
+        texts = [text for _, title, abstract in missing for text in (title, abstract)]
         with Progress(
             SpinnerColumn(),
             *Progress.get_default_columns(),
@@ -584,13 +1198,31 @@ class ArxivScraper(object):
             console=self.console,
             transient=False,
         ) as p:
-            total = len(self.papers)
             task = p.add_task(
-                description=f"[bold green]Translating {total} papers",
-                total=total,
+                description=f"[bold green]Translating {len(missing)} papers",
+                total=len(texts),
             )
+            try:
+                results = await translator.translate_many(texts, on_progress=lambda n: p.update(task, advance=n))
+            finally:
+                await translator.close()
 
-            await asyncio.gather(*[worker(paper) for paper in self.papers])
+        translations = [(url, results[2 * i], results[2 * i + 1]) for i, (url, _, _) in enumerate(missing)]
+        self.paper_db.save_translations(translations)
+        by_url = {paper.url: paper for paper in papers}
+        for (url, title_source, abstract_source), (_, title, abstract) in zip(missing, translations):
+            paper = by_url[url]
+            paper.title_translated = paper.title_translated or title
+            paper.abstract_translated = paper.abstract_translated or abstract
+            if (title_source and title is None) or (abstract_source and abstract is None):
+                self.console.log(f"[bold red]Translation failed for {url}")
+        self.console.log(
+            f"[bold cyan]Translation: {translator.stats.summary()}"
+            + (f"; {translator.cache.summary()}" if translator.cache else "")
+        )
+        self.console.log(f"[bold cyan]Translation rate limit: {translator.limiter.summary()}")
+        if TRANSLATE_RETRY_POLICY.stats:
+            self.console.log(f"[bold cyan]Translation requests: {TRANSLATE_RETRY_POLICY.summary()}")
 
     def to_markdown(self, output_dir="./output_md", filename_format="%Y-%m-%d", meta=False):
         self.paper_exporter.to_markdown(output_dir, filename_format, self.meta_data if meta else None)
@@ -1,8 +1,21 @@
 import asyncio
+import os
+from collections import Counter
+from dataclasses import dataclass
+from urllib.parse import urlparse
 
 import aiohttp
 import requests
 
+from env_utils import env_int
+from http_pool import create_session
+from rate_limit import AdaptiveRateLimiter
+from retry_policy import RetryPolicy
+from translation_cache import TranslationCache
+
+# 所有翻译请求共用一个重试策略, 熔断状态和失败统计在整个进程内共享
+TRANSLATE_RETRY_POLICY = RetryPolicy.from_env()
+
 
 class TranslateTask:
     def __init__(self, raw, langfrom="en", langto="zh-CN", result=None, secret=None):
@@ -68,56 +81,60 @@ def TL(a):
     return str(a) + jd + str(int(a) ^ int(b))
 
 
-async def async_google_translate(data, url="https://translate.googleapis.com", proxy=None):
+async def _google_translate_once(data, url, proxy):
+    async with aiohttp.ClientSession(trust_env=True) as session:
+        async with session.get(
+            f"{url}/translate_a/single",
+            proxy=proxy,
+            params={
+                "client": "gtx",
+                "hl": "zh-CN",
+                "dt": [
+                    "at",
+                    "bd",
+                    "ex",
+                    "ld",
+                    "md",
+                    "qca",
+                    "rw",
+                    "rm",
+                    "ss",
+                    "t",
+                ],
+                "source": "bh",
+                "ssel": "0",
+                "tsel": "0",
+                "kc": "1",
+                "tk": TL(data.raw),
+                "q": data.raw,
+                "sl": data.langfrom,
+                "tl": data.langto,
+            },
+        ) as response:
+            response.raise_for_status()
+
+            result = ""
+            json_response = await response.json()
+            for item in json_response[0]:
+                if item and item[0]:
+                    result += item[0]
+
+            data.result = result
+
+
+async def async_google_translate(data, url="https://translate.googleapis.com", proxy=None, retry_policy=None):
     """
     参考zotero翻译插件的代码
     https://github.com/windingwind/zotero-pdf-translate/blob/main/src/modules/services/google.ts
+
+    失败时按retry_policy重试(默认为模块共享的TRANSLATE_RETRY_POLICY), 最终失败时data.result保持为None
     """
-    error = 0
-    while error <= 3:
-        try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
-                async with session.get(
-                    f"{data.secret if data.secret else url}/translate_a/single",
-                    proxy=proxy,
-                    params={
-                        "client": "gtx",
-                        "hl": "zh-CN",
-                        "dt": [
-                            "at",
-                            "bd",
-                            "ex",
-                            "ld",
-                            "md",
-                            "qca",
-                            "rw",
-                            "rm",
-                            "ss",
-                            "t",
-                        ],
-                        "source": "bh",
-                        "ssel": "0",
-                        "tsel": "0",
-                        "kc": "1",
-                        "tk": TL(data.raw),
-                        "q": data.raw,
-                        "sl": data.langfrom,
-                        "tl": data.langto,
-                    },
-                ) as response:
-                    response.raise_for_status()
-
-                    result = ""
-                    json_response = await response.json()
-                    for item in json_response[0]:
-                        if item and item[0]:
-                            result += item[0]
-
-                    data.result = result
-                return
-        except Exception as e:
-            error += 1
-            pass
+    policy = retry_policy or TRANSLATE_RETRY_POLICY
+    url = data.secret if data.secret else url
+    try:
+        await policy.call(urlparse(url).netloc, _google_translate_once, data, url, proxy)
+    except Exception:
+        pass
 
 
 async def async_translate(text, langto="zh-CN", proxy=None):
@@ -126,6 +143,170 @@ async def async_translate(text, langto="zh-CN", proxy=None):
     return task.result
 
 
+@dataclass
+class TranslatorStats:
+    segments: int = 0  # 请求翻译的非空文本数(去重前)
+    cache_hits: int = 0
+    requests: int = 0  # 实际发出的批量请求数
+    failed: int = 0  # 最终失败的文本数
+
+    def summary(self) -> str:
+        return (
+            f"{self.segments} segments, {self.cache_hits} from cache, "
+            f"{self.requests} batched requests, {self.failed} failed"
+        )
+
+
+class BatchTranslator:
+    """
+    批量翻译: 先查TranslationCache, 未命中的文本去重后按max_chars打包成尽量少的请求
+    (translate_a/t接口一次接受多个q), 所有请求复用同一个带连接池的会话
+
+    用法:
+        async with BatchTranslator(langto="zh-CN") as translator:
+            results = await translator.translate_many(texts)
+    """
+
+    def __init__(
+        self,
+        langfrom: str = "en",
+        langto: str = "zh-CN",
+        url: str | None = None,
+        proxy: str | None = None,
+        cache: TranslationCache | None = None,
+        session: aiohttp.ClientSession | None = None,
+        retry_policy: RetryPolicy | None = None,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_chars: int | None = None,
+        concurrency: int | None = None,
+    ):
+        """
+        Args:
+            url (str, optional): 翻译服务地址. Defaults to 环境变量TRANSLATE_BASE_URL或https://translate.googleapis.com.
+            cache (TranslationCache, optional): 翻译缓存. Defaults to TranslationCache.from_env().
+            session (aiohttp.ClientSession, optional): 外部传入的会话(如爬虫的共享会话), 不会被关闭.
+                Defaults to None, 即第一次请求时创建一个连接池会话.
+            retry_policy (RetryPolicy, optional): Defaults to 模块共享的TRANSLATE_RETRY_POLICY.
+            limiter (AdaptiveRateLimiter, optional): 每次请求(包括重试)前获取令牌, 根据结果自适应调整速率.
+                Defaults to AdaptiveRateLimiter.from_env(), 即TRANSLATE_RATE等环境变量.
+            max_chars (int, optional): 每个请求的原文总字符数上限. Defaults to 环境变量TRANSLATE_BATCH_CHARS或4500.
+            concurrency (int, optional): 同时在途的请求数上限, 请求速率由limiter决定. Defaults to 环境变量TRANSLATION_SEMAPHORE或80.
+        """
+        self.langfrom = langfrom
+        self.langto = langto
+        self.url = url or os.environ.get("TRANSLATE_BASE_URL", "").strip() or "https://translate.googleapis.com"
+        self.proxy = proxy
+        self._owns_cache = cache is None
+        self.cache = cache if cache is not None else TranslationCache.from_env()
+        self.retry_policy = retry_policy or TRANSLATE_RETRY_POLICY
+        self.limiter = limiter or AdaptiveRateLimiter.from_env()
+        self.max_chars = max_chars or env_int("TRANSLATE_BATCH_CHARS", 4500)
+        self.concurrency = concurrency or env_int("TRANSLATION_SEMAPHORE", 80)
+        self.stats = TranslatorStats()
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self) -> "BatchTranslator":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_cache and self.cache is not None:
+            self.cache.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_session()
+            self._owns_session = True
+        return self._session
+
+    def _pack(self, texts: list[str]) -> list[list[str]]:
+        """按字符数上限打包, 超过上限的单条文本单独成一个请求"""
+        batches, batch, size = [], [], 0
+        for text in texts:
+            if batch and size + len(text) > self.max_chars:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _request_batch(self, batch: list[str]) -> list[str]:
+        await self.limiter.acquire()
+        try:
+            results = await self._post_batch(batch)
+        except Exception as e:
+            self.limiter.on_failure(e)
+            raise
+        self.limiter.on_success()
+        return results
+
+    async def _post_batch(self, batch: list[str]) -> list[str]:
+        session = self._get_session()
+        async with session.post(
+            f"{self.url}/translate_a/t",
+            proxy=self.proxy,
+            params={"client": "gtx", "sl": self.langfrom, "tl": self.langto},
+            data=[("q", text) for text in batch],
+        ) as response:
+            response.raise_for_status()
+            json_response = await response.json(content_type=None)
+        # 单条时可能直接返回字符串; sl=auto时每项为[译文, 检测到的语言]
+        if isinstance(json_response, str):
+            json_response = [json_response]
+        results = [item if isinstance(item, str) else item[0] for item in json_response]
+        if len(results) != len(batch):
+            raise ValueError(f"Expected {len(batch)} translations, got {len(results)}")
+        return results
+
+    async def translate_many(self, texts: list[str | None], on_progress=None) -> list[str | None]:
+        """
+        翻译一组文本, 返回与输入一一对应的译文; 空文本和最终失败的文本对应None
+
+        Args:
+            texts (list[str | None]): 原文
+            on_progress (Callable[[int], None], optional): 每完成一批(包括缓存命中)时以完成的文本数调用
+        """
+        # 每个不同的文本在输入中出现的次数, 用于统计和进度
+        counts = Counter(text for text in texts if text)
+        self.stats.segments += sum(counts.values())
+        translated = self.cache.get_many(list(counts), self.langfrom, self.langto) if self.cache else {}
+        self.stats.cache_hits += sum(counts[text] for text in translated)
+        if on_progress is not None:
+            on_progress(len(texts) - sum(counts.values()) + sum(counts[text] for text in translated))
+
+        pending = [text for text in counts if text not in translated]
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        host = urlparse(self.url).netloc
+
+        async def worker(batch):
+            async with semaphore:
+                self.stats.requests += 1
+                try:
+                    results = await self.retry_policy.call(host, self._request_batch, batch)
+                except Exception:
+                    results = None
+            if results is None:
+                self.stats.failed += sum(counts[text] for text in batch)
+            else:
+                done = dict(zip(batch, results))
+                translated.update(done)
+                if self.cache:
+                    self.cache.put_many(done, self.langfrom, self.langto)
+            if on_progress is not None:
+                on_progress(sum(counts[text] for text in batch))
+
+        await asyncio.gather(*[worker(batch) for batch in self._pack(pending)])
+        return [translated.get(text) if text else None for text in texts]
+
+
 def google_translate(data, url="https://translate.googleapis.com", proxy=None):
     response = requests.get(
         f"{data.secret if data.secret else url}/translate_a/single",
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线端到端爬取基准测试
+
+在本地启动一个替身服务器, 提供与arxiv.org/search/advanced结构一致的结果页(合成页面或录制的页面缓存),
+以及基于同一个合成数据集的OAI-PMH ListRecords接口(/oai2, 支持resumptionToken、noRecordsMatch和503 + Retry-After),
+可以配置结果总数、延迟、抖动和错误注入。然后通过ARXIV_BASE_URL/OAI_BASE_URL让ArxivScraper.fetch_all/fetch_update
+请求这个服务器, 对不同的STEP、并发数和解析器组合分别统计 文章数/秒、耗时、峰值内存和请求数。
+fetch_all_oai模式使用CRAWL_SOURCE=oai; --compare-oai在同一个数据集上分别用搜索页和OAI全量爬取, 对比两者入库的文章。
+
+每个组合在独立的子进程中运行(临时目录、空数据库、独立的环境变量), 峰值内存互不影响。
+
+用法:
+    python arxiv_crawler/bench_crawl.py --total 2000 --latency 0.05 --jitter 0.02
+    python arxiv_crawler/bench_crawl.py --steps 50,200 --concurrency 2,8 --parsers bs4,lxml --modes fetch_all
+    python arxiv_crawler/bench_crawl.py --recorded ./page_cache --error-rate 0.05
+    python arxiv_crawler/bench_crawl.py --modes fetch_all_oai --oai-batch 500 --error-rate 0.1
+    python arxiv_crawler/bench_crawl.py --compare-oai
+"""
+
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sample_pages import render_list_records, render_search_page
+
+RESULT_MARKER = "BENCH_RESULT "
+
+
+class StandInServer:
+    """
+    在后台线程中运行的arXiv搜索页和OAI-PMH替身服务器
+
+    Args:
+        total (int): 合成页面的结果总数
+        latency (float): 每个响应的基础延迟(秒)
+        jitter (float): 延迟在[latency - jitter, latency + jitter]内均匀分布
+        error_rate (float): 以该概率返回error_status(OAI接口总是返回503, 即OAI-PMH的流量控制)
+        error_status (int): 注入的错误状态码
+        recorded (str | None): 页面缓存目录(见page_cache), 指定时按start返回录制的页面, 没有录制的start返回404
+        seed (int): 随机种子, 保证同样的配置注入同样的错误
+        newest (datetime | None): 合成数据集中最新一篇文章的提交日期, None表示sample_pages的默认值
+        days (int): 合成数据集的文章分布的天数
+        oai_batch (int): OAI每页的记录数
+    """
+
+    def __init__(
+        self,
+        total: int = 2000,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        recorded: str | None = None,
+        seed: int = 0,
+        newest: datetime | None = None,
+        days: int = 30,
+        oai_batch: int = 1000,
+    ):
+        self.total = total
+        self.newest = newest
+        self.days = days
+        self.oai_batch = oai_batch
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.recorded = self._load_recorded(recorded) if recorded else None
+        self.requests = 0
+        self.errors = 0
+        self.port = None
+        self._rng = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @staticmethod
+    def _load_recorded(cache_dir: str) -> dict[int, Path]:
+        """读取页面缓存的索引, 每个start取最近一次录制的内容"""
+        pages = {}
+        for index_path in Path(cache_dir, "index").glob("*.jsonl"):
+            lines = [line for line in index_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+            if not lines:
+                continue
+            entry = json.loads(lines[-1])
+            query = parse_qs(urlparse(entry["url"]).query)
+            start = int(query.get("start", ["0"])[0])
+            pages[start] = Path(cache_dir, "blobs", entry["sha256"][:2], f"{entry['sha256']}.html.gz")
+        return pages
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(self.seed)
+
+    async def _delay_or_error(self, status: int) -> web.Response | None:
+        """模拟延迟, 并按error_rate返回注入的错误响应"""
+        self.requests += 1
+        delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=status, headers={"Retry-After": "1"})
+        return None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        error = await self._delay_or_error(self.error_status)
+        if error is not None:
+            return error
+        start = int(request.query.get("start", 0))
+        if self.recorded is not None:
+            path = self.recorded.get(start)
+            if path is None:
+                return web.Response(status=404)
+            content = gzip.decompress(path.read_bytes()).decode("utf-8")
+        else:
+            step = int(request.query.get("size", 50))
+            content = render_search_page(start, self.total, step=step, newest=self.newest, days=self.days, seed=self.seed)
+        return web.Response(text=content, content_type="text/html")
+
+    async def _handle_oai(self, request: web.Request) -> web.Response:
+        error = await self._delay_or_error(503)
+        if error is not None:
+            return error
+        if request.query.get("verb") != "ListRecords":
+            return web.Response(status=400)
+        token = request.query.get("resumptionToken")
+        if token:
+            cursor, date_from, date_until = token.split("|")
+        else:
+            cursor, date_from, date_until = 0, request.query.get("from", ""), request.query.get("until", "")
+        content = render_list_records(
+            int(cursor),
+            self.total,
+            batch=self.oai_batch,
+            newest=self.newest,
+            days=self.days,
+            seed=self.seed,
+            date_from=datetime.fromisoformat(date_from) if date_from else None,
+            date_until=datetime.fromisoformat(date_until) if date_until else None,
+        )
+        return web.Response(text=content, content_type="text/xml")
+
+    def start(self) -> str:
+        """启动服务器, 返回可用作ARXIV_BASE_URL的地址"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get("/search/advanced", self._handle)
+            app.router.add_get("/oai2", self._handle_oai)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+
+def run_worker(mode: str, date: str, verbose: bool, collect: bool = False):
+    """
+    在子进程中执行一次爬取, 把结果以JSON输出到stdout最后一行
+
+    Args:
+        collect (bool, optional): 结果中附带入库的每篇文章(id -> [标题, 分类]), 供--compare-oai对比. Defaults to False.
+    """
+    from arxiv_crawler import ArxivScraper
+
+    scraper = ArxivScraper(date, date, trans_to="", db_path="papers.db")
+    scraper.console.quiet = not verbose
+    begin = time.perf_counter()
+    if mode in ("fetch_all", "fetch_all_oai"):
+        # fetch_all_oai由run_case设置的CRAWL_SOURCE=oai区分
+        asyncio.run(scraper.fetch_all())
+    else:
+        scraper.fetch_update()
+    wall = time.perf_counter() - begin
+    papers = scraper.paper_db.conn.execute("SELECT COUNT(*) AS count FROM papers").fetchone()["count"]
+    # Linux上ru_maxrss的单位是KB; 解析进程池的子进程单独统计
+    result = {
+        "wall": wall,
+        "papers": papers,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "client_requests": scraper.http_stats.requests,
+        "metrics": scraper.metrics.summary(),
+    }
+    if collect:
+        result["papers_by_id"] = {
+            row["id"]: [row["paper_title"], row["categories"]]
+            for row in scraper.paper_db.conn.execute("SELECT id, title AS paper_title, categories FROM papers")
+        }
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def run_case(server: StandInServer, base_url: str, case: dict, args, collect: bool = False) -> dict:
+    env = {
+        **os.environ,
+        "ARXIV_BASE_URL": base_url,
+        "CRAWL_SOURCE": "oai" if case["mode"] == "fetch_all_oai" else "search",
+        "OAI_BASE_URL": f"{base_url}/oai2",
+        "STEP": str(case["step"]),
+        "FETCH_CONCURRENCY": str(case["concurrency"]),
+        "FETCH_MAX_CONCURRENCY": str(case["concurrency"]),
+        "FETCH_RATE": str(args.rate),
+        "UPDATE_PREFETCH": str(case["concurrency"]),
+        "HTML_PARSER": case["parser"],
+        "PAGE_CACHE_MODE": "off",
+        "CRAWL_CHECKPOINT": "false",
+        "RETRY_BASE_DELAY": "0.1",
+    }
+    server.reset()
+    with tempfile.TemporaryDirectory(prefix="bench_crawl_") as workdir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", case["mode"], "--date", args.date]
+            + (["--verbose"] if args.verbose else [])
+            + (["--collect"] if collect else []),
+            cwd=workdir,
+            env=env,
+            capture_output=not args.verbose,
+            text=True,
+        )
+    output = completed.stdout or ""
+    lines = [line for line in output.splitlines() if line.startswith(RESULT_MARKER)]
+    if completed.returncode != 0 or not lines:
+        print(completed.stderr[-2000:] if completed.stderr else output[-2000:])
+        return {**case, "error": f"worker exited with {completed.returncode}"}
+    result = json.loads(lines[-1][len(RESULT_MARKER) :])
+    return {
+        **case,
+        **result,
+        "server_requests": server.requests,
+        "server_errors": server.errors,
+        "papers_per_second": result["papers"] / result["wall"] if result["wall"] > 0 else 0.0,
+    }
+
+
+def print_table(results: list[dict]):
+    header = f"{'mode':<13}{'step':>5}{'conc':>5}{'parser':>7}{'papers':>8}{'wall(s)':>9}{'papers/s':>10}{'requests':>9}{'errors':>7}{'rss(MB)':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        if "error" in r:
+            print(f"{r['mode']:<13}{r['step']:>5}{r['concurrency']:>5}{r['parser']:>7}  {r['error']}")
+            continue
+        print(
+            f"{r['mode']:<13}{r['step']:>5}{r['concurrency']:>5}{r['parser']:>7}{r['papers']:>8}"
+            f"{r['wall']:>9.2f}{r['papers_per_second']:>10.0f}{r['server_requests']:>9}{r['server_errors']:>7}"
+            f"{max(r['peak_rss_mb'], r['children_peak_rss_mb']):>9.0f}"
+        )
+
+
+def compare_oai(server: StandInServer, base_url: str, args) -> bool:
+    """
+    在同一个合成数据集上分别用搜索页(CRAWL_SOURCE=search)和OAI(CRAWL_SOURCE=oai)全量爬取, 对比入库的文章。
+    替身的搜索页不按日期和关键词过滤, 因此数据集需要完整落在--date所在月份的公布日内, 并且不设置关键词
+    """
+    case = {"step": _csv(args.steps, int)[0], "concurrency": _csv(args.concurrency, int)[0], "parser": _csv(args.parsers)[0]}
+    results = {}
+    for mode in ("fetch_all", "fetch_all_oai"):
+        results[mode] = run_case(server, base_url, {**case, "mode": mode}, args, collect=True)
+    print_table(list(results.values()))
+    if any("error" in result for result in results.values()):
+        return False
+    search, oai = results["fetch_all"]["papers_by_id"], results["fetch_all_oai"]["papers_by_id"]
+    only_search = sorted(set(search) - set(oai))
+    only_oai = sorted(set(oai) - set(search))
+    mismatched = sorted(paper_id for paper_id in set(search) & set(oai) if search[paper_id] != oai[paper_id])
+    print()
+    print(f"search: {len(search)} papers, oai: {len(oai)} papers, {len(set(search) & set(oai))} in both")
+    for label, ids in (("only in search", only_search), ("only in oai", only_oai), ("title/categories differ", mismatched)):
+        if ids:
+            print(f"{label}: {len(ids)}, e.g. {ids[:5]}")
+    for paper_id in mismatched[:3]:
+        print(f"  {paper_id}\n    search: {search[paper_id]}\n    oai:    {oai[paper_id]}")
+    return not (only_search or only_oai or mismatched)
+
+
+def _csv(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线端到端爬取基准测试")
+    parser.add_argument("--total", type=int, default=2000, help="合成页面的结果总数")
+    parser.add_argument("--latency", type=float, default=0.02, help="每个响应的基础延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="延迟抖动(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误注入概率")
+    parser.add_argument("--error-status", type=int, default=503, help="注入的错误状态码")
+    parser.add_argument("--recorded", help="使用录制的页面缓存目录(PAGE_CACHE_DIR)代替合成页面")
+    parser.add_argument("--steps", default="50", help="要比较的STEP, 逗号分隔")
+    parser.add_argument("--concurrency", default="4", help="要比较的并发数, 逗号分隔")
+    parser.add_argument("--parsers", default="bs4,lxml", help="要比较的解析器, 逗号分隔")
+    parser.add_argument("--modes", default="fetch_all,fetch_update", help="fetch_all、fetch_all_oai和/或fetch_update")
+    parser.add_argument("--oai-batch", type=int, default=1000, help="OAI每页的记录数")
+    parser.add_argument("--compare-oai", action="store_true", help="对比搜索页和OAI两种全量爬取在同一数据集上的结果")
+    parser.add_argument("--rate", type=float, default=1000.0, help="FETCH_RATE, 默认不限速以测量爬取路径本身")
+    parser.add_argument("--date", default="2024-08-09", help="传给ArxivScraper的日期")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="显示爬虫日志")
+    parser.add_argument("--worker", choices=["fetch_all", "fetch_all_oai", "fetch_update"], help=argparse.SUPPRESS)
+    parser.add_argument("--collect", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.date, args.verbose, args.collect)
+        sys.exit(0)
+
+    if args.compare_oai:
+        # 数据集的提交日期为8.3~8.27, 公布日均在8月内(见compare_oai)
+        os.environ["OPTIONAL_KEYWORDS"] = ""
+        server = StandInServer(
+            total=args.total, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            seed=args.seed, newest=datetime(2024, 8, 27), days=24, oai_batch=args.oai_batch,
+        )
+        base_url = server.start()
+        print(f"Stand-in server at {base_url}: comparing search and OAI on {args.total} synthetic papers")
+        try:
+            same = compare_oai(server, base_url, args)
+        finally:
+            server.stop()
+        print("OK: both sources stored the same papers" if same else "FAILED: sources differ")
+        sys.exit(0 if same else 1)
+
+    server = StandInServer(
+        total=args.total,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        recorded=args.recorded,
+        seed=args.seed,
+        oai_batch=args.oai_batch,
+    )
+    base_url = server.start()
+    source = f"recorded pages from {args.recorded}" if args.recorded else f"{args.total} synthetic results"
+    print(f"Stand-in server at {base_url}: {source}, latency {args.latency}s ±{args.jitter}s, error rate {args.error_rate}")
+    results = []
+    try:
+        for mode, step, concurrency, parser_name in itertools.product(
+            _csv(args.modes), _csv(args.steps, int), _csv(args.concurrency, int), _csv(args.parsers)
+        ):
+            case = {"mode": mode, "step": step, "concurrency": concurrency, "parser": parser_name}
+            results.append(run_case(server, base_url, case, args))
+    finally:
+        server.stop()
+    print()
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+    sys.exit(1 if any("error" in r for r in results) else 0)
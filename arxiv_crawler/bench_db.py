@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+papers.db热点查询的基准测试
+
+生成一个多年的合成数据库(每个公布日固定篇数), 先模拟迁移前的旧数据库(没有索引, user_version=1)测量各查询的耗时,
+然后执行db_migrations.migrate(建索引+ANALYZE)再测一次, 对比耗时和查询计划。
+--check-threads检查ConnectionManager的多线程用法(api_server在线程池中处理请求): 多个线程先后、同时打开
+PaperDatabase并写入, 关闭后所有数据都应已从WAL合并回数据库文件。
+
+用法:
+    python arxiv_crawler/bench_db.py --years 3 --per-day 400
+    python arxiv_crawler/bench_db.py --db ./bench_papers.db --keep
+    python arxiv_crawler/bench_db.py --check-threads
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from arxiv_calendar import ARXIV_CALENDAR
+from db_connection import ConnectionManager
+from db_migrations import migrate, schema_version
+from paper import Paper, PaperDatabase
+
+INDEXES = ("idx_papers_first_announced_date", "idx_papers_id", "idx_papers_update_time")
+
+
+def build_database(path: Path, years: int, per_day: int, seed: int) -> list[date]:
+    """生成合成数据库, 返回所有公布日; 结束时数据库处于没有索引的旧版本状态"""
+    PaperDatabase(str(path)).manager.close()
+    conn = sqlite3.connect(path)
+    for index in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+    rng = random.Random(seed)
+    last = date(2024, 12, 31)
+    day = last.replace(year=last.year - years + 1, month=1, day=1)
+    days = []
+    filler = "lorem ipsum dolor sit amet " * 12
+    while day <= last:
+        day = ARXIV_CALENDAR.next_day(day)
+        if day > last:
+            break
+        days.append(day)
+        rows = []
+        for i in range(per_day):
+            paper_id = f"{day:%y%m}.{len(days):03d}{i:03d}"
+            url = f"https://arxiv.org/abs/{paper_id}"
+            update_time = datetime.combine(day, datetime.min.time()) + timedelta(seconds=rng.randrange(86400))
+            rows.append(
+                (
+                    url, paper_id, url.replace("abs", "pdf"), "Alice, Bob", None,
+                    (day - timedelta(days=1)).isoformat(), day.isoformat(), update_time,
+                    "cs.CV,cs.AI", f"Title {paper_id}", None, filler, filler, None, None,
+                )
+            )
+        conn.executemany("INSERT INTO papers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        day += timedelta(days=1)
+    conn.commit()
+    conn.close()
+    return days
+
+
+def queries(days: list[date], rng: random.Random) -> dict[str, tuple[str, callable]]:
+    """查询名 -> (SQL, 每次调用生成参数的函数), SQL与PaperDatabase/data_all/daily_jsonl_export中的一致"""
+
+    def random_day():
+        return rng.choice(days).isoformat()
+
+    def random_month():
+        first = rng.choice(days).replace(day=1)
+        return first.isoformat(), (first + timedelta(days=31)).replace(day=1).isoformat()
+
+    def random_id():
+        day = rng.choice(days)
+        return (f"{day:%y%m}.{days.index(day) + 1:03d}{rng.randrange(10):03d}",)
+
+    return {
+        "fetch_papers_on_date": ("SELECT * FROM papers WHERE first_announced_date = ?", lambda: (random_day(),)),
+        "count_papers_on_date": (
+            "SELECT COUNT(*) AS count FROM papers WHERE first_announced_date = ?",
+            lambda: (random_day(),),
+        ),
+        "data_all distinct dates": (
+            "SELECT DISTINCT first_announced_date FROM papers WHERE first_announced_date BETWEEN ? AND ?",
+            random_month,
+        ),
+        "daily_jsonl_export by id": ("SELECT * FROM papers WHERE id = ?", random_id),
+        "newest_update_time": ("SELECT MAX(update_time) AS max_updated_time FROM papers", lambda: ()),
+    }
+
+
+def measure(conn: sqlite3.Connection, sql: str, params, repeat: int) -> tuple[float, str]:
+    """返回中位数耗时(毫秒)和查询计划"""
+    timings = []
+    for _ in range(repeat):
+        args = params()
+        begin = time.perf_counter()
+        conn.execute(sql, args).fetchall()
+        timings.append((time.perf_counter() - begin) * 1000)
+    plan = "; ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params()))
+    return statistics.median(timings), plan
+
+
+def run_all(conn: sqlite3.Connection, days: list[date], repeat: int, seed: int) -> dict[str, tuple[float, str]]:
+    return {
+        name: measure(conn, sql, params, repeat)
+        for name, (sql, params) in queries(days, random.Random(seed)).items()
+    }
+
+
+def check_threads(path: Path, threads: int = 4, per_thread: int = 200) -> bool:
+    """多个线程先后、同时通过PaperDatabase写入同一个数据库, 返回检查是否通过"""
+    errors = []
+
+    def write(index: int):
+        try:
+            day = datetime(2024, 5, 2)
+            PaperDatabase(str(path)).add_papers(
+                [
+                    Paper(
+                        first_submitted_date=datetime(2024, 5, 1), title=f"Title {index}-{i}", categories=["cs.CV"],
+                        url=f"https://arxiv.org/abs/2405.{index:02d}{i:03d}", authors="Alice", abstract="abstract",
+                        comments="No comments", first_announced_date=day,
+                    )
+                    for i in range(per_thread)
+                ]
+            )
+        except Exception as e:
+            errors.append(f"thread {index}: {e!r}")
+
+    def run(indexes):
+        workers = [threading.Thread(target=write, args=(index,)) for index in indexes]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    # 先后: 第二个线程复用同一个ConnectionManager; 同时: 写入由SQLite的锁串行化
+    run([0])
+    run([1])
+    run(range(2, threads + 2))
+    ConnectionManager.close_all()
+
+    wal = Path(f"{path}-wal")
+    wal_size = wal.stat().st_size if wal.exists() else 0
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+    conn.close()
+    expected = (threads + 2) * per_thread
+    print(f"{threads + 2} writer threads: {count}/{expected} rows in {path.name}, WAL {wal_size} bytes after close")
+    for error in errors:
+        print(f"  {error}")
+    return not errors and count == expected and wal_size == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="papers.db热点查询的基准测试(迁移前后对比)")
+    parser.add_argument("--years", type=int, default=3, help="合成数据覆盖的年数")
+    parser.add_argument("--per-day", type=int, default=400, help="每个公布日的论文数")
+    parser.add_argument("--repeat", type=int, default=20, help="每个查询的重复次数, 取中位数")
+    parser.add_argument("--db", help="合成数据库路径, 默认写到临时目录")
+    parser.add_argument("--keep", action="store_true", help="保留合成数据库")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-threads", action="store_true", help="只检查多线程写入和退出时的checkpoint")
+    args = parser.parse_args()
+
+    if args.check_threads:
+        workdir = tempfile.mkdtemp(prefix="bench_db_")
+        passed = check_threads(Path(workdir, "papers.db"))
+        print("OK" if passed else "FAILED")
+        sys.exit(0 if passed else 1)
+
+    workdir = tempfile.mkdtemp(prefix="bench_db_") if not args.db else None
+    db_path = Path(args.db) if args.db else Path(workdir, "papers.db")
+    if db_path.exists():
+        db_path.unlink()
+
+    begin = time.perf_counter()
+    days = build_database(db_path, args.years, args.per_day, args.seed)
+    print(
+        f"Built {len(days) * args.per_day:,} papers over {len(days)} announcement days "
+        f"({db_path.stat().st_size / 1e6:.0f} MB) in {time.perf_counter() - begin:.1f}s"
+    )
+
+    conn = sqlite3.connect(db_path)
+    before = run_all(conn, days, args.repeat, args.seed)
+    begin = time.perf_counter()
+    applied = migrate(conn)
+    print(f"Migrated schema to version {schema_version(conn)} (applied {applied}) in {time.perf_counter() - begin:.1f}s")
+    after = run_all(conn, days, args.repeat, args.seed)
+    conn.close()
+
+    print()
+    print(f"{'query':<26}{'before(ms)':>12}{'after(ms)':>12}{'speedup':>10}")
+    print("-" * 60)
+    for name in before:
+        old, new = before[name][0], after[name][0]
+        print(f"{name:<26}{old:>12.2f}{new:>12.3f}{old / new if new else float('inf'):>9.0f}x")
+    print()
+    for name in before:
+        print(f"{name}:\n  before: {before[name][1]}\n  after:  {after[name][1]}")
+
+    if not args.keep:
+        db_path.unlink()
+        if workdir:
+            os.rmdir(workdir)
+    else:
+        print(f"\nDatabase kept at {db_path}")
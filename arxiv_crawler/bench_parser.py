@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索结果页解析器的一致性检查与基准测试
+
+以bs4后端为基准, 检查其他后端在每个页面上产出的Paper是否完全一致, 然后比较各后端的解析耗时。
+页面可以来自录制的arXiv页面(目录下的*.html / *.html.gz), 也可以是sample_pages生成的合成页面。
+
+用法:
+    python arxiv_crawler/bench_parser.py --pages ./page_cache/blobs
+    python arxiv_crawler/bench_parser.py --synthetic 40 --repeat 3
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from dataclasses import fields
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sample_pages import render_search_page
+from search_parser import PARSER_BACKENDS, parse_search_page
+
+
+def load_pages(pages_dir: str | None, synthetic: int) -> list[tuple[str, str]]:
+    if pages_dir:
+        pages = []
+        for path in sorted(Path(pages_dir).rglob("*")):
+            if path.name.endswith(".html.gz"):
+                pages.append((str(path), gzip.decompress(path.read_bytes()).decode("utf-8")))
+            elif path.suffix == ".html":
+                pages.append((str(path), path.read_text(encoding="utf-8")))
+        return pages
+    total = synthetic * 50
+    pages = [(f"synthetic start={start}", render_search_page(start, total)) for start in range(0, total, 50)]
+    pages.append(("synthetic no results", render_search_page(0, 0)))
+    return pages
+
+
+def check_conformance(pages: list[tuple[str, str]], reference: str = "bs4") -> int:
+    """返回不一致的页面数"""
+    mismatches = 0
+    for name, content in pages:
+        expected = parse_search_page(content, reference)
+        for backend in PARSER_BACKENDS:
+            if backend == reference:
+                continue
+            actual = parse_search_page(content, backend)
+            if actual == expected:
+                continue
+            mismatches += 1
+            print(f"[MISMATCH] {backend} vs {reference} on {name}")
+            if actual[0] != expected[0]:
+                print(f"  total: {actual[0]!r} != {expected[0]!r}")
+            if len(actual[1]) != len(expected[1]):
+                print(f"  papers: {len(actual[1])} != {len(expected[1])}")
+            for got, want in zip(actual[1], expected[1]):
+                for field in fields(want):
+                    if getattr(got, field.name) != getattr(want, field.name):
+                        print(f"  {want.url} {field.name}: {getattr(got, field.name)!r} != {getattr(want, field.name)!r}")
+    return mismatches
+
+
+def benchmark(pages: list[tuple[str, str]], repeat: int) -> dict[str, float]:
+    results = {}
+    total_bytes = sum(len(content.encode("utf-8")) for _, content in pages)
+    total_papers = sum(len(parse_search_page(content)[1]) for _, content in pages)
+    for backend in PARSER_BACKENDS:
+        best = float("inf")
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            for _, content in pages:
+                parse_search_page(content, backend)
+            best = min(best, time.perf_counter() - begin)
+        results[backend] = best
+        print(
+            f"{backend:>5}: {best * 1000:8.1f} ms for {len(pages)} pages "
+            f"({best / len(pages) * 1000:.2f} ms/page, {total_papers / best:,.0f} papers/s, "
+            f"{total_bytes / best / 1e6:.1f} MB/s)"
+        )
+    baseline = results.get("bs4")
+    for backend, elapsed in results.items():
+        if baseline and backend != "bs4":
+            print(f"{backend} speedup over bs4: {baseline / elapsed:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="搜索结果页解析器的一致性检查与基准测试")
+    parser.add_argument("--pages", help="录制的页面目录(*.html / *.html.gz), 不指定时使用合成页面")
+    parser.add_argument("--synthetic", type=int, default=20, help="合成页面数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每个后端重复次数, 取最快一次")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.synthetic)
+    if not pages:
+        print("No pages found.")
+        sys.exit(1)
+    print(f"Loaded {len(pages)} pages, backends: {', '.join(PARSER_BACKENDS)}")
+    mismatches = check_conformance(pages)
+    print(f"Conformance: {len(pages) - mismatches}/{len(pages)} pages identical")
+    benchmark(pages, args.repeat)
+    sys.exit(1 if mismatches else 0)
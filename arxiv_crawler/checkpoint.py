@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+from env_utils import env_bool
+from paper import Paper
+
+
+class IncompleteCrawlError(RuntimeError):
+    """有页面在重试后仍未获取, 进度已保存在检查点中, 再次运行时只会请求缺失的页面"""
+
+
+def _paper_to_dict(paper: Paper) -> dict:
+    data = asdict(paper)
+    for key in ("first_submitted_date", "first_announced_date"):
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return data
+
+
+def _paper_from_dict(data: dict) -> Paper:
+    for key in ("first_submitted_date", "first_announced_date"):
+        if data.get(key) is not None:
+            data[key] = datetime.fromisoformat(data[key])
+    return Paper(**data)
+
+
+class CrawlCheckpoint:
+    """
+    fetch_all的分页检查点, 追加写入的JSONL文件, 每行一条记录:
+        {"type": "meta", "fingerprint": ..., "total": ...}          查询指纹和结果总数
+        {"type": "page", "start": ..., "papers": [...]}             已解析但尚未写库的页面
+        {"type": "window", "starts": [...], "announced_date": ...}  流式模式下已写库的窗口及累积的公布日期
+
+    查询指纹由搜索url(不含start)计算, 文件名取自指纹, 因此不同查询的检查点互不影响。
+    结果总数变化时(例如期间有新文章公布)各页的偏移都会改变, 旧的检查点作废。
+    爬取成功后检查点被删除。
+    """
+
+    def __init__(self, path: str | Path, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.pages: dict[int, list[Paper]] = {}
+        self.committed: set[int] = set()
+        self.announced_date: datetime | None = None
+
+    @staticmethod
+    def fingerprint_of(query: str) -> str:
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_env(cls, query: str) -> "CrawlCheckpoint | None":
+        """使用CRAWL_CHECKPOINT和CHECKPOINT_DIR构造, 未启用时返回None"""
+        if not env_bool("CRAWL_CHECKPOINT", True):
+            return None
+        fingerprint = cls.fingerprint_of(query)
+        directory = Path(os.environ.get("CHECKPOINT_DIR", "./checkpoints"))
+        return cls(directory / f"fetch_all-{fingerprint[:16]}.jsonl", fingerprint)
+
+    def open(self, total: int) -> bool:
+        """
+        读取已有的检查点, 指纹或总数不匹配时丢弃并重新开始
+
+        Returns:
+            bool: 是否恢复了之前的进度
+        """
+        resumed = self._load(total)
+        if not resumed:
+            self.pages.clear()
+            self.committed.clear()
+            self.announced_date = None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"type": "meta", "fingerprint": self.fingerprint, "total": total}) + "\n")
+        return resumed
+
+    def _load(self, total: int) -> bool:
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 进程在写入过程中被终止时最后一行可能不完整, 忽略即可, 该页会重新请求
+                break
+        if not records or records[0] != {"type": "meta", "fingerprint": self.fingerprint, "total": total}:
+            return False
+        for record in records[1:]:
+            if record["type"] == "page":
+                self.pages[record["start"]] = [_paper_from_dict(paper) for paper in record["papers"]]
+            elif record["type"] == "window":
+                self.committed.update(record["starts"])
+                self.announced_date = datetime.fromisoformat(record["announced_date"])
+                for start in record["starts"]:
+                    self.pages.pop(start, None)
+        return True
+
+    def _append(self, record: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def add_page(self, start: int, papers: list[Paper]):
+        self.pages[start] = papers
+        self._append({"type": "page", "start": start, "papers": [_paper_to_dict(paper) for paper in papers]})
+
+    def commit_window(self, starts: list[int], announced_date: datetime):
+        """流式模式下一个窗口已经写库, 其中的页面不必再保留"""
+        self.committed.update(starts)
+        self.announced_date = announced_date
+        for start in starts:
+            self.pages.pop(start, None)
+        self._append({"type": "window", "starts": list(starts), "announced_date": announced_date.isoformat()})
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,174 @@
+import json
+import math
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+# 各项耗时输出的分位数
+QUANTILES = (0.5, 0.9, 0.99)
+
+_TIMINGS = ("queue_wait", "ttfb", "download", "parse")
+
+
+@dataclass
+class PageMetric:
+    """一个页面从排队到解析完成的各项指标, 耗时单位均为秒"""
+
+    key: str
+    queue_wait: float | None = None  # 从入队(或可重试)到真正发出请求, 包括并发槽位和令牌桶的等待
+    ttfb: float | None = None  # 发出请求到收到响应头
+    download: float | None = None  # 收到响应头到读完响应体
+    bytes: int = 0
+    parse: float | None = None
+    papers: int = 0
+    attempts: int = 0
+    status: str = "pending"  # ok / cache / http_<状态码> / <异常类型>
+    source: str = "network"  # network / cache
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """最近秩法分位数, sorted_values需已排序且非空"""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _distribution(values: list[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    result = {"count": len(values), "sum": round(sum(values), 6)}
+    for q in QUANTILES:
+        result[f"p{int(q * 100)}"] = round(percentile(values, q), 6)
+    result["max"] = round(values[-1], 6)
+    return result
+
+
+class CrawlMetrics:
+    """
+    一次爬取(fetch_all/fetch_update)的结构化指标: 每个页面的排队、TTFB、下载、大小、解析、重试和最终状态,
+    以及翻译、写库等阶段的总耗时。summary()给出带分位数的汇总, 可写成JSON和Prometheus文本格式
+    """
+
+    def __init__(self, mode: str = ""):
+        self.mode = mode
+        self.started_at = datetime.now()
+        self._begin = time.monotonic()
+        self.finished: float | None = None
+        self.pages: dict[str, PageMetric] = {}
+        self.phases: Counter = Counter()
+        self.extra: dict = {}
+
+    def page(self, key) -> PageMetric:
+        key = str(key)
+        if key not in self.pages:
+            self.pages[key] = PageMetric(key)
+        return self.pages[key]
+
+    @contextmanager
+    def phase(self, name: str):
+        """累计一个阶段(如translate、db)的耗时"""
+        begin = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.monotonic() - begin
+
+    def finish(self):
+        self.finished = time.monotonic() - self._begin
+
+    def summary(self) -> dict:
+        pages = list(self.pages.values())
+        wall = self.finished if self.finished is not None else time.monotonic() - self._begin
+        total_bytes = sum(page.bytes for page in pages)
+        return {
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 3),
+            "pages": len(pages),
+            "status": dict(Counter(page.status for page in pages)),
+            "sources": dict(Counter(page.source for page in pages)),
+            "papers": sum(page.papers for page in pages),
+            "bytes": total_bytes,
+            "throughput_bytes_per_second": round(total_bytes / wall, 1) if wall > 0 else None,
+            "retries": sum(page.retries for page in pages),
+            "retries_histogram": {str(k): v for k, v in sorted(Counter(page.retries for page in pages).items())},
+            "timings": {
+                name: _distribution([getattr(page, name) for page in pages if getattr(page, name) is not None])
+                for name in _TIMINGS
+            },
+            "response_bytes": _distribution([page.bytes for page in pages if page.bytes]),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            **self.extra,
+        }
+
+    def format_summary(self) -> str:
+        """一行可读的摘要, 用于日志"""
+        summary = self.summary()
+        timings = summary["timings"]
+
+        def p(name, q="p50"):
+            value = timings[name].get(q)
+            return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in summary["phases"].items())
+        return (
+            f"{summary['pages']} pages {summary['status']} in {summary['wall_seconds']:.1f}s, "
+            f"{summary['papers']} papers, {summary['bytes'] / 1e6:.1f} MB, {summary['retries']} retries; "
+            f"queue p50/p90 {p('queue_wait')}/{p('queue_wait', 'p90')}, ttfb p50/p90 {p('ttfb')}/{p('ttfb', 'p90')}, "
+            f"download p50 {p('download')}, parse p50/p90 {p('parse')}/{p('parse', 'p90')}"
+            + (f"; {phases}" if phases else "")
+        )
+
+    def to_prometheus(self, prefix: str = "arxiv_crawler") -> str:
+        summary = self.summary()
+        labels = f'mode="{self.mode}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, extra_labels, value in samples:
+                label_text = ",".join(filter(None, (labels, extra_labels)))
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        for name in _TIMINGS:
+            dist = summary["timings"][name]
+            samples = [("", f'quantile="{q}"', dist[f"p{int(q * 100)}"]) for q in QUANTILES if dist["count"]]
+            samples += [("_sum", "", dist.get("sum", 0)), ("_count", "", dist["count"])]
+            metric(f"page_{name}_seconds", "summary", f"Per-page {name.replace('_', ' ')} in seconds", samples)
+        metric(
+            "pages_total", "counter", "Pages by final status",
+            [("", f'status="{status}"', count) for status, count in summary["status"].items()],
+        )
+        metric("page_retries_total", "counter", "Retried page requests", [("", "", summary["retries"])])
+        metric("response_bytes_total", "counter", "Response bytes downloaded", [("", "", summary["bytes"])])
+        metric("papers_parsed_total", "counter", "Papers parsed from search pages", [("", "", summary["papers"])])
+        metric("wall_seconds", "gauge", "Wall time of the crawl", [("", "", summary["wall_seconds"])])
+        metric(
+            "phase_seconds", "gauge", "Time spent in each phase",
+            [("", f'phase="{name}"', seconds) for name, seconds in summary["phases"].items()],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str | Path, name: str, prometheus: bool = False) -> Path:
+        """
+        写入<directory>/<name>.json(包含汇总和每页明细), prometheus为True时同时写入<name>.prom
+
+        Returns:
+            Path: JSON文件路径
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        json_path = directory / f"{name}.json"
+        data = {"summary": self.summary(), "pages": [asdict(page) for page in self.pages.values()]}
+        json_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        if prometheus:
+            (directory / f"{name}.prom").write_text(self.to_prometheus(), encoding="utf-8")
+        return json_path
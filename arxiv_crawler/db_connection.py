@@ -0,0 +1,180 @@
+"""
+papers.db的连接管理
+
+同一个进程内每个数据库文件只有一个ConnectionManager: 每个线程一个写连接(同一线程内爬虫写库、迁移、翻译回填共用;
+api_server在线程池中处理请求, 每个线程使用自己的连接), 加上一个只读连接池(导出、data_all、daily_jsonl_export等只读的查询)。
+写连接会把数据库切换到WAL模式(持久保存在文件中), 读不阻塞写、写也不阻塞读,
+多个进程同时爬取和导出时不再出现"database is locked"; 真正的写写冲突由busy_timeout等待。
+进程退出时会把WAL合并回数据库文件并关闭所有连接, 单独复制papers.db也不会丢数据。
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
+
+from env_utils import env_int
+
+
+@dataclass
+class DbConfig:
+    """
+    连接参数, 所有值都可通过环境变量覆盖
+
+    Attributes:
+        journal_mode: 日志模式(DB_JOURNAL_MODE), wal或delete等
+        synchronous: 同步级别(DB_SYNCHRONOUS), WAL模式下normal已足够安全
+        cache_size_kb: 每个连接的页缓存大小, KB(DB_CACHE_SIZE_KB)
+        mmap_size_mb: 内存映射读取的大小, MB(DB_MMAP_SIZE_MB), 0表示不使用
+        busy_timeout_ms: 遇到锁时最多等待的毫秒数(DB_BUSY_TIMEOUT_MS)
+        max_readers: 只读连接池保留的最大空闲连接数(DB_MAX_READERS)
+    """
+
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    cache_size_kb: int = 65536
+    mmap_size_mb: int = 256
+    busy_timeout_ms: int = 30000
+    max_readers: int = 4
+
+    @classmethod
+    def from_env(cls) -> "DbConfig":
+        default = cls()
+        return cls(
+            journal_mode=os.environ.get("DB_JOURNAL_MODE", "").strip().lower() or default.journal_mode,
+            synchronous=os.environ.get("DB_SYNCHRONOUS", "").strip().lower() or default.synchronous,
+            cache_size_kb=env_int("DB_CACHE_SIZE_KB", default.cache_size_kb),
+            mmap_size_mb=env_int("DB_MMAP_SIZE_MB", default.mmap_size_mb),
+            busy_timeout_ms=env_int("DB_BUSY_TIMEOUT_MS", default.busy_timeout_ms),
+            max_readers=env_int("DB_MAX_READERS", default.max_readers),
+        )
+
+
+class ConnectionManager:
+    """
+    一个数据库文件每个线程的写连接和只读连接池, 通过for_path获取, 同一路径在进程内共用同一个实例
+
+    用法:
+        manager = ConnectionManager.for_path("papers.db")
+        with manager.writer:
+            manager.writer.execute("INSERT ...")
+        with manager.reader() as conn:
+            conn.execute("SELECT ...")
+    """
+
+    _managers: dict[str, "ConnectionManager"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, db_path: str | Path, config: DbConfig | None = None):
+        self.db_path = str(db_path)
+        self.config = config or DbConfig.from_env()
+        # 线程id -> 写连接; 内存数据库只有一个连接(键为0), 否则每个连接都是独立的空数据库
+        self._writers: dict[int, sqlite3.Connection] = {}
+        self._idle_readers: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, db_path: str | Path) -> "ConnectionManager":
+        key = str(db_path) if str(db_path) == ":memory:" else str(Path(db_path).expanduser().resolve())
+        with cls._registry_lock:
+            manager = cls._managers.get(key)
+            if manager is None:
+                manager = cls._managers[key] = cls(key)
+            return manager
+
+    @property
+    def in_memory(self) -> bool:
+        return self.db_path == ":memory:"
+
+    def _configure(self, conn: sqlite3.Connection, writer: bool):
+        # PRAGMA不支持参数绑定, 数值都先转换成int
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config.busy_timeout_ms)}")
+        if writer and not self.in_memory:
+            conn.execute(f"PRAGMA journal_mode = {self.config.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.config.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.config.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config.mmap_size_mb) * 1024 * 1024}")
+
+    @property
+    def writer(self) -> sqlite3.Connection:
+        """
+        当前线程的写连接, 线程内第一次访问时创建(数据库文件不存在时会创建)。
+        不同线程的写入由SQLite的锁和busy_timeout串行化; 连接允许跨线程关闭, 以便close_all在退出时执行checkpoint
+        """
+        key = 0 if self.in_memory else threading.get_ident()
+        with self._lock:
+            conn = self._writers.get(key)
+            if conn is None:
+                conn = sqlite3.connect(
+                    self.db_path, timeout=self.config.busy_timeout_ms / 1000, check_same_thread=False
+                )
+                self._configure(conn, writer=True)
+                self._writers[key] = conn
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        从连接池借出一个只读连接, 用完归还; 归还时会重置row_factory。
+        不在事务中, 每条查询都读取最新提交的快照。内存数据库没有独立的读连接, 借出的是写连接
+        """
+        if self.in_memory:
+            yield self.writer
+            return
+        with self._lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = sqlite3.connect(
+                f"file:{quote(self.db_path)}?mode=ro",
+                uri=True,
+                timeout=self.config.busy_timeout_ms / 1000,
+                check_same_thread=False,
+            )
+            self._configure(conn, writer=False)
+        try:
+            yield conn
+        finally:
+            conn.row_factory = None
+            with self._lock:
+                if len(self._idle_readers) < self.config.max_readers:
+                    self._idle_readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """把WAL合并回数据库文件并关闭所有连接, 之后再访问writer或reader会重新创建"""
+        with self._lock:
+            readers, self._idle_readers = self._idle_readers, []
+            writers, self._writers = list(self._writers.values()), {}
+        for conn in readers:
+            conn.close()
+        # 先关闭其他写连接, 最后一个连接执行checkpoint时本进程内没有其他连接
+        for conn in writers[:-1]:
+            conn.close()
+        if writers:
+            try:
+                writers[-1].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                # 其他进程仍在读取时可能无法截断, 数据留在WAL中, 下一次checkpoint时合并
+                pass
+            writers[-1].close()
+
+    @classmethod
+    def close_all(cls):
+        """关闭进程内所有数据库的连接, 进程退出时自动调用"""
+        with cls._registry_lock:
+            managers = list(cls._managers.values())
+        for manager in managers:
+            try:
+                manager.close()
+            except sqlite3.Error:
+                pass
+
+
+atexit.register(ConnectionManager.close_all)
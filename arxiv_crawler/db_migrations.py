@@ -0,0 +1,92 @@
+"""
+papers.db的版本化结构迁移
+
+数据库的结构版本记录在PRAGMA user_version中, 打开数据库时按顺序执行版本号大于它的迁移,
+每个迁移执行完才更新user_version; 迁移必须是幂等的(IF NOT EXISTS、先检查列是否存在), 中途失败时下次打开数据库会重新执行它。
+新增列、索引等结构变化时在MIGRATIONS末尾追加一个迁移, 不要修改已发布的迁移。
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    """
+    旧版本的数据库可能缺少后来加入的列, 补齐并回填数据(新建的数据库已经包含所有列, 这里不做任何事)
+    """
+    columns = _columns(conn, "papers")
+    # 添加允许NULL的列, 然后根据url或摘要回填现有数据
+    backfills = {
+        "id": "UPDATE papers SET id = SUBSTR(url, INSTR(url, 'abs/') + 4)",
+        "pdf": "UPDATE papers SET pdf = REPLACE(url, 'https://arxiv.org/abs', 'https://arxiv.org/pdf')",
+        "summary": "UPDATE papers SET summary = abstract",
+        "title_translated": None,
+        "abstract_translated": None,
+        "ai_content": None,
+    }
+    for column, backfill in backfills.items():
+        if column in columns:
+            continue
+        conn.execute(f"ALTER TABLE papers ADD COLUMN {column} TEXT")
+        if backfill:
+            conn.execute(backfill)
+        print(f"Added missing column: {column}")
+
+
+def _add_indexes(conn: sqlite3.Connection):
+    """
+    按公布日期查询/删除/统计、data_all的区间DISTINCT查询、daily_jsonl_export按id查找、
+    newest_update_time的MAX(update_time)原本都是全表扫描
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_first_announced_date ON papers(first_announced_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_id ON papers(id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_update_time ON papers(update_time)")
+
+
+MIGRATIONS = [
+    Migration(1, "add columns introduced after the first release", _add_missing_columns),
+    Migration(2, "index first_announced_date, id and update_time", _add_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations: list[Migration] = MIGRATIONS) -> list[int]:
+    """
+    执行所有未执行的迁移, 有迁移执行时再运行ANALYZE, 让查询规划器使用新索引的统计信息
+
+    Returns:
+        list[int]: 本次执行的迁移版本号
+    """
+    current = schema_version(conn)
+    if current > migrations[-1].version:
+        raise RuntimeError(f"Database schema version {current} is newer than supported version {migrations[-1].version}")
+    applied = []
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+        with conn:
+            migration.apply(conn)
+            # PRAGMA不支持参数绑定; version是代码中的整数常量
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        applied.append(migration.version)
+    if applied:
+        conn.execute("ANALYZE")
+        conn.commit()
+    return applied
@@ -0,0 +1,21 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """读取整数环境变量，未设置或为空时返回默认值"""
+    value = os.environ.get(name, "")
+    return int(value) if value.strip() else default
+
+
+def env_float(name: str, default: float) -> float:
+    """读取浮点数环境变量，未设置或为空时返回默认值"""
+    value = os.environ.get(name, "")
+    return float(value) if value.strip() else default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """读取布尔环境变量，支持1/true/yes/on"""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
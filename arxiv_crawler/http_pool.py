@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+
+import aiohttp
+
+from env_utils import env_float, env_int
+
+
+@dataclass
+class PoolConfig:
+    """
+    长连接池配置, 所有值都可通过环境变量覆盖
+
+    Attributes:
+        limit: 连接池总连接数上限(HTTP_POOL_LIMIT)
+        limit_per_host: 单个host的连接数上限(HTTP_POOL_LIMIT_PER_HOST)
+        keepalive_timeout: 空闲连接保活时间, 秒(HTTP_KEEPALIVE_TIMEOUT)
+        dns_cache_ttl: DNS缓存时间, 秒(HTTP_DNS_CACHE_TTL)
+        timeout: 单次请求总超时, 秒(HTTP_TIMEOUT)
+    """
+
+    limit: int = 20
+    limit_per_host: int = 8
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        default = cls()
+        return cls(
+            limit=env_int("HTTP_POOL_LIMIT", default.limit),
+            limit_per_host=env_int("HTTP_POOL_LIMIT_PER_HOST", default.limit_per_host),
+            keepalive_timeout=env_float("HTTP_KEEPALIVE_TIMEOUT", default.keepalive_timeout),
+            dns_cache_ttl=env_int("HTTP_DNS_CACHE_TTL", default.dns_cache_ttl),
+            timeout=env_float("HTTP_TIMEOUT", default.timeout),
+        )
+
+
+@dataclass
+class ConnectionStats:
+    """统计一个会话中发出的请求数、新建连接数(握手次数)和复用连接数"""
+
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        acquired = self.connections_created + self.connections_reused
+        return self.connections_reused / acquired if acquired else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections_created} new connections (handshakes), "
+            f"{self.connections_reused} reused ({self.reuse_ratio:.0%})"
+        )
+
+
+def _stats_trace_config(stats: ConnectionStats) -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        stats.requests += 1
+
+    async def on_connection_create_end(session, context, params):
+        stats.connections_created += 1
+
+    async def on_connection_reuseconn(session, context, params):
+        stats.connections_reused += 1
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def create_session(config: PoolConfig | None = None, stats: ConnectionStats | None = None) -> aiohttp.ClientSession:
+    """
+    创建一个带连接池的长连接会话, 必须在事件循环中调用, 用完后需要`await session.close()`
+
+    Args:
+        config (PoolConfig, optional): 连接池配置. Defaults to PoolConfig.from_env().
+        stats (ConnectionStats, optional): 若提供, 会记录请求数与握手/复用次数.
+    """
+    config = config or PoolConfig.from_env()
+    connector = aiohttp.TCPConnector(
+        limit=config.limit,
+        limit_per_host=config.limit_per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=config.dns_cache_ttl,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.timeout),
+        trust_env=True,
+        trace_configs=[_stats_trace_config(stats)] if stats is not None else None,
+    )
@@ -0,0 +1,244 @@
+"""
+基于OAI-PMH ListRecords的arXiv元数据批量获取, 用于历史数据回填
+
+与搜索页每次只返回50条不同, ListRecords每次返回约1000条记录, 并通过resumptionToken翻页。
+响应以流的方式交给XMLPullParser解析, 每解析完一条record就转换为`Paper`并释放对应的XML节点。
+
+下面是一条metadataPrefix=arXiv的记录
+<record>
+  <header>
+    <identifier>oai:arXiv.org:2408.01234</identifier>
+    <datestamp>2024-08-05</datestamp>
+    <setSpec>cs</setSpec>
+  </header>
+  <metadata>
+    <arXiv xmlns="http://arxiv.org/OAI/arXiv/">
+      <id>2408.01234</id>
+      <created>2024-08-02</created>
+      <updated>2024-08-04</updated>
+      <authors>
+        <author><keyname>Smith</keyname><forenames>John</forenames></author>
+      </authors>
+      <title>A Title
+  Spanning Lines</title>
+      <categories>cs.CV cs.AI</categories>
+      <comments>12 pages, 3 figures</comments>
+      <abstract>  The abstract ...</abstract>
+    </arXiv>
+  </metadata>
+</record>
+<resumptionToken cursor="0" completeListSize="2345">6110163|1001</resumptionToken>
+"""
+
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable
+from urllib.parse import urlparse
+
+import aiohttp
+
+from env_utils import env_float, env_int
+from paper import Paper
+from retry_policy import RetryPolicy
+
+OAI_NS = "{http://www.openarchives.org/OAI/2.0/}"
+ARXIV_NS = "{http://arxiv.org/OAI/arXiv/}"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _text(element, tag: str) -> str:
+    found = element.find(f"{ARXIV_NS}{tag}")
+    return _WHITESPACE.sub(" ", found.text or "").strip() if found is not None else ""
+
+
+def record_to_paper(metadata) -> Paper:
+    """把<arXiv>元数据节点转换为Paper, 各字段的格式与搜索页解析出的保持一致"""
+    authors = []
+    for author in metadata.iterfind(f"{ARXIV_NS}authors/{ARXIV_NS}author"):
+        name = " ".join(part for part in (_text(author, "forenames"), _text(author, "keyname")) if part)
+        suffix = _text(author, "suffix")
+        authors.append(f"{name} {suffix}" if suffix else name)
+    return Paper(
+        url=f"https://arxiv.org/abs/{_text(metadata, 'id')}",
+        title=_text(metadata, "title"),
+        first_submitted_date=datetime.strptime(_text(metadata, "created"), "%Y-%m-%d"),
+        categories=_text(metadata, "categories").split(),
+        authors=",".join(authors) if authors else "No authors",
+        abstract=_text(metadata, "abstract"),
+        comments=_text(metadata, "comments") or "No comments",
+    )
+
+
+class OaiError(Exception):
+    """OAI-PMH协议层面的错误(badArgument、badResumptionToken等)"""
+
+    def __init__(self, code: str | None, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+class ListRecordsParser:
+    """
+    增量解析一个ListRecords响应: 多次feed字节块, 每次返回其中已经完整的文章。
+    解析结束后可以从resumption_token得到下一页的令牌(最后一页为None)。
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("end",))
+        self.resumption_token: str | None = None
+        self.complete_list_size: int | None = None
+        self.deleted = 0
+
+    def feed(self, data: bytes) -> list[Paper]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> list[Paper]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> list[Paper]:
+        papers = []
+        for _, element in self._parser.read_events():
+            if element.tag == f"{OAI_NS}record":
+                header = element.find(f"{OAI_NS}header")
+                metadata = element.find(f"{OAI_NS}metadata/{ARXIV_NS}arXiv")
+                if metadata is None or (header is not None and header.get("status") == "deleted"):
+                    self.deleted += 1
+                else:
+                    papers.append(record_to_paper(metadata))
+                # 释放已处理的记录, 内存占用与响应大小无关
+                element.clear()
+            elif element.tag == f"{OAI_NS}resumptionToken":
+                self.resumption_token = (element.text or "").strip() or None
+                if element.get("completeListSize"):
+                    self.complete_list_size = int(element.get("completeListSize"))
+            elif element.tag == f"{OAI_NS}error":
+                code = element.get("code")
+                # 区间内没有记录不是错误
+                if code != "noRecordsMatch":
+                    raise OaiError(code, (element.text or "").strip())
+        return papers
+
+
+def match_keywords(paper: Paper, keywords: Iterable[str]) -> bool:
+    """
+    本地模拟搜索页的关键词过滤(各关键词之间为OR, 在所有字段中查找), 不区分大小写。
+    搜索页会做词干化等处理, 这里是逐字匹配, 结果可能略少于搜索页
+    """
+    keywords = [kw.replace("+", " ").lower() for kw in keywords]
+    if not keywords:
+        return True
+    haystack = " ".join((paper.title, paper.abstract, paper.comments, paper.authors, " ".join(paper.categories))).lower()
+    return any(kw in haystack for kw in keywords)
+
+
+class OaiHarvester:
+    """
+    通过OAI-PMH ListRecords按日期范围和set获取arXiv元数据
+
+    OAI的from/until作用于记录的datestamp(最后修改日期), 而不是首次提交日期: 在区间之后修改过的文章
+    datestamp已经改变, 用区间结束日期作为until会把它们漏掉; 完全不设until又会下载从区间开始到现在修改过的所有记录。
+    因此until取区间结束后until_days天(见harvest_until), 由调用方按first_submitted_date在本地过滤。
+    请求失败(包括OAI-PMH用于流量控制的503 + Retry-After)按共享的RetryPolicy重试。
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://oaipmh.arxiv.org/oai",
+        set_spec: str = "cs",
+        metadata_prefix: str = "arXiv",
+        timeout: float = 120,
+        until_days: int = 30,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        self.base_url = base_url
+        self.set_spec = set_spec
+        self.metadata_prefix = metadata_prefix
+        self.timeout = timeout
+        self.until_days = until_days
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.requests = 0
+        self.deleted = 0
+
+    @classmethod
+    def from_env(cls, retry_policy: RetryPolicy | None = None) -> "OaiHarvester":
+        """使用OAI_BASE_URL、OAI_SET、OAI_TIMEOUT、OAI_UNTIL_DAYS构造"""
+        default = cls()
+        return cls(
+            base_url=os.environ.get("OAI_BASE_URL", "").strip() or default.base_url,
+            set_spec=os.environ.get("OAI_SET", "").strip() or default.set_spec,
+            timeout=env_float("OAI_TIMEOUT", default.timeout),
+            until_days=env_int("OAI_UNTIL_DAYS", default.until_days),
+            retry_policy=retry_policy,
+        )
+
+    def harvest_until(self, window_end: datetime) -> datetime | None:
+        """
+        收割window_end之前提交的文章时使用的until: 窗口结束后再多取until_days天。
+        取舍: 窗口结束until_days天之后才修改过的文章datestamp已经超出范围, 会被漏掉; until_days越大越完整,
+        但每次都要多下载这么多天内修改过的所有记录。until_days<=0或until晚于今天时返回None(不设until, 结果完整)
+        """
+        if self.until_days <= 0:
+            return None
+        until = window_end + timedelta(days=self.until_days)
+        return None if until >= datetime.now() else until
+
+    def params(self, date_from: datetime, date_until: datetime | None = None, resumption_token: str | None = None) -> dict:
+        # 带resumptionToken的请求不能再带其他参数
+        if resumption_token:
+            return {"verb": "ListRecords", "resumptionToken": resumption_token}
+        params = {
+            "verb": "ListRecords",
+            "metadataPrefix": self.metadata_prefix,
+            "from": date_from.strftime("%Y-%m-%d"),
+        }
+        if date_until is not None:
+            params["until"] = date_until.strftime("%Y-%m-%d")
+        if self.set_spec:
+            params["set"] = self.set_spec
+        return params
+
+    async def harvest(
+        self,
+        session: aiohttp.ClientSession,
+        date_from: datetime,
+        date_until: datetime | None = None,
+        proxy: str | None = None,
+    ) -> AsyncIterator[list[Paper]]:
+        """
+        按页产出文章, 直到没有resumptionToken为止
+
+        Args:
+            session: 共享的aiohttp会话
+            date_from (datetime): datestamp起始日期(含)
+            date_until (datetime | None, optional): datestamp结束日期(含), None表示直到现在. Defaults to None.
+        """
+        token = None
+        while True:
+            papers, parser = await self._list_records(session, self.params(date_from, date_until, token), proxy)
+            self.deleted += parser.deleted
+            yield papers
+            token = parser.resumption_token
+            if not token:
+                return
+
+    async def _list_records(self, session, params, proxy) -> tuple[list[Paper], ListRecordsParser]:
+        return await self.retry_policy.call(urlparse(self.base_url).netloc, self._request_page, session, params, proxy)
+
+    async def _request_page(self, session, params, proxy) -> tuple[list[Paper], ListRecordsParser]:
+        """请求并解析一页, 不重试。HTTP错误会抛出带`status`和Retry-After头的aiohttp.ClientResponseError"""
+        self.requests += 1
+        async with session.get(
+            self.base_url, params=params, proxy=proxy, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as response:
+            response.raise_for_status()
+            parser = ListRecordsParser()
+            papers = []
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                papers.extend(parser.feed(chunk))
+            papers.extend(parser.close())
+            return papers, parser
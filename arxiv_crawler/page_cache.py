@@ -0,0 +1,147 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from env_utils import env_float
+
+
+class PageCacheMiss(Exception):
+    """replay模式下请求了缓存中不存在的页面"""
+
+    # 重试也不会命中, 调度器据此直接放弃该页
+    retryable = False
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    fetched_at: float  # UTC时间戳
+    sha256: str  # 页面内容的哈希, 同时也是blob的文件名
+    size: int
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class PageCache:
+    """
+    搜索结果页的磁盘缓存
+
+    目录结构:
+        blobs/<sha256前两位>/<sha256>.html.gz   gzip压缩的页面内容, 按内容寻址, 相同内容只存一份
+        index/<url的sha256>.jsonl               该url每次抓取的记录(时间、内容哈希、ETag/Last-Modified), 追加写
+
+    mode:
+        - off: 不使用缓存(PAGE_CACHE_MODE的默认值)
+        - record: 总是请求网络, 并把每个页面写入缓存; 缓存不会自动清理, 只在需要录制(如bench_crawl回放)时开启
+        - revalidate: 带上If-None-Match/If-Modified-Since请求, 返回304时使用缓存
+        - ttl: 缓存未超过ttl秒时直接使用, 不请求网络
+        - replay: 完全离线, 只从缓存读取, 缓存缺失时抛出PageCacheMiss
+    """
+
+    MODES = ("off", "record", "revalidate", "ttl", "replay")
+
+    def __init__(self, cache_dir: str | Path = "./page_cache", mode: str = "record", ttl: float = 3600):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown page cache mode: {mode}, available: {self.MODES}")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "PageCache":
+        """使用PAGE_CACHE_MODE、PAGE_CACHE_DIR、PAGE_CACHE_TTL构造"""
+        mode = os.environ.get("PAGE_CACHE_MODE", "off").strip().lower() or "off"
+        return cls(os.environ.get("PAGE_CACHE_DIR", "./page_cache"), mode, env_float("PAGE_CACHE_TTL", 3600))
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @staticmethod
+    def _hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _index_path(self, url: str) -> Path:
+        return self.cache_dir / "index" / f"{self._hash(url.encode('utf-8'))}.jsonl"
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.cache_dir / "blobs" / sha256[:2] / f"{sha256}.html.gz"
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """返回该url最近一次抓取的记录"""
+        index_path = self._index_path(url)
+        if not index_path.exists():
+            return None
+        lines = index_path.read_text(encoding="utf-8").splitlines()
+        for line in reversed(lines):
+            if line.strip():
+                entry = CacheEntry(**json.loads(line))
+                if self._blob_path(entry.sha256).exists():
+                    return entry
+        return None
+
+    def history(self, url: str) -> list[CacheEntry]:
+        """返回该url所有的抓取记录, 按时间先后排列"""
+        index_path = self._index_path(url)
+        if not index_path.exists():
+            return []
+        return [
+            CacheEntry(**json.loads(line))
+            for line in index_path.read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+
+    def read(self, entry: CacheEntry) -> str:
+        return gzip.decompress(self._blob_path(entry.sha256).read_bytes()).decode("utf-8")
+
+    def store(self, url: str, content: str, etag: str | None = None, last_modified: str | None = None) -> CacheEntry:
+        data = content.encode("utf-8")
+        entry = CacheEntry(
+            url=url,
+            fetched_at=time.time(),
+            sha256=self._hash(data),
+            size=len(data),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        blob_path = self._blob_path(entry.sha256)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再改名, 避免中断时留下损坏的blob
+            tmp_path = blob_path.with_suffix(".tmp")
+            tmp_path.write_bytes(gzip.compress(data, compresslevel=6))
+            tmp_path.replace(blob_path)
+        self._append_index(entry)
+        return entry
+
+    def touch(self, entry: CacheEntry) -> CacheEntry:
+        """服务端确认(304)缓存仍然有效时, 追加一条新的抓取记录"""
+        refreshed = CacheEntry(**{**asdict(entry), "fetched_at": time.time()})
+        self._append_index(refreshed)
+        return refreshed
+
+    def _append_index(self, entry: CacheEntry):
+        index_path = self._index_path(entry.url)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry | None) -> dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Iterable
+
+from rich.console import Console
+
+from env_utils import env_float, env_int
+from rate_limit import TokenBucket
+from retry_policy import retry_after_of
+
+# arXiv限流时返回的状态码
+THROTTLE_STATUSES = {429, 503}
+
+
+class PageScheduler:
+    """
+    fetch_all的分页调度器: 有界worker池 + 令牌桶限速 + AIMD自适应并发
+
+    - 同时在途的请求数不超过`concurrency`, 它会在[min_concurrency, max_concurrency]之间自适应变化
+    - 请求成功且延迟低于`latency_target`时, 每成功`concurrency`次并发加1, 令牌桶速率缓慢回升
+    - 遇到429/503时并发和速率减半, 延迟过高时并发减1
+    - 失败的页会被放回队尾(带退避延迟, 不短于Retry-After)重新请求, 超过`max_attempts`次才放弃; `retryable`为False的异常直接放弃
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[str]],
+        *,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 8,
+        rate: float = 4.0,
+        max_attempts: int = 6,
+        latency_target: float = 3.0,
+        console: Console | None = None,
+        on_dispatch: Callable[[int, float], None] | None = None,
+    ):
+        """
+        Args:
+            fetch: 单次请求一页的协程函数, 参数为start, 失败时抛出异常(带`status`属性的异常会被视作HTTP错误)
+            initial_concurrency (int, optional): 初始并发数. Defaults to 4.
+            min_concurrency (int, optional): 最小并发数. Defaults to 1.
+            max_concurrency (int, optional): 最大并发数, 也是worker数量. Defaults to 8.
+            rate (float, optional): 每秒最多发起的请求数, 也是令牌桶速率的上限. Defaults to 4.0.
+            max_attempts (int, optional): 每页最多请求次数. Defaults to 6.
+            latency_target (float, optional): 期望的单页延迟(秒), 超过两倍时视为过载. Defaults to 3.0.
+            on_dispatch (callable, optional): 每次真正发出请求前调用on_dispatch(start, 排队等待秒数), 用于统计. Defaults to None.
+        """
+        self.fetch = fetch
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.max_rate = rate
+        self.min_rate = rate / 16
+        self.bucket = TokenBucket(rate, burst=self.concurrency)
+        self.max_attempts = max_attempts
+        self.latency_target = latency_target
+        self.console = console or Console()
+        self.on_dispatch = on_dispatch
+
+        self.failed_starts: list[int] = []
+        self.stats = Counter()
+        self._active = 0
+        self._successes_since_increase = 0
+        self._cond: asyncio.Condition | None = None
+        self._page_error: Exception | None = None
+        self._stopped: asyncio.Event | None = None
+
+    @classmethod
+    def from_env(cls, fetch, console: Console | None = None, on_dispatch=None) -> "PageScheduler":
+        """使用FETCH_*环境变量构造调度器"""
+        return cls(
+            fetch,
+            initial_concurrency=env_int("FETCH_CONCURRENCY", 4),
+            min_concurrency=env_int("FETCH_MIN_CONCURRENCY", 1),
+            max_concurrency=env_int("FETCH_MAX_CONCURRENCY", 8),
+            rate=env_float("FETCH_RATE", 4.0),
+            max_attempts=env_int("FETCH_MAX_ATTEMPTS", 6),
+            latency_target=env_float("FETCH_LATENCY_TARGET", 3.0),
+            console=console,
+            on_dispatch=on_dispatch,
+        )
+
+    async def run(self, starts: Iterable[int], on_page: Callable[[int, str], Awaitable[None]]) -> list[int]:
+        """
+        请求所有`starts`对应的页面, 每成功一页就调用一次`on_page(start, content)`(完成顺序不保证)
+
+        Returns:
+            list[int]: 本次运行中重试次数耗尽后仍失败的start
+        """
+        self._cond = asyncio.Condition()
+        self._page_error = None
+        self._stopped = asyncio.Event()
+        failed_before = len(self.failed_starts)
+        queue: asyncio.Queue = asyncio.Queue()
+        now = time.monotonic()
+        for start in starts:
+            queue.put_nowait((start, 0, now))
+        if queue.empty():
+            return []
+
+        workers = [asyncio.create_task(self._worker(queue, on_page)) for _ in range(self.max_concurrency)]
+        # 所有页处理完, 或某个worker的on_page出错时结束; 出错后队列里剩下的页不再处理
+        waiters = [asyncio.create_task(queue.join()), asyncio.create_task(self._stopped.wait())]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in workers + waiters:
+                task.cancel()
+            await asyncio.gather(*workers, *waiters, return_exceptions=True)
+        # on_page中的异常不属于网络错误, 不重试, 停止所有worker后抛出
+        if self._page_error is not None:
+            raise self._page_error
+
+        self.console.log(
+            f"[bold cyan]Scheduler: {self.stats['success']} pages ok, {self.stats['retry']} requeued, "
+            f"{self.stats['throttled']} throttled, {len(self.failed_starts)} failed; "
+            f"final concurrency={self.concurrency}, rate={self.bucket.rate:.2f}/s"
+        )
+        return sorted(self.failed_starts[failed_before:])
+
+    async def _worker(self, queue: asyncio.Queue, on_page):
+        while True:
+            start, attempt, ready_at = await queue.get()
+            try:
+                delay = ready_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                content = None
+                await self._acquire_slot()
+                try:
+                    await self.bucket.acquire()
+                    begin = time.monotonic()
+                    if self.on_dispatch is not None:
+                        self.on_dispatch(start, begin - ready_at)
+                    content = await self.fetch(start)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._on_failure(start, attempt, e, queue)
+                else:
+                    self._on_success(time.monotonic() - begin)
+                finally:
+                    # 先调整并发再释放, 让等待中的worker按新的并发上限判断
+                    await self._release_slot()
+                if content is not None:
+                    try:
+                        await on_page(start, content)
+                    except Exception as e:
+                        self._page_error = self._page_error or e
+                        self._stopped.set()
+                        return
+            finally:
+                queue.task_done()
+
+    async def _acquire_slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.concurrency)
+            self._active += 1
+
+    async def _release_slot(self):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _on_success(self, latency: float):
+        self.stats["success"] += 1
+        if latency > 2 * self.latency_target:
+            self._set_concurrency(self.concurrency - 1)
+            self._successes_since_increase = 0
+            return
+        if latency <= self.latency_target:
+            self._successes_since_increase += 1
+            if self._successes_since_increase >= self.concurrency:
+                self._successes_since_increase = 0
+                self._set_concurrency(self.concurrency + 1)
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate * 1.1))
+
+    def _on_failure(self, start: int, attempt: int, error: Exception, queue: asyncio.Queue):
+        status = getattr(error, "status", None)
+        throttled = status in THROTTLE_STATUSES
+        if throttled:
+            self.stats["throttled"] += 1
+            self._set_concurrency(self.concurrency // 2)
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+        self._successes_since_increase = 0
+
+        attempt += 1
+        if attempt >= self.max_attempts or not getattr(error, "retryable", True):
+            self.failed_starts.append(start)
+            self.console.log(f"[bold red]Page start={start} failed after {attempt} attempts: {error!r}")
+            return
+        # 放回队尾, 并按失败次数指数退避; 服务端给出Retry-After(或熔断冷却时间)时至少等待这么久
+        self.stats["retry"] += 1
+        backoff = max(min(30.0, 0.5 * 2**attempt), retry_after_of(error) or 0.0)
+        queue.put_nowait((start, attempt, time.monotonic() + backoff))
+        self.console.log(
+            f"[bold yellow]Page start={start} failed ({status or type(error).__name__}), "
+            f"requeued {attempt}/{self.max_attempts}, concurrency={self.concurrency}"
+        )
+
+    def _set_concurrency(self, value: int):
+        self.concurrency = min(max(value, self.min_concurrency), self.max_concurrency)
@@ -1,13 +1,16 @@
 import asyncio
 import csv
 import sqlite3
+import time
 from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass, fields
 from datetime import datetime, timedelta, UTC
 from pathlib import Path
 
 from rich.console import Console
-from typing_extensions import Iterable
+from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
+from typing_extensions import Iterable, Iterator
 
 import sys
 import os
@@ -15,11 +18,25 @@ import os
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from async_translator import async_translate
+from async_translator import BatchTranslator
 from categories import parse_categories
+from db_connection import ConnectionManager
+from db_migrations import migrate
+from env_utils import env_int
 
 
 
+# 缺少译文的文章: 已有译文的一栏取NULL, 不再翻译
+_MISSING_TRANSLATION_COLUMNS = """
+    CASE WHEN title_translated IS NULL THEN title END AS title_source,
+    CASE WHEN abstract_translated IS NULL THEN abstract END AS abstract_source
+"""
+_MISSING_TRANSLATION_FILTER = "(title_translated IS NULL OR abstract_translated IS NULL)"
+
+# IN查询每批的参数个数, 旧版SQLite默认最多999个参数
+_IN_CHUNK = 900
+
+
 @dataclass
 class Paper:
     first_submitted_date: datetime
@@ -143,9 +160,18 @@ class Paper:
 
 """
 
-    async def translate(self, langto="zh-CN"):
-        self.title_translated = await async_translate(self.title, langto=langto)
-        self.abstract_translated = await async_translate(self.abstract, langto=langto)
+    async def translate(self, langto="zh-CN", translator: BatchTranslator | None = None):
+        """
+        翻译标题和摘要, 两段文本在同一个请求中发出
+
+        Args:
+            translator (BatchTranslator, optional): 共享的翻译器, 批量翻译多篇文章时应使用ArxivScraper.translate.
+                Defaults to None, 即临时创建一个.
+        """
+        if translator is None:
+            async with BatchTranslator(langto=langto) as translator:
+                return await self.translate(langto, translator)
+        self.title_translated, self.abstract_translated = await translator.translate_many([self.title, self.abstract])
 
 
 @dataclass
@@ -165,9 +191,20 @@ class PaperRecord:
 
 class PaperDatabase:
     def __init__(self, db_path="papers.db"):
-        self.conn = sqlite3.connect(db_path)
+        # 同一进程内打开同一个文件的PaperDatabase(如ArxivScraper和它的PaperExporter)共用一个写连接和只读连接池, 见db_connection
+        self.manager = ConnectionManager.for_path(db_path)
+        self.conn = self.manager.writer
         self.conn.row_factory = self._row_factory
         self._create_table()
+        # 可选的内存url索引, 见warm_url_index
+        self._url_index: set[str] | None = None
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """借出一个只读连接, 行同样转换成Paper; 导出等只读查询使用它, 不会与写入互相阻塞"""
+        with self.manager.reader() as conn:
+            conn.row_factory = self._row_factory
+            yield conn
 
     @staticmethod
     def _row_factory(cursor, row):
@@ -210,56 +247,8 @@ class PaperDatabase:
                 )
             """
             )
-            
-            # 检查并添加缺失的列
-            self._add_missing_columns()
-    
-    def _add_missing_columns(self):
-        """
-        检查并添加缺失的列，确保数据库表结构与代码一致
-        """
-        with self.conn:
-            # 获取当前表结构
-            cursor = self.conn.execute("PRAGMA table_info(papers)")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            # 处理ID列
-            if "id" not in columns:
-                # 添加允许NULL的列，然后更新现有数据
-                self.conn.execute("ALTER TABLE papers ADD COLUMN id TEXT")
-                # 更新现有数据，使用正确的SQLite函数提取URL的最后一部分作为论文ID
-                self.conn.execute("UPDATE papers SET id = SUBSTR(url, INSTR(url, 'abs/') + 4)")
-                print("Added missing column: id")
-            
-            # 处理pdf列
-            if "pdf" not in columns:
-                # 添加允许NULL的列，然后更新现有数据
-                self.conn.execute("ALTER TABLE papers ADD COLUMN pdf TEXT")
-                # 更新现有数据
-                self.conn.execute("UPDATE papers SET pdf = REPLACE(url, 'https://arxiv.org/abs', 'https://arxiv.org/pdf')")
-                print("Added missing column: pdf")
-            
-            # 处理summary列
-            if "summary" not in columns:
-                # 添加允许NULL的列，然后更新现有数据
-                self.conn.execute("ALTER TABLE papers ADD COLUMN summary TEXT")
-                # 更新现有数据
-                self.conn.execute("UPDATE papers SET summary = abstract")
-                print("Added missing column: summary")
-            
-            # 处理其他普通列
-            other_columns = {
-                "title_translated": "TEXT",
-                "abstract_translated": "TEXT",
-                "ai_content": "TEXT"
-            }
-            
-            for column_name, column_type in other_columns.items():
-                if column_name not in columns:
-                    self.conn.execute(
-                        f"ALTER TABLE papers ADD COLUMN {column_name} {column_type}"
-                    )
-                    print(f"Added missing column: {column_name}")
+        # 旧数据库补齐列、建立索引等结构变化, 见db_migrations
+        migrate(self.conn)
 
     def add_papers(self, papers: Iterable[Paper]):
         import json
@@ -288,32 +277,75 @@ class PaperDatabase:
             ]
             self.conn.executemany(
                 """
-                INSERT OR REPLACE INTO papers 
+                INSERT INTO papers 
                 (url, id, pdf, authors, title_translated, first_submitted_date, first_announced_date, update_time, categories, title, comments, abstract, summary, abstract_translated, ai_content)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                -- 重新爬取已有的文章时整行覆盖, 但保留已有的译文: 翻译在入库之后单独进行, 见translate_missing
+                ON CONFLICT(url) DO UPDATE SET
+                    id = excluded.id, pdf = excluded.pdf, authors = excluded.authors,
+                    title_translated = COALESCE(excluded.title_translated, papers.title_translated),
+                    first_submitted_date = excluded.first_submitted_date,
+                    first_announced_date = excluded.first_announced_date,
+                    update_time = excluded.update_time, categories = excluded.categories, title = excluded.title,
+                    comments = excluded.comments, abstract = excluded.abstract, summary = excluded.summary,
+                    abstract_translated = COALESCE(excluded.abstract_translated, papers.abstract_translated),
+                    ai_content = excluded.ai_content
                 """,
                 data_to_insert,
             )
+        if self._url_index is not None:
+            self._url_index.update(paper.url for paper in papers)
 
     def count_new_papers(self, papers: Iterable[Paper]) -> int:
-        cnt = 0
-        for paper in papers:
-            with self.conn:
-                cursor = self.conn.execute(
-                    """
-                    SELECT * FROM papers WHERE url = ?
-                    """,
-                    (paper.url,),
-                )
-                if cursor.fetchone():
-                    break
-                else:
-                    cnt += 1
-        return cnt
+        """
+        papers按从新到旧排列, 返回第一篇已入库的文章之前有多少篇新文章, 整批只做一次存在性检查
+        """
+        papers = list(papers)
+        known = self.known_urls(paper.url for paper in papers)
+        for cnt, paper in enumerate(papers):
+            if paper.url in known:
+                return cnt
+        return len(papers)
+
+    def _known_values(self, column: str, values: Iterable[str]) -> set[str]:
+        """返回values中在column列已存在的值, 每_IN_CHUNK个值一条IN查询(column只能是代码中的列名)"""
+        values = list(dict.fromkeys(values))
+        known = set()
+        for i in range(0, len(values), _IN_CHUNK):
+            chunk = values[i : i + _IN_CHUNK]
+            cursor = self.conn.execute(
+                f"SELECT {column} FROM papers WHERE {column} IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(row[0] for row in cursor)
+        return known
+
+    def known_urls(self, urls: Iterable[str]) -> set[str]:
+        """
+        返回urls中已经存在于数据库的url; 预热了内存索引(warm_url_index)时不查库, 否则每批一次查询
+        """
+        if self._url_index is not None:
+            return {url for url in urls if url in self._url_index}
+        return self._known_values("url", urls)
+
+    def known_ids(self, ids: Iterable[str]) -> set[str]:
+        """返回ids中已经存在于数据库的论文ID, 每批一次查询(id列有索引)"""
+        return self._known_values("id", ids)
+
+    def warm_url_index(self) -> int:
+        """
+        把所有url读入内存, 之后known_urls/count_new_papers直接查集合。
+        索引只跟踪通过本实例的add_papers/delete_papers_on_date的变化, 其他连接写入的文章会被当作新文章,
+        增量爬取时最多多翻几页, 不会漏掉文章
+
+        Returns:
+            int: 索引中的url数
+        """
+        self._url_index = {row[0] for row in self.conn.execute("SELECT url FROM papers")}
+        return len(self._url_index)
 
     def fetch_papers_on_date(self, date: datetime) -> list[Paper]:
-        with self.conn:
-            cursor = self.conn.execute(
+        with self._reader() as conn:
+            cursor = conn.execute(
                 """
                 SELECT * FROM papers WHERE first_announced_date = ?
                 """,
@@ -321,6 +353,29 @@ class PaperDatabase:
             )
             return cursor.fetchall()
 
+    def fetch_papers_in_range(self, date_from: datetime, date_until: datetime) -> dict[str, list[Paper]]:
+        """
+        一次查询[date_from, date_until]内公布的文章
+
+        Returns:
+            dict[str, list[Paper]]: 按公布日期("%Y-%m-%d")分组, 同一天内的顺序与fetch_papers_on_date相同(写入顺序)
+        """
+        papers_by_date = defaultdict(list)
+        with self._reader() as conn:
+            cursor = conn.execute(
+                """
+                SELECT * FROM papers WHERE first_announced_date BETWEEN ? AND ? ORDER BY first_announced_date, rowid
+                """,
+                (date_from.strftime("%Y-%m-%d"), date_until.strftime("%Y-%m-%d")),
+            )
+            for paper in cursor:
+                if isinstance(paper, Paper):
+                    announced_date = paper.first_announced_date.strftime("%Y-%m-%d")
+                else:
+                    announced_date = str(paper["first_announced_date"])[:10]
+                papers_by_date[announced_date].append(paper)
+        return dict(papers_by_date)
+
     def count_papers_on_date(self, date: datetime) -> int:
         with self.conn:
             cursor = self.conn.execute(
@@ -340,7 +395,9 @@ class PaperDatabase:
                 """,
                 (date.strftime("%Y-%m-%d"),),
             )
-            return cursor.rowcount
+        if self._url_index is not None and cursor.rowcount:
+            self.warm_url_index()
+        return cursor.rowcount
     
     def fetch_jsonl_data_on_date(self, date: datetime) -> list[dict]:
         """
@@ -354,8 +411,8 @@ class PaperDatabase:
         """
         import re
         
-        with self.conn:
-            cursor = self.conn.execute(
+        with self._reader() as conn:
+            cursor = conn.execute(
                 """
                 SELECT * FROM papers WHERE first_announced_date = ?
                 """,
@@ -400,6 +457,42 @@ class PaperDatabase:
             )
             return cursor.fetchall()
 
+    def iter_announcement_batches(self, batch_size: int = 5000) -> Iterator[list[sqlite3.Row]]:
+        """
+        按url升序(与fetch_all相反, 即从旧到新)分批产出推断公布日期所需的列, 用url做键集分页,
+        每批都是一次独立的小查询, 内存占用与表大小无关, 批次之间也可以安全地更新表
+
+        Yields:
+            list[sqlite3.Row]: 每行包含url、paper_title、first_submitted_date、first_announced_date
+        """
+        last_url = ""
+        while True:
+            rows = self.conn.execute(
+                """
+                -- title取别名, 否则_row_factory会把同时带url和title的行当作完整的论文行转换
+                SELECT url, title AS paper_title, first_submitted_date, first_announced_date FROM papers
+                WHERE url > ? ORDER BY url LIMIT ?
+                """,
+                (last_url, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_url = rows[-1][0]
+
+    def update_announced_dates(self, changes: Iterable[tuple[str, str]]):
+        """
+        只更新首次公布日期, 不改动其他列和update_time
+
+        Args:
+            changes (Iterable[tuple[str, str]]): (url, 新的首次公布日期"%Y-%m-%d")
+        """
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE papers SET first_announced_date = ? WHERE url = ?",
+                [(announced_date, url) for url, announced_date in changes],
+            )
+
     def newest_update_time(self) -> datetime:
         """
         最新更新时间是“上一次爬取最新论文的时间”
@@ -424,23 +517,139 @@ class PaperDatabase:
                 # 当没有有效的update_time时，返回当前时间减去30天
                 return datetime.now(UTC).replace(tzinfo=None) - timedelta(days=30)
 
-    async def translate_missing(self, langto="zh-CN"):
+    def missing_translations(self, urls: Iterable[str] | None = None) -> list[tuple[str, str | None, str | None]]:
+        """
+        缺少译文的文章
+
+        Args:
+            urls (Iterable[str] | None, optional): 只在这些文章中查找. Defaults to None, 即整个数据库.
+
+        Returns:
+            list[tuple[str, str | None, str | None]]: (url, 待翻译的标题, 待翻译的摘要), 已有译文的一栏为None
+        """
+        query = f"SELECT url, {_MISSING_TRANSLATION_COLUMNS} FROM papers WHERE {_MISSING_TRANSLATION_FILTER}"
+        if urls is None:
+            return [tuple(row) for row in self.conn.execute(query)]
+        urls = list(dict.fromkeys(urls))
+        rows = []
+        for i in range(0, len(urls), _IN_CHUNK):
+            chunk = urls[i : i + _IN_CHUNK]
+            rows += self.conn.execute(f"{query} AND url IN ({','.join('?' * len(chunk))})", chunk)
+        return [tuple(row) for row in rows]
+
+    def save_translations(self, translations: Iterable[tuple[str, str | None, str | None]]):
+        """
+        写入(url, 标题译文, 摘要译文), 只填充原本为NULL的一栏, 不改动update_time
+        """
         with self.conn:
-            cursor = self.conn.execute(
-                "SELECT url, title, abstract FROM papers WHERE title_translated IS NULL OR abstract_translated IS NULL"
+            self.conn.executemany(
+                """
+                UPDATE papers SET title_translated = COALESCE(title_translated, ?),
+                                  abstract_translated = COALESCE(abstract_translated, ?)
+                WHERE url = ?
+                """,
+                [(title, abstract, url) for url, title, abstract in translations],
             )
-            papers = cursor.fetchall()
 
-        async def worker(url, title, abstract):
-            title_translated = await async_translate(title, langto=langto) if title else None
-            abstract_translated = await async_translate(abstract, langto=langto) if abstract else None
-            with self.conn:
-                self.conn.execute(
-                    "UPDATE papers SET title_translated = ?, abstract_translated = ? WHERE url = ?",
-                    (title_translated, abstract_translated, url),
-                )
+    def count_missing_translations(self) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM papers WHERE {_MISSING_TRANSLATION_FILTER}").fetchone()[0]
 
-        await asyncio.gather(*[worker(url, title, abstract) for url, title, abstract in papers])
+    def iter_missing_translations(self, batch_size: int = 200) -> Iterator[list[tuple[int, str, str | None, str | None]]]:
+        """
+        按rowid键集分页, 分批产出缺少译文的文章(rowid, url, 待翻译的标题, 待翻译的摘要)。
+        每批都重新查询, 期间写入译文不影响分页, 本次运行中翻译失败的文章也不会被重复产出
+        """
+        last_rowid = 0
+        while True:
+            rows = self.conn.execute(
+                f"""
+                SELECT rowid, url, {_MISSING_TRANSLATION_COLUMNS} FROM papers
+                WHERE {_MISSING_TRANSLATION_FILTER} AND rowid > ?
+                ORDER BY rowid LIMIT ?
+                """,
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            last_rowid = rows[-1][0]
+
+    async def translate_missing(
+        self,
+        langto="zh-CN",
+        translator: BatchTranslator | None = None,
+        batch_size: int | None = None,
+        workers: int | None = None,
+        console: Console | None = None,
+    ) -> int:
+        """
+        回填整个数据库中缺少的译文, 只翻译为NULL的标题/摘要。
+
+        按rowid分页读取, 每页交给有界的worker池翻译(同时在内存中的最多约2*workers页), 每页翻译完后在一个事务中写入;
+        中断后重新运行即可继续, 已写入的文章不再是NULL, 不会被再次选中。显示进度、速度和预计剩余时间
+
+        Args:
+            translator (BatchTranslator | None, optional): 共享的翻译器. Defaults to None, 即临时创建一个.
+            batch_size (int | None, optional): 每页的文章数. Defaults to 环境变量TRANSLATE_MISSING_BATCH或200.
+            workers (int | None, optional): 同时翻译的页数. Defaults to 环境变量TRANSLATE_MISSING_WORKERS或4.
+
+        Returns:
+            int: 处理的文章数
+        """
+        total = self.count_missing_translations()
+        if not total:
+            return 0
+        if translator is None:
+            async with BatchTranslator(langto=langto) as translator:
+                return await self.translate_missing(langto, translator, batch_size, workers, console)
+
+        batch_size = batch_size or env_int("TRANSLATE_MISSING_BATCH", 200)
+        workers = max(1, workers or env_int("TRANSLATE_MISSING_WORKERS", 4))
+        console = console or Console()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        begin = time.monotonic()
+        done = 0
+
+        with Progress(
+            SpinnerColumn(),
+            *Progress.get_default_columns(),
+            TimeElapsedColumn(),
+            console=console,
+            transient=False,
+        ) as p:
+            task = p.add_task(description=f"[bold green]Translating {total} papers", total=total)
+
+            async def produce():
+                for rows in self.iter_missing_translations(batch_size):
+                    await queue.put(rows)
+                for _ in range(workers):
+                    await queue.put(None)
+
+            async def worker():
+                nonlocal done
+                while (rows := await queue.get()) is not None:
+                    texts = [text for _, _, title, abstract in rows for text in (title, abstract)]
+                    results = await translator.translate_many(texts)
+                    self.save_translations(
+                        (url, results[2 * i], results[2 * i + 1]) for i, (_, url, _, _) in enumerate(rows)
+                    )
+                    done += len(rows)
+                    rate = done / (time.monotonic() - begin)
+                    p.update(task, advance=len(rows), description=f"[bold green]Translating {total} papers, {rate:.1f}/s")
+
+            tasks = [asyncio.create_task(produce())] + [asyncio.create_task(worker()) for _ in range(workers)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for t in tasks:
+                    t.cancel()
+
+        elapsed = time.monotonic() - begin
+        console.log(
+            f"[bold cyan]Translated {done} papers in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} papers/s); "
+            f"{translator.stats.summary()}; {self.count_missing_translations()} still missing"
+        )
+        return done
 
 
 class PaperExporter:
@@ -460,6 +669,15 @@ class PaperExporter:
         self.categories_whitelist = set(categories_whitelist)
         self.console = Console()
 
+    def _papers_by_day(self):
+        """
+        按日期顺序产出区间内的每一天和当天公布的文章, 整个区间只查询一次数据库
+        """
+        papers_by_date = self.db.fetch_papers_in_range(self.date_from, self.date_until)
+        for i in range(self.date_range_days):
+            current = self.date_from + timedelta(days=i)
+            yield current, papers_by_date.get(current.strftime("%Y-%m-%d"), [])
+
     def filter_papers(self, papers: list[Paper]) -> tuple[list[PaperRecord], list[PaperRecord]]:
         filtered_paper_records = []
         chosen_paper_records = []
@@ -478,12 +696,10 @@ class PaperExporter:
     def to_markdown(self, output_dir="./output_md", filename_format="%Y-%m-%d", metadata=None):
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True, parents=True)
-        for i in range(self.date_range_days):
-            current = self.date_from + timedelta(days=i)
+        for current, papers in self._papers_by_day():
             current_filename = current.strftime(filename_format)
 
             with open(output_dir / f"{current_filename}.md", "w", encoding="utf-8") as file:
-                papers = self.db.fetch_papers_on_date(current)
                 chosen_records, filtered_records = self.filter_papers(papers)
                 papers_str = f"# 论文全览：{current_filename}\n\n共有{len(chosen_records)}篇相关领域论文, 另有{len(filtered_records)}篇其他\n\n"
 
@@ -563,8 +779,7 @@ class PaperExporter:
 
         headers = list(csv_table.keys())
 
-        for i in range(self.date_range_days):
-            current = self.date_from + timedelta(days=i)
+        for current, papers in self._papers_by_day():
             current_filename = current.strftime(filename_format)
 
             with open(output_dir / f"{current_filename}.csv", "w", encoding="utf-8") as file:
@@ -574,7 +789,6 @@ class PaperExporter:
                 if header:
                     writer.writerow(headers)
 
-                papers = self.db.fetch_papers_on_date(current)
                 chosen_records, filtered_records = self.filter_papers(papers)
                 for record in chosen_records + filtered_records:
                     writer.writerow([fn(record) for fn in csv_table.values()])
@@ -596,12 +810,10 @@ class PaperExporter:
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True, parents=True)
 
-        for i in range(self.date_range_days):
-            current = self.date_from + timedelta(days=i)
+        for current, papers in self._papers_by_day():
             current_filename = current.strftime(filename_format)
 
             with open(output_dir / f"{current_filename}.jsonl", "w", encoding="utf-8") as file:
-                papers = self.db.fetch_papers_on_date(current)
                 # 应用过滤逻辑，只导出符合白名单条件的论文
                 chosen_records, filtered_records = self.filter_papers(papers)
                 # 只使用符合白名单条件的论文
@@ -635,14 +847,12 @@ class PaperExporter:
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True, parents=True)
 
-        for i in range(self.date_range_days):
-            current = self.date_from + timedelta(days=i)
+        for current, papers in self._papers_by_day():
             current_filename = current.strftime(filename_format)
             
             # 先导出原始JSONL数据（应用过滤逻辑）
             temp_file = output_dir / f"{current_filename}.jsonl"
             with open(temp_file, "w", encoding="utf-8") as file:
-                papers = self.db.fetch_papers_on_date(current)
                 # 应用过滤逻辑，只导出符合白名单条件的论文
                 chosen_records, filtered_records = self.filter_papers(papers)
                 # 只使用符合白名单条件的论文
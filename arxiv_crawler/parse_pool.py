@@ -0,0 +1,57 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from env_utils import env_int
+from paper import Paper
+from search_parser import parse_search_page
+
+
+class ParsePool:
+    """
+    把搜索结果页的解析放到进程池(或线程池)中执行, 事件循环只负责网络I/O
+
+    mode:
+        - process: ProcessPoolExecutor, 解析是纯CPU工作, 多核时可线性扩展
+        - thread: ThreadPoolExecutor, 适合解析器释放GIL的场景(如lxml)或无法fork的环境
+        - inline: 直接在事件循环里解析, 与原来的行为一致
+    """
+
+    MODES = ("process", "thread", "inline")
+
+    def __init__(self, backend: str, mode: str = "process", workers: int | None = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown parse executor: {mode}, available: {self.MODES}")
+        self.backend = backend
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # 只有一个worker时没有并行收益, 退化为inline
+        self.mode = "inline" if self.workers == 1 and mode == "process" else mode
+        self._executor: Executor | None = None
+
+    @classmethod
+    def from_env(cls, backend: str) -> "ParsePool":
+        """使用PARSE_EXECUTOR(process/thread/inline)和PARSE_WORKERS构造"""
+        mode = os.environ.get("PARSE_EXECUTOR", "process").strip().lower() or "process"
+        return cls(backend, mode, env_int("PARSE_WORKERS", 0) or None)
+
+    def __enter__(self):
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, content: str) -> tuple[int | None, list[Paper]]:
+        """解析一个页面, 返回(结果总数, 本页的文章)"""
+        if self._executor is None:
+            return parse_search_page(content, self.backend)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, parse_search_page, content, self.backend)
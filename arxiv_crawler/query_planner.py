@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from env_utils import env_int
+from paper import Paper
+
+
+@dataclass(frozen=True)
+class QueryShard:
+    """一个独立的搜索分片: 一组关键词(OR) × 一个日期窗口[date_from, date_until)"""
+
+    keywords: tuple[str, ...]
+    date_from: datetime
+    date_until: datetime
+    date_type: str | None = None  # 窗口过滤的日期类型, None表示爬虫默认的首次公布日期
+
+    @property
+    def days(self) -> int:
+        return (self.date_until - self.date_from).days
+
+    @property
+    def label(self) -> str:
+        last_day = self.date_until - timedelta(days=1)
+        return f"{self.date_from.strftime('%Y-%m-%d')}~{last_day.strftime('%Y-%m-%d')} [{','.join(self.keywords)}]"
+
+    def split(self) -> list["QueryShard"]:
+        """
+        结果数超过上限时拆分: 优先把日期窗口一分为二, 只剩一天时再把关键词一分为二。
+        已经是单个关键词、单日的分片无法再拆, 返回空列表
+        """
+        if self.days > 1:
+            middle = self.date_from + timedelta(days=self.days // 2)
+            return [
+                QueryShard(self.keywords, middle, self.date_until, self.date_type),
+                QueryShard(self.keywords, self.date_from, middle, self.date_type),
+            ]
+        if len(self.keywords) > 1:
+            middle = len(self.keywords) // 2
+            return [
+                QueryShard(self.keywords[:middle], self.date_from, self.date_until, self.date_type),
+                QueryShard(self.keywords[middle:], self.date_from, self.date_until, self.date_type),
+            ]
+        return []
+
+
+class QueryPlanner:
+    """
+    把fetch_all的一个大查询(所有关键词 × 整月)拆成互相独立的分片, 可以并发请求,
+    并且每个分片的结果数都不超过arXiv搜索允许翻到的深度(result_cap)
+    """
+
+    def __init__(self, window_days: int = 7, keyword_groups: int = 1, result_cap: int = 10000):
+        self.window_days = max(1, window_days)
+        self.keyword_groups = max(1, keyword_groups)
+        self.result_cap = result_cap
+
+    @classmethod
+    def from_env(cls) -> "QueryPlanner":
+        """使用SHARD_WINDOW_DAYS、SHARD_KEYWORD_GROUPS、SEARCH_RESULT_CAP构造"""
+        default = cls()
+        return cls(
+            window_days=env_int("SHARD_WINDOW_DAYS", default.window_days),
+            keyword_groups=env_int("SHARD_KEYWORD_GROUPS", default.keyword_groups),
+            result_cap=env_int("SEARCH_RESULT_CAP", default.result_cap),
+        )
+
+    def plan(
+        self, keywords: list[str], date_from: datetime, date_until: datetime, date_type: str | None = None
+    ) -> list[QueryShard]:
+        """
+        Args:
+            date_type (str | None, optional): 分片窗口过滤的日期类型. 按公布日期搜索只精确到月,
+                按天/周的窗口需要使用submitted_date_first. Defaults to None.
+
+        Returns:
+            list[QueryShard]: 日期窗口从新到旧排列, 同一窗口内按关键词分组排列
+        """
+        groups = min(self.keyword_groups, max(1, len(keywords)))
+        size = -(-len(keywords) // groups) if keywords else 0
+        keyword_groups = [tuple(keywords[i : i + size]) for i in range(0, len(keywords), size)] if keywords else [()]
+
+        windows = []
+        window_from = date_from
+        while window_from < date_until:
+            window_until = min(window_from + timedelta(days=self.window_days), date_until)
+            windows.append((window_from, window_until))
+            window_from = window_until
+        return [QueryShard(group, *window, date_type) for window in reversed(windows) for group in keyword_groups]
+
+
+def merge_shard_results(results: list[tuple[QueryShard, list[Paper]]]) -> list[Paper]:
+    """
+    合并各分片的结果并按id去重, 输出与单个大查询相同的顺序(公布日期降序)
+
+    分片之间按日期窗口排序(提交日期越晚公布日期也越晚), 窗口相同时按首次提交日期降序; 排序是稳定的,
+    因此同一分片内搜索结果原有的先后顺序保持不变。同一篇文章出现在多个分片中时, 保留窗口最窄的那一次
+    """
+    best: dict[str, tuple[QueryShard, int, Paper]] = {}
+    for shard, papers in results:
+        for position, paper in enumerate(papers):
+            seen = best.get(paper.id)
+            if seen is None or shard.days < seen[0].days:
+                best[paper.id] = (shard, position, paper)
+    ordered = sorted(best.values(), key=lambda item: item[1])
+    ordered.sort(key=lambda item: (item[0].date_from, item[2].first_submitted_date), reverse=True)
+    return [paper for _, _, paper in ordered]
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from env_utils import env_bool, env_float
+
+
+class TokenBucket:
+    """
+    异步令牌桶限速器
+
+    桶内最多存放`burst`个令牌, 以每秒`rate`个的速度补充, 每次请求消耗一个令牌。
+    `rate`可以在运行时调整, 用于根据服务端反馈做自适应限速。
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        """调整补充速度, 已积攒的令牌保留"""
+        self._refill()
+        self.rate = rate
+
+    async def acquire(self, tokens: float = 1.0):
+        """等待直到拿到`tokens`个令牌"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class AdaptiveRateLimiter:
+    """
+    带统计的令牌桶限速器, 用于翻译等没有调度器的后端
+
+    adaptive为True时按AIMD调整速率: 每次成功速率乘以1.1(不超过max_rate), 被限流(429/503)时减半,
+    其他错误时乘以0.8(都不低于min_rate)。这样吞吐量由服务端实际能承受的速度决定
+    """
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        burst: float | None = None,
+        adaptive: bool = True,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+    ):
+        """
+        Args:
+            rate (float, optional): 初始速率(每秒请求数). Defaults to 4.0.
+            burst (float | None, optional): 桶容量, 即最多允许的突发请求数. Defaults to max(1, rate).
+            adaptive (bool, optional): 是否根据成功/失败自适应调整速率. Defaults to True.
+            min_rate (float | None, optional): 自适应的速率下限. Defaults to rate / 16.
+            max_rate (float | None, optional): 自适应的速率上限. Defaults to rate * 4.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.adaptive = adaptive
+        self.min_rate = min_rate or rate / 16
+        self.max_rate = max(max_rate or rate * 4, rate)
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._started: float | None = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "TRANSLATE") -> "AdaptiveRateLimiter":
+        """使用<prefix>_RATE、<prefix>_BURST、<prefix>_ADAPTIVE、<prefix>_MIN_RATE、<prefix>_MAX_RATE构造"""
+        rate = env_float(f"{prefix}_RATE", 4.0)
+        return cls(
+            rate=rate,
+            burst=env_float(f"{prefix}_BURST", 0.0) or None,
+            adaptive=env_bool(f"{prefix}_ADAPTIVE", True),
+            min_rate=env_float(f"{prefix}_MIN_RATE", 0.0) or None,
+            max_rate=env_float(f"{prefix}_MAX_RATE", 0.0) or None,
+        )
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    async def acquire(self):
+        if self._started is None:
+            self._started = time.monotonic()
+        await self.bucket.acquire()
+        self.requests += 1
+
+    def on_success(self):
+        if self.adaptive:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate * 1.1))
+
+    def on_failure(self, error: Exception):
+        self.errors += 1
+        throttled = getattr(error, "status", None) in (429, 503)
+        if throttled:
+            self.throttled += 1
+        if self.adaptive:
+            factor = 0.5 if throttled else 0.8
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate * factor))
+
+    @property
+    def requests_per_second(self) -> float:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests at {self.requests_per_second:.2f}/s, "
+            f"{self.errors} errors ({self.error_rate:.0%}), {self.throttled} throttled, "
+            f"current rate {self.rate:.2f}/s"
+        )
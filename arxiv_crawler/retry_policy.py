@@ -0,0 +1,268 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, TypeVar
+
+from rich.console import Console
+
+from env_utils import env_float, env_int
+
+T = TypeVar("T")
+
+# 这些状态码说明请求本身有问题, 重试也不会成功
+_NON_RETRYABLE_STATUSES = {400, 401, 403, 404, 405, 410, 413, 414, 422}
+
+
+class CircuitOpenError(Exception):
+    """host的熔断器处于打开状态, 请求未发出直接失败"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}, retry after {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def retry_after_of(error: Exception) -> float | None:
+    """从异常中读取服务端要求的等待秒数(Retry-After头, 秒数或HTTP日期), 没有时返回None"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+    headers = getattr(error, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def describe_error(error: Exception) -> str:
+    """简短的错误描述, HTTP错误只保留状态码(aiohttp的异常信息里带有很长的url)"""
+    status = getattr(error, "status", None)
+    if status is not None:
+        return f"{type(error).__name__}: HTTP {status}"
+    return f"{type(error).__name__}: {error}"
+
+
+def is_retryable(error: Exception) -> bool:
+    if not getattr(error, "retryable", True):
+        return False
+    return getattr(error, "status", None) not in _NON_RETRYABLE_STATUSES
+
+
+@dataclass
+class HostStats:
+    """单个host的请求统计"""
+
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    throttled: int = 0
+    rejected: int = 0  # 熔断期间被直接拒绝的请求
+    circuit_opens: int = 0
+    last_error: str = ""
+
+    def summary(self) -> str:
+        text = (
+            f"{self.requests} requests, {self.successes} ok, {self.failures} failed, {self.retries} retries, "
+            f"{self.throttled} throttled, {self.rejected} rejected, circuit opened {self.circuit_opens} times"
+        )
+        return f"{text}; last error: {self.last_error}" if self.last_error else text
+
+
+class CircuitBreaker:
+    """
+    连续失败`failure_threshold`次后打开, `cooldown`秒内拒绝所有请求;
+    冷却结束后进入半开状态, 只放行一个试探请求, 成功则关闭, 失败则再次打开
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    def allow(self) -> float:
+        """返回0表示放行, 否则返回还需等待的秒数"""
+        if self.opened_at is None:
+            return 0.0
+        remaining = self.opened_at + self.cooldown - time.monotonic()
+        if remaining > 0:
+            return remaining
+        if self._probing:
+            return self.cooldown
+        self._probing = True
+        return 0.0
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败, 返回熔断器是否因此打开"""
+        self.consecutive_failures += 1
+        if self._probing or (self.opened_at is None and self.consecutive_failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._probing = False
+            return True
+        return False
+
+
+class RetryBudget:
+    """
+    全局重试预算: 重试次数不超过 min_retries + ratio × 总请求数,
+    服务端整体不可用时不会因为每个请求都重试而把请求量放大数倍
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+
+    def can_retry(self) -> bool:
+        return self.retries < self.min_retries + self.ratio * self.requests
+
+
+class RetryPolicy:
+    """
+    爬虫和翻译共用的重试策略: 指数退避 + 全抖动, 遵守Retry-After, 按host熔断, 全局重试预算, 按host统计失败
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        max_retry_after: float = 120.0,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        budget_ratio: float = 0.2,
+        budget_min_retries: int = 10,
+        console: Console | None = None,
+    ):
+        """
+        Args:
+            max_attempts (int, optional): 每个请求最多尝试次数. Defaults to 4.
+            base_delay (float, optional): 第一次重试的退避上限(秒), 之后每次翻倍. Defaults to 1.0.
+            max_delay (float, optional): 退避上限(秒). Defaults to 30.0.
+            max_retry_after (float, optional): Retry-After最多等待的秒数. Defaults to 120.0.
+            failure_threshold (int, optional): 连续失败多少次后熔断. Defaults to 5.
+            cooldown (float, optional): 熔断持续时间(秒). Defaults to 30.0.
+            budget_ratio (float, optional): 重试预算占总请求数的比例. Defaults to 0.2.
+            budget_min_retries (int, optional): 请求较少时保底的重试次数. Defaults to 10.
+            console (Console, optional): 用于输出重试日志, 为None时不输出. Defaults to None.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.budget = RetryBudget(budget_ratio, budget_min_retries)
+        self.console = console
+        self.stats: dict[str, HostStats] = defaultdict(HostStats)
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls, console: Console | None = None) -> "RetryPolicy":
+        """使用RETRY_*和CIRCUIT_*环境变量构造"""
+        default = cls()
+        return cls(
+            max_attempts=env_int("RETRY_MAX_ATTEMPTS", default.max_attempts),
+            base_delay=env_float("RETRY_BASE_DELAY", default.base_delay),
+            max_delay=env_float("RETRY_MAX_DELAY", default.max_delay),
+            max_retry_after=env_float("RETRY_MAX_RETRY_AFTER", default.max_retry_after),
+            failure_threshold=env_int("CIRCUIT_FAILURE_THRESHOLD", default.failure_threshold),
+            cooldown=env_float("CIRCUIT_COOLDOWN", default.cooldown),
+            budget_ratio=env_float("RETRY_BUDGET_RATIO", default.budget.ratio),
+            budget_min_retries=env_int("RETRY_BUDGET_MIN", default.budget.min_retries),
+            console=console,
+        )
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.failure_threshold, self.cooldown)
+        return self._breakers[host]
+
+    def backoff(self, attempt: int, error: Exception | None = None) -> float:
+        """第attempt次重试(从1开始)前的等待时间, 服务端给出Retry-After时以它为准"""
+        retry_after = retry_after_of(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def attempt(self, host: str, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """
+        执行一次请求(不重试), 经过熔断器并记录统计。适合自带重试逻辑的调用方(如PageScheduler)
+        """
+        stats = self.stats[host]
+        breaker = self.breaker(host)
+        wait = breaker.allow()
+        if wait > 0:
+            stats.rejected += 1
+            raise CircuitOpenError(host, wait)
+        stats.requests += 1
+        self.budget.requests += 1
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats.failures += 1
+            stats.last_error = describe_error(e)[:200]
+            if getattr(e, "status", None) in (429, 503):
+                stats.throttled += 1
+            if not is_retryable(e):
+                # 请求本身的问题(如404)说明host能正常响应, 不计入熔断
+                breaker.record_success()
+            elif breaker.record_failure():
+                stats.circuit_opens += 1
+                if self.console:
+                    self.console.log(f"[bold red]Circuit opened for {host} for {self.cooldown:.0f}s: {stats.last_error}")
+            raise
+        stats.successes += 1
+        breaker.record_success()
+        return result
+
+    async def call(self, host: str, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """
+        执行请求, 失败时按策略重试; 重试次数、预算用尽或遇到不可重试的错误时抛出最后一次的异常
+        """
+        attempt = 1
+        while True:
+            try:
+                return await self.attempt(host, func, *args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_attempts or not is_retryable(e):
+                    raise
+                if not self.budget.can_retry():
+                    if self.console:
+                        self.console.log(f"[bold red]Retry budget exhausted, giving up on {host}: {describe_error(e)}")
+                    raise
+                delay = self.backoff(attempt, e)
+                self.budget.retries += 1
+                self.stats[host].retries += 1
+                if self.console:
+                    self.console.log(
+                        f"[bold yellow]{host}: {describe_error(e)}, "
+                        f"retrying in {delay:.1f}s ({attempt}/{self.max_attempts - 1})"
+                    )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def summary(self) -> str:
+        return "; ".join(f"{host}: {stats.summary()}" for host, stats in self.stats.items())
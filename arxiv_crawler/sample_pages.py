@@ -0,0 +1,240 @@
+"""
+生成与arXiv高级搜索结果页(以及OAI-PMH ListRecords响应)结构一致的合成页面, 用于解析器一致性检查和离线基准测试
+
+同一个(seed, index)总是生成同一篇文章, 因此同一个start无论请求多少次内容都相同。
+文章按序号从新到旧排列, 序号0最新, 与`order=-announced_date_first`的结果顺序一致。
+"""
+
+import html
+from xml.sax.saxutils import escape
+import random
+from datetime import datetime, timedelta
+
+_WORDS = (
+    "learning vision language model diffusion transformer robust graph neural efficient multimodal "
+    "agent reasoning benchmark dataset segmentation detection policy reinforcement sparse attention "
+    "retrieval generation alignment contrastive latent video audio speech robot control planning"
+).split()
+_CATEGORIES = ["cs.CV", "cs.AI", "cs.LG", "cs.CL", "cs.RO", "cs.HC", "cs.SD", "eess.AS", "eess.IV", "stat.ML"]
+_NAMES = ["Wei Zhang", "Maria Garcia", "John Smith", "Yuki Tanaka", "Ana Souza", "Li Na", "Omar Haddad", "Eva Müller"]
+
+
+def _sentence(rng: random.Random, words: int, hit_rate: float = 0.0) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(_WORDS)
+        part = f'<span class="search-hit mathjax">{word}</span>' if rng.random() < hit_rate else word
+        # 混入多余空白、换行、实体和公式, 覆盖解析器的空白处理逻辑; 与是否高亮无关, 搜索页和OAI记录的文本一致
+        if word == "model":
+            part += "\n         "
+        elif word == "graph":
+            part += " &amp; $\\mathcal{G}$"
+        parts.append(part)
+    return " ".join(parts)
+
+
+def render_result(index: int, submitted: datetime, seed: int = 0) -> str:
+    rng = random.Random(seed * 1_000_003 + index)
+    arxiv_id = f"{submitted.strftime('%y%m')}.{index % 100000:05d}"
+    categories = rng.sample(_CATEGORIES, rng.randint(1, 4))
+    tags = "\n".join(
+        f'<span class="tag is-small {"is-link" if i == 0 else "is-grey"} tooltip is-tooltip-top" '
+        f'data-tooltip="{category} field">\n            {category}</span>'
+        for i, category in enumerate(categories)
+    )
+    authors = ", ".join(
+        f'<a href="/search/?searchtype=author&amp;query={html.escape(name)}">{html.escape(name)}</a>'
+        for name in rng.sample(_NAMES, rng.randint(1, 5))
+    )
+    title = _sentence(rng, rng.randint(5, 14), hit_rate=0.15)
+    abstract = _sentence(rng, rng.randint(60, 180), hit_rate=0.05)
+    submitted_str = f"{submitted.day} {submitted.strftime('%B, %Y')}"
+    if rng.random() < 0.3:
+        latest = submitted + timedelta(days=rng.randint(1, 20))
+        date_block = (
+            f'<span class="has-text-black-bis has-text-weight-semibold">Submitted</span>\n'
+            f"        {latest.day} {latest.strftime('%B, %Y')};\n"
+            f'        <span class="has-text-black-bis has-text-weight-semibold">v1</span>submitted {submitted_str};'
+        )
+    else:
+        date_block = (
+            f'<span class="has-text-black-bis has-text-weight-semibold">Submitted</span>\n        {submitted_str};'
+        )
+    comments = ""
+    if rng.random() < 0.6:
+        comments = (
+            '\n    <p class="comments is-size-7">\n'
+            '      <span class="has-text-black-bis has-text-weight-semibold">Comments:</span>\n'
+            f'      <span class="has-text-grey-dark mathjax">{rng.randint(4, 40)} pages, {rng.randint(1, 12)} figures'
+            "</span>\n    </p>"
+        )
+    if rng.random() < 0.2:
+        comments += (
+            '\n    <p class="comments is-size-7">\n'
+            '      <span class="has-text-black-bis has-text-weight-semibold">Journal ref:</span> Proc. Synthetic '
+            f"{submitted.year}</p>"
+        )
+    return f"""<li class="arxiv-result">
+  <div class="is-marginless">
+    <p class="list-title is-inline-block"><a href="https://arxiv.org/abs/{arxiv_id}">arXiv:{arxiv_id}</a>
+      <span>&nbsp;[<a href="https://arxiv.org/pdf/{arxiv_id}">pdf</a>, <a href="https://arxiv.org/format/{arxiv_id}">other</a>]&nbsp;</span>
+    </p>
+    <div class="tags is-inline-block">
+      {tags}
+    </div>
+  </div>
+  <p class="title is-5 mathjax">
+      {title}
+  </p>
+  <p class="authors">
+    <span class="has-text-black-bis has-text-weight-semibold">Authors:</span>
+    {authors}
+  </p>
+  <p class="abstract mathjax">
+    <span class="has-text-black-bis has-text-weight-semibold">Abstract</span>:
+    <span class="abstract-short has-text-grey-dark mathjax" id="{arxiv_id}v1-abstract-short" style="display: inline;">
+      {abstract[:120]}&hellip;
+    </span>
+    <span class="abstract-full has-text-grey-dark mathjax" id="{arxiv_id}v1-abstract-full" style="display: none;">
+      {abstract}
+      <a class="is-size-7" style="white-space: nowrap;" onclick="document.getElementById('{arxiv_id}v1-abstract-full').style.display = 'none'; document.getElementById('{arxiv_id}v1-abstract-short').style.display = 'inline';">&#9651; Less</a>
+    </span>
+  </p>
+  <p class="is-size-7">{date_block}
+    <span class="has-text-black-bis has-text-weight-semibold">originally announced</span> {submitted.strftime('%B %Y')}.
+  </p>{comments}
+</li>"""
+
+
+def submitted_date_of(index: int, total: int, newest: datetime, days: int = 30) -> datetime:
+    """序号为index的文章的提交日期, 所有文章均匀分布在newest之前的days天内"""
+    offset = (index * days) // max(total, 1)
+    return (newest - timedelta(days=offset)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def render_search_page(
+    start: int,
+    total: int,
+    step: int = 50,
+    newest: datetime | None = None,
+    days: int = 30,
+    seed: int = 0,
+) -> str:
+    """
+    渲染一个搜索结果页, 包含序号为[start, start+step)的文章
+
+    Args:
+        start (int): 起始序号
+        total (int): 结果总数, 为0时渲染"无结果"页面
+        step (int, optional): 每页数量. Defaults to 50.
+        newest (datetime, optional): 最新一篇文章的提交日期. Defaults to 2024-08-30.
+        days (int, optional): 所有文章分布的天数. Defaults to 30.
+        seed (int, optional): 随机种子. Defaults to 0.
+    """
+    newest = newest or datetime(2024, 8, 30)
+    if total == 0:
+        heading = "Sorry, your query returned no results"
+        items = ""
+    else:
+        end = min(start + step, total)
+        heading = f"Showing {start + 1}&ndash;{end} of {total:,} results for all: cs.CV"
+        items = "\n".join(
+            render_result(index, submitted_date_of(index, total, newest, days), seed) for index in range(start, end)
+        )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Search | arXiv e-print repository</title>
+<script>window.MathJax = {{ tex: {{ inlineMath: [['$', '$']] }} }};</script></head>
+<body>
+<main>
+  <div class="content">
+  <div id="main-container" class="container">
+    <div class="level is-marginless">
+      <div class="level-left">
+        <h1 class="title is-clearfix">
+          {heading}
+        </h1>
+      </div>
+    </div>
+    <!-- results -->
+    <ol class="breathe-horizontal" start="{start + 1}">
+{items}
+    </ol>
+  </div>
+  </div>
+</main>
+</body>
+</html>
+"""
+
+
+def render_oai_record(index: int, submitted: datetime, seed: int = 0) -> str:
+    """渲染一条metadataPrefix=arXiv的OAI记录, 编号和提交日期与render_result一致"""
+    rng = random.Random(seed * 1_000_003 + index)
+    arxiv_id = f"{submitted.strftime('%y%m')}.{index % 100000:05d}"
+    categories = " ".join(rng.sample(_CATEGORIES, rng.randint(1, 4)))
+    authors = "".join(
+        f"<author><keyname>{escape(name.split()[-1])}</keyname><forenames>{escape(name.split()[0])}</forenames></author>"
+        for name in rng.sample(_NAMES, rng.randint(1, 5))
+    )
+    title = html.unescape(_sentence(rng, rng.randint(5, 14)))
+    abstract = html.unescape(_sentence(rng, rng.randint(60, 180)))
+    comments = f"<comments>{rng.randint(4, 40)} pages</comments>" if rng.random() < 0.6 else ""
+    updated = submitted + timedelta(days=rng.randint(0, 3))
+    return f"""<record><header><identifier>oai:arXiv.org:{arxiv_id}</identifier>
+<datestamp>{updated.strftime('%Y-%m-%d')}</datestamp><setSpec>cs</setSpec></header>
+<metadata><arXiv xmlns="http://arxiv.org/OAI/arXiv/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<id>{arxiv_id}</id><created>{submitted.strftime('%Y-%m-%d')}</created><authors>{authors}</authors>
+<title>{escape(title)}</title><categories>{categories}</categories>{comments}
+<license>http://arxiv.org/licenses/nonexclusive-distrib/1.0/</license>
+<abstract>  {escape(abstract)}
+</abstract></arXiv></metadata></record>"""
+
+
+def render_list_records(
+    cursor: int,
+    total: int,
+    batch: int = 1000,
+    newest: datetime | None = None,
+    days: int = 30,
+    seed: int = 0,
+    date_from: datetime | None = None,
+    date_until: datetime | None = None,
+) -> str:
+    """
+    渲染一个OAI-PMH ListRecords响应, 包含符合条件的记录中第[cursor, cursor+batch)条, 之后还有记录时附带resumptionToken。
+    数据集与render_search_page相同(同样的total、newest、days、seed生成同样的文章)
+
+    Args:
+        cursor (int): 起始位置
+        total (int): 数据集的文章总数
+        batch (int, optional): 每页记录数. Defaults to 1000.
+        date_from (datetime, optional): 只返回首次提交日期不早于它的记录(近似OAI的from). Defaults to None.
+        date_until (datetime, optional): 只返回首次提交日期不晚于它的记录(近似OAI的until). Defaults to None.
+
+    resumptionToken的格式为"下一页的cursor|from|until", 带令牌的请求不需要再带日期参数; 没有符合条件的记录时返回noRecordsMatch错误
+    """
+    newest = newest or datetime(2024, 8, 30)
+    head = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+<responseDate>2024-09-01T00:00:00Z</responseDate>
+<request verb="ListRecords">http://export.arxiv.org/oai2</request>
+"""
+    # OAI按编号升序返回, 序号越大提交越早
+    selected = [
+        (index, submitted)
+        for index in range(total - 1, -1, -1)
+        for submitted in (submitted_date_of(index, total, newest, days),)
+        if (date_from is None or submitted >= date_from) and (date_until is None or submitted <= date_until)
+    ]
+    if not selected:
+        return head + '<error code="noRecordsMatch">No records match</error>\n</OAI-PMH>\n'
+    end = min(cursor + batch, len(selected))
+    records = "\n".join(render_oai_record(index, submitted, seed) for index, submitted in selected[cursor:end])
+    bounds = "|".join(day.strftime("%Y-%m-%d") if day else "" for day in (date_from, date_until))
+    token = f"{end}|{bounds}" if end < len(selected) else ""
+    return (
+        f"{head}<ListRecords>\n{records}\n"
+        f'<resumptionToken cursor="{cursor}" completeListSize="{len(selected)}">{token}</resumptionToken>\n'
+        "</ListRecords>\n</OAI-PMH>\n"
+    )
@@ -0,0 +1,328 @@
+"""
+arXiv高级搜索结果页的解析器
+
+提供两个产出完全相同`Paper`列表的后端:
+- bs4: 基于BeautifulSoup(html.parser), 最初的实现
+- lxml: 基于lxml.html + XPath, 只遍历需要的节点, 速度快数倍
+
+通过环境变量HTML_PARSER选择(auto/lxml/bs4), auto在安装了lxml时使用lxml, 否则退回bs4。
+
+下面是一个搜索结果的例子
+<li class="arxiv-result">
+    <div class="is-marginless">
+        <p class="list-title is-inline-block">
+            <a href="https://arxiv.org/abs/physics/9403001">arXiv:physics/9403001</a>
+            <span>&nbsp;[<a href="https://arxiv.org/pdf/physics/9403001">pdf</a>, <a
+                    href="https://arxiv.org/ps/physics/9403001">ps</a>, <a
+                    href="https://arxiv.org/format/physics/9403001">other</a>]&nbsp;</span>
+        </p>
+        <div class="tags is-inline-block">
+            <span class="tag is-small is-link tooltip is-tooltip-top" data-tooltip="Popular Physics">
+                physics.pop-ph</span>
+            <span class="tag is-small is-grey tooltip is-tooltip-top"
+                data-tooltip="High Energy Physics - Theory">hep-th</span>
+        </div>
+        <div class="is-inline-block" style="margin-left: 0.5rem">
+            <div class="tags has-addons">
+                <span class="tag is-dark is-size-7">doi</span>
+                <span class="tag is-light is-size-7">
+                    <a class="" href="https://doi.org/10.1063/1.2814991">10.1063/1.2814991 <i
+                            class="fa fa-external-link" aria-hidden="true"></i></a>
+                </span>
+            </div>
+        </div>
+    </div>
+    <p class="title is-5 mathjax">
+        Desperately Seeking Superstrings
+    </p>
+    <p class="authors">
+        <span class="has-text-black-bis has-text-weight-semibold">Authors:</span>
+            <a href="/search/?searchtype=author&amp;query=Ginsparg%2C+P">Paul Ginsparg</a>, <a href="/search/?searchtype=author&amp;query=Glashow%2C+S">Sheldon Glashow</a>
+    </p>
+    <p class="abstract mathjax">
+        <span class="has-text-black-bis has-text-weight-semibold">Abstract</span>:
+
+        <span class="abstract-short has-text-grey-dark mathjax" id="physics/9403001v1-abstract-short"
+            style="display: inline;"> We provide a detailed analysis of the problems and prospects of superstring theory c.
+        1986, anticipating much of the progress of the decades to follow. </span>
+
+        <span class="abstract-full has-text-grey-dark mathjax" id="physics/9403001v1-abstract-full"
+            style="display: none;"> We provide a detailed analysis of the problems and prospects of
+        superstring theory c. 1986, anticipating much of the progress of the decades to follow.
+        <a class="is-size-7" style="white-space: nowrap;"
+                onclick="document.getElementById('physics/9403001v1-abstract-full').style.display = 'none'; document.getElementById('physics/9403001v1-abstract-short').style.display = 'inline';">△ Less</a>
+        </span>
+    </p>
+    <p class="is-size-7"><span class="has-text-black-bis has-text-weight-semibold">Submitted</span>
+        25 April, 1986; <span class="has-text-black-bis has-text-weight-semibold">originally
+        announced</span> March 1994. </p>
+    <p class="comments is-size-7">
+        <span class="has-text-black-bis has-text-weight-semibold">Comments:</span>
+        <span class="has-text-grey-dark mathjax">originally appeared as a Reference Frame in Physics
+            Today, May 1986</span>
+    </p>
+    <p class="comments is-size-7">
+        <span class="has-text-black-bis has-text-weight-semibold">Journal ref:</span> Phys.Today
+        86N5 (1986) 7-9 </p>
+</li>
+"""
+
+import html
+import os
+import re
+from datetime import datetime
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from paper import Paper
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml是可选依赖
+    etree = None
+    lxml_html = None
+
+_WHITESPACE = re.compile(r"\s+")
+# 每个结果中第一个链接就是摘要页url, 与两个后端中result.find("a")取到的是同一个
+_RESULT_URL = re.compile(r'<li\s+class="arxiv-result"[^>]*>.*?<a\s[^>]*?href="([^"]*)"', re.S)
+
+
+def _collapse(text: str) -> str:
+    return _WHITESPACE.sub(" ", text)
+
+
+def _parse_total(text: str) -> int:
+    # "Showing 1–50 of 2,542,002 results" or "Sorry, your query returned no results"
+    if "Sorry" in text:
+        return 0
+    return int(text[text.find("of") + 3 : text.find("results")].replace(",", ""))
+
+
+def _parse_submitted_date(date: str) -> datetime:
+    if "v1" in date:
+        # Submitted9 August, 2024; v1submitted 8 August, 2024; originally announced August 2024.
+        # 注意空格会被吞掉，这里我们要找最早的提交日期
+        v1 = date.find("v1submitted")
+        date = date[v1 + 12 : date.find(";", v1)]
+    else:
+        # Submitted8 August, 2024; originally announced August 2024.
+        # 注意空格会被吞掉
+        submit_date = date.find("Submitted")
+        date = date[submit_date + 9 : date.find(";", submit_date)]
+    return datetime.strptime(date, "%d %B, %Y")
+
+
+def _make_paper(url, title, date, categories, authors, abstract, comments) -> Paper:
+    return Paper(
+        url=url,
+        title=title.strip(),
+        first_submitted_date=_parse_submitted_date(date),
+        categories=categories,
+        authors=authors,
+        abstract=abstract.strip(),
+        comments=comments,
+    )
+
+
+def bs4_search_text(tag) -> str:
+    """
+    解析搜索结果中的文本内容，处理不同类型的标签
+
+    Args:
+        tag (BeautifulSoup Tag): 要解析的HTML标签
+
+    Returns:
+        str: 解析后的文本内容
+    """
+    string = ""
+    for child in tag.children:
+        if isinstance(child, NavigableString):
+            # 处理文本节点，移除多余空格
+            string += _collapse(child)
+        elif isinstance(child, Tag):
+            # 处理搜索高亮标签
+            if child.name == "span" and "search-hit" in child.get("class", []):
+                string += _collapse(child.get_text(strip=False))
+            # 处理摘要展开/折叠链接
+            elif child.name == "a" and child.get("onclick") and ".style.display" in child.get("onclick"):
+                pass
+            # 处理其他标签，递归获取文本
+            else:
+                string += _collapse(child.get_text(strip=False))
+    return string.strip()
+
+
+def parse_page_bs4(content: str, limit: int | None = None) -> tuple[int | None, list[Paper]]:
+    soup = BeautifulSoup(content, "html.parser")
+    total_tag = soup.select("#main-container > div.level.is-marginless > div.level-left > h1")
+    total = _parse_total(total_tag[0].text) if total_tag else None
+    if total == 0:
+        return 0, []
+
+    papers = []
+    results = soup.find_all("li", {"class": "arxiv-result"}, limit=limit) if limit != 0 else []
+    for result in results:
+        url_tag = result.find("a")
+        url = url_tag["href"] if url_tag else "No link"
+
+        title_tag = result.find("p", class_="title")
+        title = bs4_search_text(title_tag) if title_tag else "No title"
+
+        date_tag = result.find("p", class_="is-size-7")
+        date = date_tag.get_text(strip=True) if date_tag else "No date"
+
+        category_tag = result.find_all("span", class_="tag")
+        categories = [
+            category.get_text(strip=True) for category in category_tag if "tooltip" in category.get("class")
+        ]
+
+        authors_tag = result.find("p", class_="authors")
+        authors = authors_tag.get_text(strip=True)[len("Authors:") :] if authors_tag else "No authors"
+
+        summary_tag = result.find("span", class_="abstract-full")
+        abstract = bs4_search_text(summary_tag) if summary_tag else "No summary"
+
+        comments_tag = result.find("p", class_="comments")
+        comments = comments_tag.get_text(strip=True)[len("Comments:") :] if comments_tag else "No comments"
+
+        papers.append(_make_paper(url, title, date, categories, authors, abstract, comments))
+    return total, papers
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 与bs4后端中find/find_all/select的语义一一对应
+_XPATH_TOTAL = (
+    f"//*[@id='main-container']/div[{_has_class('level')} and {_has_class('is-marginless')}]"
+    f"/div[{_has_class('level-left')}]/h1"
+)
+_XPATH_RESULTS = f"//li[{_has_class('arxiv-result')}]"
+_XPATH_TITLE = f".//p[{_has_class('title')}]"
+_XPATH_DATE = f".//p[{_has_class('is-size-7')}]"
+_XPATH_CATEGORIES = f".//span[{_has_class('tag')} and {_has_class('tooltip')}]"
+_XPATH_AUTHORS = f".//p[{_has_class('authors')}]"
+_XPATH_ABSTRACT = f".//span[{_has_class('abstract-full')}]"
+_XPATH_COMMENTS = f".//p[{_has_class('comments')}]"
+
+# bs4不会把这些标签内的文字计入get_text
+_INVISIBLE_TAGS = {"script", "style", "template"}
+
+
+def _lxml_strings(element):
+    """按文档顺序产出元素内的文本节点, 跳过注释和script/style, 与bs4的get_text一致"""
+    if element.tag in _INVISIBLE_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_get_text(element, strip=False) -> str:
+    if strip:
+        return "".join(s.strip() for s in _lxml_strings(element) if s.strip())
+    return "".join(_lxml_strings(element))
+
+
+def _first(element, xpath):
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+
+def lxml_search_text(element) -> str:
+    """`bs4_search_text`的lxml版本, 逐个子节点处理空白"""
+    string = _collapse(element.text) if element.text else ""
+    for child in element:
+        if isinstance(child, etree._Comment):
+            # bs4把注释当作文本节点处理
+            string += _collapse(child.text or "")
+        elif not isinstance(child.tag, str):
+            pass
+        elif child.tag == "a" and ".style.display" in (child.get("onclick") or ""):
+            pass
+        else:
+            string += _collapse(_lxml_get_text(child))
+        if child.tail:
+            string += _collapse(child.tail)
+    return string.strip()
+
+
+def parse_page_lxml(content: str, limit: int | None = None) -> tuple[int | None, list[Paper]]:
+    root = lxml_html.fromstring(content)
+    total_tag = _first(root, _XPATH_TOTAL)
+    total = _parse_total(_lxml_get_text(total_tag)) if total_tag is not None else None
+    if total == 0:
+        return 0, []
+
+    papers = []
+    for result in root.xpath(_XPATH_RESULTS)[:limit]:
+        url_tag = result.find(".//a")
+        url = url_tag.get("href") if url_tag is not None else "No link"
+
+        title_tag = _first(result, _XPATH_TITLE)
+        title = lxml_search_text(title_tag) if title_tag is not None else "No title"
+
+        date_tag = _first(result, _XPATH_DATE)
+        date = _lxml_get_text(date_tag, strip=True) if date_tag is not None else "No date"
+
+        categories = [_lxml_get_text(tag, strip=True) for tag in result.xpath(_XPATH_CATEGORIES)]
+
+        authors_tag = _first(result, _XPATH_AUTHORS)
+        authors = _lxml_get_text(authors_tag, strip=True)[len("Authors:") :] if authors_tag is not None else "No authors"
+
+        summary_tag = _first(result, _XPATH_ABSTRACT)
+        abstract = lxml_search_text(summary_tag) if summary_tag is not None else "No summary"
+
+        comments_tag = _first(result, _XPATH_COMMENTS)
+        comments = (
+            _lxml_get_text(comments_tag, strip=True)[len("Comments:") :] if comments_tag is not None else "No comments"
+        )
+
+        papers.append(_make_paper(url, title, date, categories, authors, abstract, comments))
+    return total, papers
+
+
+PARSER_BACKENDS = {"bs4": parse_page_bs4}
+if lxml_html is not None:
+    PARSER_BACKENDS["lxml"] = parse_page_lxml
+
+
+def resolve_backend(name: str | None = None) -> str:
+    """
+    解析后端名称, 未指定时读取环境变量HTML_PARSER, auto表示有lxml时用lxml
+    """
+    name = (name or os.environ.get("HTML_PARSER", "auto")).strip().lower() or "auto"
+    if name == "auto":
+        return "lxml" if "lxml" in PARSER_BACKENDS else "bs4"
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown or unavailable HTML parser backend: {name}, available: {list(PARSER_BACKENDS)}")
+    return name
+
+
+def parse_search_page(content: str, backend: str = "bs4", limit: int | None = None) -> tuple[int | None, list[Paper]]:
+    """
+    解析一个搜索结果页
+
+    Args:
+        content (str): 网页内容
+        backend (str, optional): 解析后端, 见PARSER_BACKENDS. Defaults to "bs4".
+        limit (int, optional): 只解析前limit个结果, None表示全部. Defaults to None.
+
+    Returns:
+        tuple[int | None, list[Paper]]: (结果总数, 本页的文章), 页面中找不到总数时为None, 无结果时为0
+    """
+    return PARSER_BACKENDS[backend](content, limit)
+
+
+def scan_result_urls(content: str) -> list[str]:
+    """
+    不构建DOM, 用正则按顺序取出页面中每个结果的url, 用于在完整解析前先查询哪些文章已经在数据库里。
+    结果与完整解析得到的Paper.url一一对应; 页面结构变化导致取不到时返回空列表, 调用方应退回完整解析
+    """
+    return [html.unescape(url) for url in _RESULT_URL.findall(content)]
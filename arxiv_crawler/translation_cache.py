@@ -0,0 +1,87 @@
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from env_utils import env_bool
+
+
+class TranslationCache:
+    """
+    按内容寻址的翻译缓存, 存放在独立的SQLite文件中
+
+    以(原文的sha256, langfrom, langto)为主键, 相同的文本无论来自哪篇文章、哪次爬取都只翻译一次;
+    translate_missing和重新爬取时命中的文本不再发出网络请求
+    """
+
+    def __init__(self, db_path: str | Path = "./translation_cache.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.hits = 0
+        self.misses = 0
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    hash TEXT NOT NULL,
+                    langfrom TEXT NOT NULL,
+                    langto TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (hash, langfrom, langto)
+                ) WITHOUT ROWID
+                """
+            )
+
+    @classmethod
+    def from_env(cls) -> "TranslationCache | None":
+        """使用TRANSLATION_CACHE、TRANSLATION_CACHE_PATH构造, 关闭缓存时返回None"""
+        if not env_bool("TRANSLATION_CACHE", True):
+            return None
+        return cls(os.environ.get("TRANSLATION_CACHE_PATH", "").strip() or "./translation_cache.db")
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: list[str], langfrom: str, langto: str) -> dict[str, str]:
+        """
+        批量查询缓存
+
+        Returns:
+            dict[str, str]: 命中的原文 -> 译文
+        """
+        keys = {self.key(text): text for text in texts}
+        found = {}
+        hashes = list(keys)
+        # SQLite默认最多999个参数
+        for i in range(0, len(hashes), 900):
+            chunk = hashes[i : i + 900]
+            rows = self.conn.execute(
+                f"SELECT hash, result FROM translations WHERE langfrom = ? AND langto = ? "
+                f"AND hash IN ({','.join('?' * len(chunk))})",
+                (langfrom, langto, *chunk),
+            )
+            for digest, result in rows:
+                found[keys[digest]] = result
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, translations: dict[str, str], langfrom: str, langto: str):
+        """写入原文 -> 译文, 已存在的键会被覆盖"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO translations (hash, langfrom, langto, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(self.key(text), langfrom, langto, result, now) for text, result in translations.items()],
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} cache hits ({self.hits / total:.0%})" if total else "no lookups"
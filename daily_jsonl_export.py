@@ -19,6 +19,10 @@ WORKSPACE_ROOT = PROJECT_ROOT.parent
 DEFAULT_LANGUAGE = "Chinese"
 DEFAULT_CLOUDBASE_DEMO_DIR = WORKSPACE_ROOT / "cloudbase_db_demo"
 
+sys.path.append(str(PROJECT_ROOT / "arxiv_crawler"))
+
+from db_connection import ConnectionManager
+
 
 def _resolve_project_path(raw_path: str | None, default: str) -> Path:
     path = Path(raw_path or default).expanduser()
@@ -155,6 +159,28 @@ def _nullable_comment(raw_comment: str | None) -> str | None:
     return raw_comment
 
 
+def _fetch_rows_by_id(conn: sqlite3.Connection, paper_ids: list[str]) -> dict[str, sqlite3.Row]:
+    """按id批量读取论文, 每900个id一条IN查询, 代替逐条查询"""
+    paper_ids = list(dict.fromkeys(paper_ids))
+    rows = {}
+    # SQLite默认最多999个参数
+    for i in range(0, len(paper_ids), 900):
+        chunk = paper_ids[i : i + 900]
+        cursor = conn.execute(
+            f"""
+            SELECT id, url, pdf, authors, title_translated, first_submitted_date,
+                   first_announced_date, update_time, categories, title, comments,
+                   abstract, summary, abstract_translated, ai_content
+            FROM papers
+            WHERE id IN ({','.join('?' * len(chunk))})
+            """,
+            chunk,
+        )
+        for row in cursor:
+            rows.setdefault(row["id"], row)
+    return rows
+
+
 def export_daily_jsonl(
     date_str: str | None = None,
     language: str = DEFAULT_LANGUAGE,
@@ -183,84 +209,73 @@ def export_daily_jsonl(
     output_dir.mkdir(parents=True, exist_ok=True)
     temp_path = output_path.with_suffix(output_path.suffix + ".tmp")
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        with temp_path.open("w", encoding="utf-8") as file:
-            for record in enhanced_records:
-                paper_id = str(record.get("id") or "").strip()
-                if not paper_id:
-                    raise RuntimeError(f"存在缺少 id 的记录: {source_file}")
-
-                db_row = conn.execute(
-                    """
-                    SELECT id, url, pdf, authors, title_translated, first_submitted_date,
-                           first_announced_date, update_time, categories, title, comments,
-                           abstract, summary, abstract_translated, ai_content
-                    FROM papers
-                    WHERE id = ?
-                    """,
-                    (paper_id,),
-                ).fetchone()
-                if db_row is None:
-                    raise RuntimeError(f"papers.db 中找不到论文: {paper_id}")
-
-                ai_content = _parse_ai_content(db_row["ai_content"], record.get("AI"))
-                authors, authors_text = _normalize_authors(record.get("authors"), db_row["authors"])
-                categories, categories_text = _normalize_categories(record.get("categories"), db_row["categories"])
-                abstract = db_row["abstract"] or record.get("summary") or ""
-                summary = db_row["summary"] or record.get("summary") or abstract
-                title = db_row["title"] or record.get("title") or ""
-                title_zh = db_row["title_translated"] or record.get("title_zh") or ""
-                abstract_zh = db_row["abstract_translated"] or record.get("abstract_zh") or ""
-                comments = _nullable_comment(db_row["comments"] or record.get("comment"))
-
-                daily_record = {
-                    "id": paper_id,
-                    "url": db_row["url"] or record.get("abs") or "",
-                    "abs": db_row["url"] or record.get("abs") or "",
-                    "pdf": db_row["pdf"] or record.get("pdf") or "",
-                    "authors": authors,
-                    "authors_json": authors,
-                    "authors_text": authors_text,
-                    "title": title,
-                    "title_zh": title_zh,
-                    "first_submitted_date": db_row["first_submitted_date"],
-                    "first_announced_date": db_row["first_announced_date"],
-                    "update_time": db_row["update_time"],
-                    "categories": categories,
-                    "categories_text": categories_text,
-                    "comment": comments,
-                    "comments": comments,
-                    "abstract": abstract,
-                    "summary": summary,
-                    "abstract_zh": abstract_zh,
-                    "AI": ai_content,
-                    "ai_content": ai_content,
-                    "ai_content_json": ai_content,
-                    "tldr": ai_content.get("tldr", ""),
-                    "motivation": ai_content.get("motivation", ""),
-                    "method": ai_content.get("method", ""),
-                    "result": ai_content.get("result", ""),
-                    "conclusion": ai_content.get("conclusion", ""),
-                    "search_text": " ".join(
-                        filter(
-                            None,
-                            [
-                                title,
-                                title_zh,
-                                abstract,
-                                abstract_zh,
-                                ai_content.get("tldr", ""),
-                                authors_text,
-                                categories_text,
-                            ],
-                        )
-                    ),
-                }
-                file.write(json.dumps(daily_record, ensure_ascii=False) + "\n")
-    finally:
-        conn.close()
+    # 只读连接, 导出时爬虫仍可写入
+    with ConnectionManager.for_path(db_path).reader() as conn, temp_path.open("w", encoding="utf-8") as file:
+        conn.row_factory = sqlite3.Row
+        paper_ids = [str(record.get("id") or "").strip() for record in enhanced_records]
+        db_rows = _fetch_rows_by_id(conn, [paper_id for paper_id in paper_ids if paper_id])
+        for record, paper_id in zip(enhanced_records, paper_ids):
+            if not paper_id:
+                raise RuntimeError(f"存在缺少 id 的记录: {source_file}")
+
+            db_row = db_rows.get(paper_id)
+            if db_row is None:
+                raise RuntimeError(f"papers.db 中找不到论文: {paper_id}")
+
+            ai_content = _parse_ai_content(db_row["ai_content"], record.get("AI"))
+            authors, authors_text = _normalize_authors(record.get("authors"), db_row["authors"])
+            categories, categories_text = _normalize_categories(record.get("categories"), db_row["categories"])
+            abstract = db_row["abstract"] or record.get("summary") or ""
+            summary = db_row["summary"] or record.get("summary") or abstract
+            title = db_row["title"] or record.get("title") or ""
+            title_zh = db_row["title_translated"] or record.get("title_zh") or ""
+            abstract_zh = db_row["abstract_translated"] or record.get("abstract_zh") or ""
+            comments = _nullable_comment(db_row["comments"] or record.get("comment"))
+
+            daily_record = {
+                "id": paper_id,
+                "url": db_row["url"] or record.get("abs") or "",
+                "abs": db_row["url"] or record.get("abs") or "",
+                "pdf": db_row["pdf"] or record.get("pdf") or "",
+                "authors": authors,
+                "authors_json": authors,
+                "authors_text": authors_text,
+                "title": title,
+                "title_zh": title_zh,
+                "first_submitted_date": db_row["first_submitted_date"],
+                "first_announced_date": db_row["first_announced_date"],
+                "update_time": db_row["update_time"],
+                "categories": categories,
+                "categories_text": categories_text,
+                "comment": comments,
+                "comments": comments,
+                "abstract": abstract,
+                "summary": summary,
+                "abstract_zh": abstract_zh,
+                "AI": ai_content,
+                "ai_content": ai_content,
+                "ai_content_json": ai_content,
+                "tldr": ai_content.get("tldr", ""),
+                "motivation": ai_content.get("motivation", ""),
+                "method": ai_content.get("method", ""),
+                "result": ai_content.get("result", ""),
+                "conclusion": ai_content.get("conclusion", ""),
+                "search_text": " ".join(
+                    filter(
+                        None,
+                        [
+                            title,
+                            title_zh,
+                            abstract,
+                            abstract_zh,
+                            ai_content.get("tldr", ""),
+                            authors_text,
+                            categories_text,
+                        ],
+                    )
+                ),
+            }
+            file.write(json.dumps(daily_record, ensure_ascii=False) + "\n")
 
     temp_path.replace(output_path)
     return output_path, len(enhanced_records)
@@ -1,18 +1,25 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
 import sys
 import sqlite3
-from calendar import monthrange
 from datetime import date, timedelta
 from pathlib import Path
 import time
 
-from run_crawler import crawl_only, ai_enhance_only
+from run_crawler import ai_enhance_only, _persist_crawl_metrics
 
+# run_crawler已把arxiv_crawler目录加入sys.path
 
-MONTH_CRAWL_RETRY_WAIT_SECONDS = 5 * 60
-MONTH_CRAWL_MAX_RETRIES = 3
+from arxiv_calendar import ARXIV_CALENDAR
+from arxiv_crawler import ArxivScraper
+from db_connection import ConnectionManager
+from env_utils import env_int
+
+
+WINDOW_CRAWL_RETRY_WAIT_SECONDS = 5 * 60
+WINDOW_CRAWL_MAX_RETRIES = 3
 DEFAULT_DB_PATH = Path(__file__).resolve().parent / "papers.db"
 
 
@@ -20,53 +27,20 @@ def _parse_date(raw: str) -> date:
     return date.fromisoformat(raw)
 
 
-def _month_start(day: date) -> date:
-    return day.replace(day=1)
-
-
-def _next_month(day: date) -> date:
-    if day.month == 12:
-        return day.replace(year=day.year + 1, month=1, day=1)
-    return day.replace(month=day.month + 1, day=1)
-
-
-def _iter_month_starts(start_day: date, end_day: date):
-    current = _month_start(start_day)
+def _iter_announcement_days(start_day: date, end_day: date):
+    """区间内arXiv会公布新文章的日期（周末和假期没有数据，不算缺失）"""
+    current = ARXIV_CALENDAR.next_day(start_day)
     while current <= end_day:
         yield current
-        current = _next_month(current)
-
-
-def _iter_days_in_month(month_start: date, start_day: date, end_day: date):
-    days_in_month = monthrange(month_start.year, month_start.month)[1]
-    month_end = month_start.replace(day=days_in_month)
-    current = max(month_start, start_day)
-    last = min(month_end, end_day)
-    while current <= last:
-        yield current
-        current += timedelta(days=1)
-
-
-def _is_weekday(day: date) -> bool:
-    return day.weekday() < 5
-
-
-def _iter_weekdays_in_month(month_start: date, start_day: date, end_day: date):
-    for current in _iter_days_in_month(month_start, start_day, end_day):
-        if _is_weekday(current):
-            yield current
-
-
-def _connect_papers_db(db_path: Path) -> sqlite3.Connection:
-    if not db_path.exists():
-        raise FileNotFoundError(f"papers.db 不存在: {db_path}")
-    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-    conn.row_factory = sqlite3.Row
-    return conn
+        current = ARXIV_CALENDAR.next_day(current + timedelta(days=1))
 
 
 def _load_dates_with_papers(db_path: Path, start_day: date, end_day: date) -> set[date]:
-    with _connect_papers_db(db_path) as conn:
+    if not db_path.exists():
+        return set()
+    # 与并发抓取的窗口共用进程内的连接管理器, 读取不会被写入阻塞
+    with ConnectionManager.for_path(db_path).reader() as conn:
+        conn.row_factory = sqlite3.Row
         rows = conn.execute(
             """
             SELECT DISTINCT first_announced_date
@@ -101,102 +75,138 @@ def _format_days(days: list[date], max_items: int = 8) -> str:
     return preview
 
 
-def _crawl_month_with_retries(month_str: str) -> bool:
-    total_attempts = MONTH_CRAWL_MAX_RETRIES + 1
+def plan_backfill_windows(missing_days: list[date], max_window_days: int = 7) -> list[tuple[date, date]]:
+    """
+    把缺失的公布日合并成尽量少的搜索窗口（首尾都是缺失日，含两端）：
+    两个缺失日之间没有其他公布日（只隔着周末或假期）时合并到同一个窗口，每个窗口最多跨 max_window_days 天。
+    中间夹着已有数据的公布日时会拆开，不会重复爬取已有的日期
+    """
+    windows: list[tuple[date, date]] = []
+    for day in sorted(set(missing_days)):
+        if windows:
+            first, last = windows[-1]
+            adjacent = ARXIV_CALENDAR.next_day(last + timedelta(days=1)) == day
+            if adjacent and (day - first).days < max_window_days:
+                windows[-1] = (first, day)
+                continue
+        windows.append((day, day))
+    return windows
+
+
+def _format_window(window: tuple[date, date]) -> str:
+    first, last = window
+    return first.isoformat() if first == last else f"{first.isoformat()} ~ {last.isoformat()}"
+
 
+async def _crawl_window(window: tuple[date, date], db_path: Path, semaphore: asyncio.Semaphore) -> bool:
+    first, last = window
+    async with semaphore:
+        scraper = ArxivScraper(date_from=first.isoformat(), date_until=last.isoformat(), db_path=str(db_path))
+        try:
+            papers_by_date = await scraper.fetch_range_async()
+        except Exception as e:
+            print(f"窗口抓取失败：{_format_window(window)}：{e}")
+            return False
+        finally:
+            _persist_crawl_metrics(scraper, f"{first.isoformat()}_{last.isoformat()}")
+    print(f"窗口抓取完成：{_format_window(window)}，共 {sum(len(papers) for papers in papers_by_date.values())} 篇")
+    return True
+
+
+async def _crawl_windows(windows: list[tuple[date, date]], db_path: Path, concurrency: int) -> list[tuple[date, date]]:
+    """并发抓取所有窗口，返回失败的窗口"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = await asyncio.gather(*(_crawl_window(window, db_path, semaphore) for window in windows))
+    return [window for window, success in zip(windows, results) if not success]
+
+
+def _crawl_windows_with_retries(windows: list[tuple[date, date]], db_path: Path, concurrency: int) -> list[tuple[date, date]]:
+    total_attempts = WINDOW_CRAWL_MAX_RETRIES + 1
+    pending = windows
     for attempt in range(1, total_attempts + 1):
-        print(f"整月抓取尝试 {attempt}/{total_attempts}：{month_str}")
-        success = crawl_only(True, month_str)
-        if success:
-            return True
+        print(f"窗口抓取尝试 {attempt}/{total_attempts}：{len(pending)} 个窗口，并发 {concurrency}")
+        pending = asyncio.run(_crawl_windows(pending, db_path, concurrency))
+        if not pending:
+            return []
 
         if attempt < total_attempts:
-            wait_minutes = MONTH_CRAWL_RETRY_WAIT_SECONDS // 60
+            wait_minutes = WINDOW_CRAWL_RETRY_WAIT_SECONDS // 60
             print(
-                f"整月抓取失败：{month_str}。"
-                f" {wait_minutes} 分钟后进行下一次重试..."
+                f"以下窗口抓取失败：{', '.join(_format_window(window) for window in pending)}。"
+                f" {wait_minutes} 分钟后重试失败的窗口..."
             )
-            time.sleep(MONTH_CRAWL_RETRY_WAIT_SECONDS)
-
-    print(f"本月论文抓取失败：{month_str}")
-    return False
-
-
-def run_all_data(start_date: str, end_date: str, db_path: str | Path = DEFAULT_DB_PATH, force_crawl: bool = False) -> bool:
+            time.sleep(WINDOW_CRAWL_RETRY_WAIT_SECONDS)
+    return pending
+
+
+def run_all_data(
+    start_date: str,
+    end_date: str,
+    db_path: str | Path = DEFAULT_DB_PATH,
+    force_crawl: bool = False,
+    max_window_days: int | None = None,
+    concurrency: int | None = None,
+) -> bool:
+    """
+    补齐[start_date, end_date]内缺失的数据：找出没有论文的公布日，合并成按天/按周的搜索窗口并发抓取，
+    只对抓取后有了数据的日期执行AI增强。工作量与缺口大小成正比，而不是与月份大小成正比
+
+    Args:
+        max_window_days (int | None): 每个窗口最多跨多少天. Defaults to 环境变量BACKFILL_WINDOW_DAYS或7.
+        concurrency (int | None): 同时抓取的窗口数. Defaults to 环境变量BACKFILL_CONCURRENCY或2.
+    """
     start_day = _parse_date(start_date)
     end_day = _parse_date(end_date)
     if start_day > end_day:
         raise ValueError(f"start_date must be <= end_date: {start_date} > {end_date}")
+    max_window_days = max_window_days or env_int("BACKFILL_WINDOW_DAYS", 7)
+    concurrency = concurrency or env_int("BACKFILL_CONCURRENCY", 2)
 
     db_path = Path(db_path).expanduser().resolve()
 
-    month_starts = list(_iter_month_starts(start_day, end_day))
-    failed_months = []
-    print(f"开始批量处理：{start_day} -> {end_day}，共 {len(month_starts)} 个月")
+    days = list(_iter_announcement_days(start_day, end_day))
+    print(f"开始补齐数据：{start_day} -> {end_day}，共 {len(days)} 个公布日")
     print(f"读取数据库：{db_path}")
-
-    for month_index, month_start in enumerate(month_starts, start=1):
-        month_str = month_start.strftime('%Y-%m-%d')
-        month_days = list(_iter_weekdays_in_month(month_start, start_day, end_day))
-        if not month_days:
-            print()
-            print(f"[{month_index}/{len(month_starts)}] 跳过月份：{month_str}（范围内只有周六周天）")
-            continue
-
-        month_end = month_days[-1]
-
-        print()
-        print(f"[{month_index}/{len(month_starts)}] 检查月份：{month_str}")
-
-        dates_with_papers = _load_dates_with_papers(db_path, month_days[0], month_end)
-        missing_before_crawl = _missing_days(month_days, dates_with_papers)
-        print(
-            f"本月工作日范围 {month_days[0]} -> {month_end}："
-            f"已有数据 {len(month_days) - len(missing_before_crawl)} 天，"
-            f"空数据 {len(missing_before_crawl)} 天"
-        )
-        print(f"空数据工作日：{_format_days(missing_before_crawl)}")
-
-        should_crawl = force_crawl or bool(missing_before_crawl)
-        if should_crawl:
-            reason = "强制抓取" if force_crawl else "存在空数据日期"
-            print(f"开始整月抓取：{month_str}（{reason}）")
-            success = _crawl_month_with_retries(month_str)
-            if not success:
-                failed_months.append(month_str)
-                print(f"跳过本月 AI 增强：{month_str}（本月抓取失败）")
-                continue
-
-            dates_with_papers = _load_dates_with_papers(db_path, month_days[0], month_end)
-        else:
-            print(f"跳过整月抓取：{month_str}（本月日期均已有论文数据）")
-
-        if force_crawl:
-            days_to_enhance = [day for day in month_days if day in dates_with_papers]
-        else:
-            days_to_enhance = [day for day in missing_before_crawl if day in dates_with_papers]
-
-        still_empty_days = _missing_days(missing_before_crawl, dates_with_papers)
-        if still_empty_days:
-            print(f"抓取后仍无论文数据，跳过 AI 增强：{_format_days(still_empty_days)}")
-
-        if not days_to_enhance:
-            print(f"本月没有需要 AI 增强的新增日期：{month_str}")
-            continue
-
-        for day_index, current_day in enumerate(days_to_enhance, start=1):
-            day_str = current_day.strftime('%Y-%m-%d')
-            print(f"  - [{day_index}/{len(days_to_enhance)}] AI增强：{day_str}")
-            success = ai_enhance_only(day_str)
-            if not success:
-                print(f"AI增强失败：{day_str}")
-                return False
+    if not days:
+        print("区间内没有公布日，无需处理")
+        return True
+
+    dates_with_papers = _load_dates_with_papers(db_path, start_day, end_day)
+    missing_before_crawl = _missing_days(days, dates_with_papers)
+    print(f"已有数据 {len(days) - len(missing_before_crawl)} 天，空数据 {len(missing_before_crawl)} 天")
+    print(f"空数据公布日：{_format_days(missing_before_crawl)}")
+
+    days_to_crawl = days if force_crawl else missing_before_crawl
+    failed_windows = []
+    if days_to_crawl:
+        windows = plan_backfill_windows(days_to_crawl, max_window_days)
+        reason = "强制抓取" if force_crawl else "存在空数据日期"
+        print(f"计划抓取 {len(windows)} 个窗口（{reason}）：{', '.join(_format_window(window) for window in windows)}")
+        failed_windows = _crawl_windows_with_retries(windows, db_path, concurrency)
+        dates_with_papers = _load_dates_with_papers(db_path, start_day, end_day)
+    else:
+        print("跳过抓取：区间内的公布日均已有论文数据")
+
+    failed_days = {day for first, last in failed_windows for day in days if first <= day <= last}
+    days_to_enhance = [day for day in days_to_crawl if day in dates_with_papers and day not in failed_days]
+
+    still_empty_days = _missing_days([day for day in missing_before_crawl if day not in failed_days], dates_with_papers)
+    if still_empty_days:
+        print(f"抓取后仍无论文数据，跳过 AI 增强：{_format_days(still_empty_days)}")
+
+    for day_index, current_day in enumerate(days_to_enhance, start=1):
+        day_str = current_day.strftime('%Y-%m-%d')
+        print(f"  - [{day_index}/{len(days_to_enhance)}] AI增强：{day_str}")
+        success = ai_enhance_only(day_str)
+        if not success:
+            print(f"AI增强失败：{day_str}")
+            return False
 
     print()
-    if failed_months:
-        print("批量处理完成，但以下月份抓取失败：")
-        for failed_month in failed_months:
-            print(f"- {failed_month}")
+    if failed_windows:
+        print("补齐完成，但以下窗口抓取失败：")
+        for window in failed_windows:
+            print(f"- {_format_window(window)}")
         return False
 
     print("全部处理完成！")
@@ -206,12 +216,21 @@ def run_all_data(start_date: str, end_date: str, db_path: str | Path = DEFAULT_D
 if __name__ == "__main__":
     import argparse
 
-    parser = argparse.ArgumentParser(description="按月抓取、按天AI增强历史论文数据")
+    parser = argparse.ArgumentParser(description="找出缺失的公布日，按天/按周窗口并发抓取，并逐日AI增强历史论文数据")
     parser.add_argument('--start-date', default='2021-04-26', help='开始日期，格式 YYYY-MM-DD')
     parser.add_argument('--end-date', default='2021-07-31', help='结束日期，格式 YYYY-MM-DD')
     parser.add_argument('--db-path', default=str(DEFAULT_DB_PATH), help='papers.db 路径')
-    parser.add_argument('--force-crawl', action='store_true', help='忽略数据库检查，恢复为每个月都抓取')
+    parser.add_argument('--force-crawl', action='store_true', help='忽略数据库检查，抓取区间内的所有公布日')
+    parser.add_argument('--window-days', type=int, help='每个抓取窗口最多跨多少天，默认 BACKFILL_WINDOW_DAYS 或 7')
+    parser.add_argument('--concurrency', type=int, help='同时抓取的窗口数，默认 BACKFILL_CONCURRENCY 或 2')
 
     args = parser.parse_args()
-    success = run_all_data(args.start_date, args.end_date, db_path=args.db_path, force_crawl=args.force_crawl)
+    success = run_all_data(
+        args.start_date,
+        args.end_date,
+        db_path=args.db_path,
+        force_crawl=args.force_crawl,
+        max_window_days=args.window_days,
+        concurrency=args.concurrency,
+    )
     sys.exit(0 if success else 1)
@@ -266,7 +266,50 @@ def _check_existing_ai_enhanced_output(crawl_date: str, language: str) -> tuple[
         f"{target_file.name} 已存在且质量校验通过，共 {quality_stats['valid_count']} 条",
     )
 
-def crawl_only(all=False, date_set=None, force_refetch_date=None):
+def _persist_crawl_metrics(scraper, crawl_date: str) -> Path | None:
+    """
+    打印本次爬取的指标摘要，并写入 CRAWL_METRICS_DIR（默认 logs/crawl_metrics）下的JSON文件，
+    CRAWL_METRICS_PROMETHEUS 为真时同时写入Prometheus文本格式，便于逐日对比爬取性能
+    """
+    metrics = scraper.metrics
+    if not metrics.pages and not metrics.phases:
+        return None
+    print(f"爬取指标: {metrics.format_summary()}")
+    metrics_dir = os.environ.get("CRAWL_METRICS_DIR", "").strip() or os.path.join("logs", "crawl_metrics")
+    name = f"{crawl_date}_{metrics.mode or 'crawl'}_{metrics.started_at.strftime('%Y%m%d-%H%M%S')}"
+    try:
+        path = metrics.write(metrics_dir, name, prometheus=_is_true(os.environ.get("CRAWL_METRICS_PROMETHEUS"), False))
+    except OSError as e:
+        print(f"写入爬取指标失败: {e}")
+        return None
+    print(f"爬取指标已保存: {path}")
+    return path
+
+
+def _iter_dates(date_from: str, date_until: str):
+    """按顺序产出[date_from, date_until]内的每一天（YYYY-MM-DD）"""
+    current = date.fromisoformat(date_from)
+    last = date.fromisoformat(date_until)
+    while current <= last:
+        yield current.strftime("%Y-%m-%d")
+        current += timedelta(days=1)
+
+
+def _resolve_crawl_dates(all=None, date_set=None, date_until=None) -> tuple[bool, str, str | None]:
+    """
+    按 函数参数 > 环境变量 > 默认值 解析爬取日期，crawl_only 和区间AI增强共用
+
+    Returns:
+        tuple[bool, str, str | None]: (是否全量更新, 开始日期, 区间爬取的结束日期；不是区间爬取时为None)
+    """
+    env_all = os.environ.get("CRAWL_ALL", "false").lower()
+    crawl_all = all if all is not None else (env_all == "true" or env_all == "1")
+    crawl_date = date_set if date_set is not None else (os.environ.get("CRAWL_DATE", "") or date.today().strftime("%Y-%m-%d"))
+    crawl_until = date_until if date_until is not None else (os.environ.get("CRAWL_DATE_UNTIL", "") or None)
+    return crawl_all, crawl_date, crawl_until if crawl_until and not crawl_all else None
+
+
+def crawl_only(all=False, date_set=None, force_refetch_date=None, date_until=None):
     """
     仅运行arxiv爬虫，生成标准JSONL文件，不执行AI增强
     
@@ -274,10 +317,12 @@ def crawl_only(all=False, date_set=None, force_refetch_date=None):
         all (bool): 是否全量更新，默认为False
         date_set (str): 要爬取的日期，格式为YYYY-MM-DD，默认为今天的日期
         force_refetch_date (bool | None): 是否强制补抓指定日期，跳过增量模式的 up-to-date 检查
+        date_until (str | None): 区间爬取的结束日期（含），指定时一次爬取 date_set ~ date_until 每天公布的论文
     """
     # 从环境变量读取配置
     env_all = os.environ.get("CRAWL_ALL", "false").lower()
     env_date = os.environ.get("CRAWL_DATE", "")
+    env_date_until = os.environ.get("CRAWL_DATE_UNTIL", "")
     env_force_refetch_date = _is_true(os.environ.get("FORCE_REFETCH_DATE"), False)
     env_category_blacklist = os.environ.get("CATEGORY_BLACKLIST", "")
     env_category_whitelist = os.environ.get("CATEGORY_WHITELIST", "")
@@ -290,6 +335,7 @@ def crawl_only(all=False, date_set=None, force_refetch_date=None):
     print("\n--- 环境变量配置 ---")
     print(f"CRAWL_ALL: {env_all}")
     print(f"CRAWL_DATE: {env_date}")
+    print(f"CRAWL_DATE_UNTIL: {env_date_until}")
     print(f"FORCE_REFETCH_DATE: {env_force_refetch_date}")
     print(f"CATEGORY_BLACKLIST: {env_category_blacklist}")
     print(f"CATEGORY_WHITELIST: {env_category_whitelist}")
@@ -300,24 +346,39 @@ def crawl_only(all=False, date_set=None, force_refetch_date=None):
     print("------------------\n")
     
     # 优先使用函数参数，其次使用环境变量，最后使用默认值
-    crawl_all = all if all is not None else (env_all == "true" or env_all == "1")
-    crawl_date = date_set if date_set is not None else (env_date if env_date else date.today().strftime("%Y-%m-%d"))
+    crawl_all, crawl_date, crawl_until = _resolve_crawl_dates(all, date_set, date_until)
     force_refetch = (
         env_force_refetch_date if force_refetch_date is None else force_refetch_date
     )
+    crawl_range = crawl_until is not None
     mode_label = "全量更新" if crawl_all else "增量更新"
-    if force_refetch and not crawl_all:
+    if crawl_range:
+        mode_label = f"区间爬取（至 {crawl_until}）"
+    elif force_refetch and not crawl_all:
         mode_label += "（强制补抓指定日期）"
     print(f"开始爬取 {crawl_date} 的论文数据，模式：{mode_label}")
     
     # 创建ArxivScraper实例
     scraper = ArxivScraper(
         date_from=crawl_date,
-        date_until=crawl_date
+        date_until=crawl_until if crawl_range else crawl_date
     )
     
     try:
-        if crawl_all:
+        if crawl_range:
+            # 一次爬取整个区间，按公布日期分组写库，再一次性导出每天的文件
+            scraper.fetch_range()
+
+            print(f"生成markdown文件...")
+            scraper.to_markdown(meta=True)
+
+            print(f"生成标准JSONL文件...")
+            scraper.to_jsonl(output_dir="./data", filename_format="%Y-%m-%d")
+
+            print(f"更新assets/file-list.txt...")
+            for day in _iter_dates(crawl_date, crawl_until):
+                update_file_list(day)
+        elif crawl_all:
             # 当月全量更新
             import asyncio
             asyncio.run(scraper.fetch_all())
@@ -345,6 +406,59 @@ def crawl_only(all=False, date_set=None, force_refetch_date=None):
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        _persist_crawl_metrics(scraper, f"{crawl_date}_{crawl_until}" if crawl_range else crawl_date)
+
+
+def translate_only(date_set=None, date_until=None):
+    """
+    不爬取，只翻译数据库中已入库、通过分类过滤且缺少译文的论文，然后重新导出这些日期的markdown和JSONL。
+    配合 TRANSLATE_ON_CRAWL=false 使用，翻译服务慢或不可用时不会阻塞入库
+
+    Args:
+        date_set (str): 开始日期，格式为YYYY-MM-DD，默认为 CRAWL_DATE 或今天
+        date_until (str | None): 结束日期（含），默认为 CRAWL_DATE_UNTIL 或与开始日期相同
+    """
+    date_from = date_set or os.environ.get("CRAWL_DATE", "") or date.today().strftime("%Y-%m-%d")
+    date_to = date_until or os.environ.get("CRAWL_DATE_UNTIL", "") or date_from
+    print(f"开始翻译 {date_from} ~ {date_to} 缺少译文的论文...")
+    scraper = ArxivScraper(date_from=date_from, date_until=date_to)
+    try:
+        scraper.translate_only()
+
+        print(f"重新生成markdown文件...")
+        scraper.to_markdown(meta=True)
+
+        print(f"重新生成标准JSONL文件...")
+        scraper.to_jsonl(output_dir="./data", filename_format="%Y-%m-%d")
+        print(f"翻译完成！")
+        return True
+    except Exception as e:
+        print(f"翻译过程中发生错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def translate_missing_only():
+    """
+    回填整个数据库中缺少的译文（不做分类过滤），分页、有界并发、分批提交，中断后重新运行即可继续
+    """
+    trans_to = os.environ.get("TRANS_TO", "zh-CN")
+    if not trans_to:
+        print("TRANS_TO 为空，跳过翻译")
+        return True
+    import asyncio
+    from paper import PaperDatabase
+
+    try:
+        asyncio.run(PaperDatabase("papers.db").translate_missing(trans_to))
+        return True
+    except Exception as e:
+        print(f"回填译文时发生错误: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
 
 
 def ai_enhance_only(date_set=None):
@@ -569,21 +683,61 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="运行arxiv crawler爬虫，生成JSONL文件并更新assets/file-list.txt")
     parser.add_argument('--all', action='store_true', default=False, help='爬取当月全部信息，还是只爬取当天信息')
     parser.add_argument('--date', type=str, help='指定要爬取的日期，格式为YYYY-MM-DD。')
+    parser.add_argument(
+        '--date-until',
+        type=str,
+        help='区间爬取的结束日期（含），格式为YYYY-MM-DD：一次爬取 --date ~ --date-until 每天公布的论文并逐日导出。',
+    )
     parser.add_argument(
         '--force-refetch-date',
         action='store_true',
         default=False,
         help='强制重抓 --date 指定日期：删除当天已有记录，忽略已抓取/已最新判断，并重新入库覆盖当天结果。',
     )
+    parser.add_argument(
+        '--replay',
+        action='store_true',
+        default=False,
+        help='离线回放：只从页面缓存(PAGE_CACHE_DIR)读取搜索结果页，不访问网络。',
+    )
+    parser.add_argument(
+        '--translate-only',
+        action='store_true',
+        default=False,
+        help='不爬取，只翻译 --date ~ --date-until 内已入库、通过分类过滤且缺少译文的论文并重新导出（配合 TRANSLATE_ON_CRAWL=false）。',
+    )
+    parser.add_argument(
+        '--translate-missing',
+        action='store_true',
+        default=False,
+        help='不爬取，回填整个数据库中缺少的译文（分页、有界并发、可中断后继续）。',
+    )
     args = parser.parse_args()
+    if args.translate_missing:
+        sys.exit(0 if translate_missing_only() else 1)
+    if args.replay:
+        os.environ["PAGE_CACHE_MODE"] = "replay"
+    if args.translate_only:
+        sys.exit(0 if translate_only(args.date, args.date_until) else 1)
     
     # 运行爬虫
     success = crawl_only(
         all=args.all,
         date_set=args.date,
         force_refetch_date=args.force_refetch_date,
+        date_until=args.date_until,
     )
-    success = ai_enhance_only( args.date)
+    # 与crawl_only相同地解析日期，区间也可以来自CRAWL_DATE/CRAWL_DATE_UNTIL
+    _, crawl_date, crawl_until = _resolve_crawl_dates(args.all, args.date, args.date_until)
+    if crawl_until:
+        # 区间内没有论文的日期（周末、假期）跳过AI增强
+        days = [
+            day for day in _iter_dates(crawl_date, crawl_until)
+            if Path(f"./data/{day}.jsonl").exists() and Path(f"./data/{day}.jsonl").stat().st_size > 0
+        ]
+        success = all([ai_enhance_only(day) for day in days])
+    else:
+        success = ai_enhance_only( args.date)
     
     # 设置退出码
     sys.exit(0 if success else 1)